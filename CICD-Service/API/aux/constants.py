@@ -10,12 +10,31 @@
 # DEVELOPER DEFINED TESTS
 DEVELOPER_DEFINED_TEST_TEMP_STORAGE_DIR = "warehouse/developer-defined-tests"
 DEVELOPER_DEFINED_TEST_BASE_FTP_DIR = "developer-defined-tests"
+# Max. developer defined tests transferred from NODS at the same time
+DEVELOPER_DEFINED_TESTS_LOAD_WORKERS = 4
+# Content-addressed store of the developer defined tests, inside
+# DEVELOPER_DEFINED_TEST_BASE_FTP_DIR: blobs/<sha256[:2]>/<sha256>.tar.gz
+DEVELOPER_DEFINED_TEST_BLOBS_FTP_DIR = "blobs"
+# Tests being transferred from NODS, before they are moved to the blobs
+DEVELOPER_DEFINED_TEST_UPLOADS_FTP_DIR = "uploads"
+# Min. time (in seconds) a blob, or an upload, must be unreferenced before
+# it is garbage collected
+DEVELOPER_DEFINED_TEST_BLOBS_GC_GRACE_PERIOD = 24 * 60 * 60
 
 # TESTING ARTIFACTS
 TESTING_ARTIFACTS_FTP_ROOT_PATH = "/testing_artifacts"
 DEFAULT_5GASP_TESTING_ARTIFACTS_FTP_ROOT_PATH = "/testing_artifacts/5gasp_default"
 TESTING_ARTIFACTS_FTP_TEMP_STORAGE_DIR = "warehouse/testing-artifacts"
 DEPLOYMENT_INFO_FNAME = "deployment-info.json"
+# Local cache of the default testing artifacts, inside
+# TESTING_ARTIFACTS_FTP_TEMP_STORAGE_DIR
+DEFAULT_ARTIFACTS_CACHE_DIR = "5gasp_default_cache"
+DEFAULT_ARTIFACTS_CACHE_MAX_SIZE_MB = 256
+# Time (in seconds) during which a cached artifact is served without checking
+# if it changed in the FTP server
+DEFAULT_ARTIFACTS_CACHE_VALIDATION_TTL = 60
+# Number of locks that serialize the downloads of the same artifact
+DEFAULT_ARTIFACTS_CACHE_DOWNLOAD_LOCKS = 16
 
 
 # AUTH
@@ -50,6 +69,28 @@ FTP_LTR_USER = None
 FTP_LTR_PASSWORD = None
 FTP_LTR_URL = None
 
+# FTP Connection Pools
+# Max. connections to each FTP server
+FTP_POOL_MAX_SIZE = 8
+# Max. time (in seconds) each FTP operation may take
+FTP_TIMEOUT = 30
+# Idle connections are checked (NOOP) before being reused after this time
+# (in seconds)
+FTP_POOL_HEALTH_CHECK_AFTER = 30
+# Idle connections are closed after this time (in seconds), before the FTP
+# server does it (vsftpd's default idle_session_timeout is 300 seconds)
+FTP_POOL_MAX_IDLE_TIME = 240
+# Bytes sent at a time when streaming a file to an FTP server
+FTP_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Max. tests whose results are collected at the same time, when a validation
+# pipeline publishes them
+RESULTS_COLLECTION_CONCURRENCY = 8
+# Bytes of the Robot Framework outputs parsed at a time
+ROBOT_OUTPUT_CHUNK_SIZE = 64 * 1024
+# Gzip the pipelines' console logs when storing them in the FTP server
+CONSOLE_LOG_COMPRESSION = False
+
 # Database
 DB_NAME = None
 DB_LOCATION = None
@@ -71,6 +112,13 @@ TRVD_HOST=None
 # Testbeds
 TESTBEDS_INFO = None
 
+# LTR Manifests
+# Max. time (in seconds) the hash of an LTR file is reused without reading it
+LTR_MANIFEST_HASH_TTL = 3600
+LTR_MANIFEST_CHUNK_SIZE = 64 * 1024
+# Time (in seconds) between the publications of the LTR manifests
+LTR_MANIFEST_PUBLISH_INTERVAL = 600
+
 # Possible Test Status
 TEST_STATUS ={
     "submitted_on_manager": "SUBMITTED_TO_CI_CD_MANAGER",
@@ -92,4 +140,35 @@ TEST_STATUS ={
     "obtained_testing_artifacts_files": "OBTAINED_TESTING_ARTIFACTS_FILES"
 }
 
+# Test Dispatching
+DISPATCH_WORKERS = 4
+# Max. time (in seconds) a worker sleeps before polling the queue again
+DISPATCH_POLL_INTERVAL = 5
+# Max. number of times a job is tried when the CI/CD Agents can't be reached
+DISPATCH_MAX_ATTEMPTS = 6
+# Backoff (in seconds) before a job that couldn't reach the CI/CD Agents is
+# tried again
+DISPATCH_RETRY_INITIAL_DELAY = 15
+DISPATCH_RETRY_MAX_DELAY = 600
+# Time (in seconds) after which a job that is still running is considered
+# interrupted, e.g. by a shutdown, and is queued again. Must be longer than
+# any dispatch, whose requests to the CI/CD Agents time out much earlier
+DISPATCH_JOB_LEASE = 900
+DISPATCH_JOB_STATES = {
+    "queued": "QUEUED",
+    "running": "RUNNING",
+    "dispatched": "DISPATCHED",
+    "failed": "FAILED"
+}
+
+# CI/CD Agents Scheduling
+# Possible policies: least_loaded, weighted
+AGENT_SCHEDULING_POLICY = "least_loaded"
+# Max. time (in seconds) to wait for a CI/CD Agent to report its health
+AGENT_PROBE_TIMEOUT = 10
+# Time (in seconds) between health checks of an online CI/CD Agent
+AGENT_HEALTH_CHECK_INTERVAL = 15
+# Max. time (in seconds) between health checks of an offline CI/CD Agent
+AGENT_HEALTH_CHECK_MAX_BACKOFF = 600
+
 TMF_SERVICE_TEST_DEPLOYMENT_INFO_KEY = "deployment_info"
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# @Description: Garbage collector of the developer defined tests stored in the
+# results FTP server. Removes the blobs no longer referenced by any test
+# instance's test, the abandoned uploads and the tests stored with the old
+# layout ({nods_id}-{name}.tar.gz) that no test references. Nothing changed
+# in the last grace period is removed, so the tests being submitted are safe.
+# Usage (from the API's directory, with its config.ini):
+#   python3 -m aux.developer_defined_tests_gc [--grace-period SECONDS] [--dry-run]
+
+# generic imports
+import datetime as dt
+import argparse
+import logging
+import ftplib
+
+# custom imports
+from sql_app.database import SessionLocal
+import sql_app.CRUD.blobs as CRUD_Blobs
+from wrappers.ftp.client_pool import get_results_ftp_pool
+import test_helpers.blob_store as blob_store
+import aux.constants as Constants
+import aux.startup as Startup
+
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+LEGACY_TEST_EXTENSIONS = (".tar.gz", ".tar.gz.sha256", ".part")
+
+
+def collect_garbage(db, grace_period: int, dry_run: bool = False) -> dict:
+    """Removes the unreferenced developer defined tests
+
+    Args:
+        grace_period (int): min. time (in seconds) since a blob, or a file,
+        was last referenced, or modified, for it to be removed
+        dry_run (bool): only report what would be removed
+
+    Returns:
+        dict: number of files removed, by kind, and of fixed reference counts
+    """
+    ftp_pool = get_results_ftp_pool()
+    collectable_before = dt.datetime.utcnow() - dt.timedelta(seconds=grace_period)
+    removed = {"blobs": 0, "orphan_blobs": 0, "uploads": 0, "legacy_tests": 0}
+
+    def remove(kind, path):
+        if not __modified_before(ftp_pool, path, collectable_before):
+            return False
+        logging.info(f"{'Would remove' if dry_run else 'Removing'} {path}")
+        if not dry_run:
+            try:
+                ftp_pool.delete(path)
+            except ftplib.error_perm:
+                # Already removed
+                pass
+        removed[kind] += 1
+        return True
+
+    # Reference counts may be wrong if the tests were changed by hand
+    fixed_references = 0 if dry_run else CRUD_Blobs.recount_blob_references(db)
+
+    # Unreferenced blobs
+    for blob in CRUD_Blobs.get_unreferenced_blobs(db, collectable_before):
+        blob_path = blob_store.get_blob_path(blob.sha256)
+        if not __modified_before(ftp_pool, blob_path, collectable_before):
+            continue
+        # The row is removed first, and only if no reference was added
+        # meanwhile
+        if dry_run or CRUD_Blobs.delete_unreferenced_blob(
+                db, blob.sha256, collectable_before):
+            remove("blobs", blob_path)
+
+    # Blobs never referenced, e.g. if the test instance couldn't be created
+    known_blobs = {blob.sha256 for blob in CRUD_Blobs.get_blobs(db)}
+    blobs_directory = blob_store.get_blobs_directory()
+    for prefix in ftp_pool.list_dir(blobs_directory):
+        for name in ftp_pool.list_dir(f"{blobs_directory}/{prefix}"):
+            sha256 = name.removesuffix(blob_store.BLOB_EXTENSION)
+            if sha256 not in known_blobs:
+                remove("orphan_blobs", f"{blobs_directory}/{prefix}/{name}")
+
+    # Interrupted uploads
+    uploads_directory = blob_store.get_uploads_directory()
+    for name in ftp_pool.list_dir(uploads_directory):
+        remove("uploads", f"{uploads_directory}/{name}")
+
+    # Tests stored before the content-addressed store
+    referenced_paths = CRUD_Blobs.get_developer_defined_test_filepaths(db)
+    for name in ftp_pool.list_dir(Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR):
+        if not name.endswith(LEGACY_TEST_EXTENSIONS):
+            continue
+        path = f"{Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR}/{name}"
+        # Checksums are removed with their tests, and interrupted uploads
+        # are never referenced
+        test_path = path.removesuffix(".sha256")
+        if name.endswith(".part") or test_path not in referenced_paths:
+            remove("legacy_tests", path)
+
+    return {**removed, "fixed_reference_counts": fixed_references}
+
+
+def __modified_before(ftp_pool, path, limit):
+    try:
+        _, mtime = ftp_pool.stat(path)
+    except ftplib.error_perm:
+        # Missing, or a directory
+        return not ftp_pool.is_dir(path)
+    if mtime is None:
+        # The server doesn't support MDTM
+        return True
+    # MDTM replies are in UTC: YYYYMMDDHHMMSS[.sss]
+    return dt.datetime.strptime(mtime[:14], "%Y%m%d%H%M%S") < limit
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Removes the unreferenced developer defined tests from "\
+            "the results FTP server")
+    parser.add_argument(
+        "--grace-period", type=int,
+        default=Constants.DEVELOPER_DEFINED_TEST_BLOBS_GC_GRACE_PERIOD,
+        help="min. time, in seconds, a test must be unreferenced to be removed")
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="only report what would be removed")
+    args = parser.parse_args()
+
+    ret, message = Startup.load_config()
+    if not ret:
+        logging.critical(message)
+        exit(1)
+
+    db = SessionLocal()
+    try:
+        removed = collect_garbage(db, args.grace_period, args.dry_run)
+    finally:
+        db.close()
+    logging.info(f"Developer defined tests garbage collection: {removed}")
+
+
+if __name__ == "__main__":
+    main()
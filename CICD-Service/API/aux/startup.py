@@ -9,14 +9,16 @@
 # custom imports
 import aux.constants as Constants
 from sql_app.CRUD import auth as CRUD_Auth
+from wrappers.ftp.client_pool import get_results_ftp_pool
 
 # generic imports
+from alembic.config import Config as AlembicConfig
+from alembic import command as alembic_command
 import configparser
 import logging
 import yaml
 import os
 import inspect
-import ftputil
 
 # Logger
 logging.basicConfig(
@@ -104,6 +106,16 @@ def create_default_admin(db):
         roles = Constants.USER_ROLES)
     
 
+def run_database_migrations():
+    # Creates, or updates, the database's schema (migrations/versions)
+    alembic_config = AlembicConfig(os.path.join(os.path.dirname(currentdir),
+                                                "alembic.ini"))
+    # Keep the API's logging configuration
+    alembic_config.attributes["configure_logger"] = False
+    alembic_command.upgrade(alembic_config, "head")
+    logging.info("The database's schema is up to date!")
+
+
 def create_dir_to_store_developer_defined_tests():
     ddt_dir = Constants.DEVELOPER_DEFINED_TEST_TEMP_STORAGE_DIR
     if not os.path.exists(ddt_dir):
@@ -121,24 +133,28 @@ def create_dir_to_store_testing_artifacst():
 def create_dir_to_store_developer_defined_tests_ftp():
     try:
         # Check if base dir exists
-        ftp_host = Constants.FTP_RESULTS_URL.split(":")[0]
-        with ftputil.FTPHost(ftp_host, Constants.FTP_RESULTS_USER, 
-                             Constants.FTP_RESULTS_PASSWORD) as ftp_host:
-
-            # If the root directory does not exist, create it
-            if not ftp_host.path.isdir(
-                    Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR
-                ):
-                logging.info("Root directory for the developer defined tests "\
-                    "does not exist. Creating it...")
+        ftp_pool = get_results_ftp_pool()
+
+        # If the root directory does not exist, create it
+        if not ftp_pool.is_dir(
+                Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR
+            ):
+            logging.info("Root directory for the developer defined tests "\
+                "does not exist. Creating it...")
+        
+            ftp_pool.makedirs(Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR)
             
-                ftp_host.mkdir(Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR)
-                
-                logging.info("Developer Defined Tests directory was created!")
-            else:
-                logging.info("Developer Defined Tests directory was already "\
-                    "created!")
-    
+            logging.info("Developer Defined Tests directory was created!")
+        else:
+            logging.info("Developer Defined Tests directory was already "\
+                "created!")
+
+        # Directories of the content-addressed store
+        for directory in (Constants.DEVELOPER_DEFINED_TEST_BLOBS_FTP_DIR,
+                          Constants.DEVELOPER_DEFINED_TEST_UPLOADS_FTP_DIR):
+            ftp_pool.makedirs(
+                f"{Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR}/{directory}")
+
     except Exception as e:
         raise Exception("Impossible to create FTP Developer Defined Tests "\
             f"directory: {e}"
@@ -148,25 +164,23 @@ def create_dir_to_store_developer_defined_tests_ftp():
 def create_dir_to_store_testing_artifacts_ftp():
     try:
         # Check if base dir exists
-        ftp_host = Constants.FTP_RESULTS_URL.split(":")[0]
-        with ftputil.FTPHost(ftp_host, Constants.FTP_RESULTS_USER, 
-                             Constants.FTP_RESULTS_PASSWORD) as ftp_host:
-
-            # If the root directory does not exist, create it
-            if not ftp_host.path.isdir(
-                    Constants.TESTING_ARTIFACTS_FTP_ROOT_PATH
-                ):
-                logging.info("Root directory for the testing artifacts "\
-                    "does not exist. Creating it...")
+        ftp_pool = get_results_ftp_pool()
+
+        # If the root directory does not exist, create it
+        if not ftp_pool.is_dir(
+                Constants.TESTING_ARTIFACTS_FTP_ROOT_PATH
+            ):
+            logging.info("Root directory for the testing artifacts "\
+                "does not exist. Creating it...")
+        
+            ftp_pool.makedirs(Constants.TESTING_ARTIFACTS_FTP_ROOT_PATH)
             
-                ftp_host.mkdir(Constants.TESTING_ARTIFACTS_FTP_ROOT_PATH)
-                
-                logging.info("Testing artifacts directory was created!")
-            else:
-                logging.info("Testing artifacts directory was already "\
-                    "created!"
-                )
-    
+            logging.info("Testing artifacts directory was created!")
+        else:
+            logging.info("Testing artifacts directory was already "\
+                "created!"
+            )
+
     except Exception as e:
         raise Exception("Impossible to create testing artifacts "\
             f"directory: {e}"
@@ -176,29 +190,27 @@ def create_dir_to_store_testing_artifacts_ftp():
 def create_dir_to_store_5gasp_default_testing_artifacts_ftp():
     try:
         # Check if base dir exists
-        ftp_host = Constants.FTP_RESULTS_URL.split(":")[0]
-        with ftputil.FTPHost(ftp_host, Constants.FTP_RESULTS_USER, 
-                             Constants.FTP_RESULTS_PASSWORD) as ftp_host:
-
-            # If the root directory does not exist, create it
-            if not ftp_host.path.isdir(
-                    Constants.DEFAULT_5GASP_TESTING_ARTIFACTS_FTP_ROOT_PATH
-                ):
-                logging.info("Root directory for the defautl testing "\
-                    "artifacts does not exist. Creating it...")
+        ftp_pool = get_results_ftp_pool()
+
+        # If the root directory does not exist, create it
+        if not ftp_pool.is_dir(
+                Constants.DEFAULT_5GASP_TESTING_ARTIFACTS_FTP_ROOT_PATH
+            ):
+            logging.info("Root directory for the defautl testing "\
+                "artifacts does not exist. Creating it...")
+        
+            ftp_pool.makedirs(
+                Constants.DEFAULT_5GASP_TESTING_ARTIFACTS_FTP_ROOT_PATH
+            )
             
-                ftp_host.mkdir(
-                    Constants.DEFAULT_5GASP_TESTING_ARTIFACTS_FTP_ROOT_PATH
-                )
-                
-                logging.info("Testing artifacts default directory was "\
-                    "created!"
-                )
-            else: 
-                logging.info("Testing artifacts default directory was "\
-                    "already created!"
-                )
-    
+            logging.info("Testing artifacts default directory was "\
+                "created!"
+            )
+        else: 
+            logging.info("Testing artifacts default directory was "\
+                "already created!"
+            )
+
     except Exception as e:
         raise Exception("Impossible to create testing artifacts default"\
             f"directory: {e}"
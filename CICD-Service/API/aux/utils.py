@@ -181,6 +181,27 @@ def get_attachment(token,url_to_download):
         return False, f"Unable to get Attachment. Reason: {e}"
     return response
 
+def get_attachment_stream(token, url_to_download):
+    # Same as get_attachment, but the attachment's content is only read
+    # while the response is iterated
+    attachment_url = f"{Constants.NODS_HOST}/tmf-api{url_to_download}"
+    headers = {'Authorization': f'Bearer {token}'}
+    logging.info(f"Getting Attachment with URL : {attachment_url}")
+    try:
+        response = requests.get(
+            url = attachment_url,
+            headers=headers,
+            allow_redirects=True,
+            stream=True
+        )
+        if response.status_code != 200:
+            content = response.content
+            response.close()
+            raise Exception(content)
+    except Exception as e:
+        return False, f"Unable to get Attachment. Reason: {e}"
+    return True, response
+
 def patch_results(token,nods_id,data):
     headers = {'Authorization': f'Bearer ' + token,'Content-Type': 'application/json'}
     logging.info("patching data result on NODS")
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# @Description: Periodically checks the health of the CI/CD Agents. For each
+# agent, measures its latency, executors and queue usage, and stores the
+# results in the database (CI_CD_Agent.is_online and ci_cd_nodes_health) and
+# in the scheduler's in-memory snapshot. Agents that stay down are checked
+# with an exponential backoff.
+
+# generic imports
+import asyncio
+import logging
+import time
+
+# custom imports
+from sql_app.database import SessionLocal
+import sql_app.CRUD.agents as CRUD_Agents
+from wrappers.jenkins.client_pool import jenkins_client_pool
+from wrappers.jenkins.agent_scheduler import agent_scheduler
+import aux.constants as Constants
+
+# Logger
+logging.basicConfig(
+    format="%(module)-20s:%(levelname)-15s| %(message)s",
+    level=logging.INFO
+)
+
+# agent id -> (consecutive failures, time of the next check)
+__checks_schedule = {}
+__health_checker = None
+
+
+async def start_health_checker():
+    global __health_checker
+    # Run a first round before returning, so the scheduler has a snapshot
+    # before the first test is dispatched
+    await check_agents_health()
+    __health_checker = asyncio.create_task(__health_check_loop())
+    logging.info("Started the CI/CD Agents health checker.")
+
+
+async def __health_check_loop():
+    while True:
+        await asyncio.sleep(Constants.AGENT_HEALTH_CHECK_INTERVAL)
+        try:
+            await check_agents_health()
+        except Exception as e:
+            logging.error(f"Could not check the CI/CD Agents health: {e}")
+
+
+async def check_agents_health():
+    loop = asyncio.get_running_loop()
+    ci_cd_agents = await loop.run_in_executor(None, __get_all_agents)
+
+    # Forget the agents that were deleted
+    agents_ids = [ci_cd_agent.id for ci_cd_agent in ci_cd_agents]
+    for agent_id in list(__checks_schedule.keys()):
+        if agent_id not in agents_ids:
+            __checks_schedule.pop(agent_id)
+
+    now = time.time()
+    ci_cd_agents = [
+        ci_cd_agent
+        for ci_cd_agent in ci_cd_agents
+        if __checks_schedule.get(ci_cd_agent.id, (0, 0))[1] <= now
+    ]
+    if not ci_cd_agents:
+        return
+
+    results = await asyncio.gather(*[
+        __check_agent_health(loop, ci_cd_agent)
+        for ci_cd_agent in ci_cd_agents
+    ])
+
+    await loop.run_in_executor(None, __store_agents_health, results)
+
+
+async def __check_agent_health(loop, ci_cd_agent):
+    start = time.monotonic()
+    try:
+        ret, load = await asyncio.wait_for(
+            loop.run_in_executor(None, __probe_agent, ci_cd_agent),
+            timeout=Constants.AGENT_PROBE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        ret, load = False, f"did not answer in {Constants.AGENT_PROBE_TIMEOUT} seconds"
+    except Exception as e:
+        ret, load = False, str(e)
+    latency_ms = (time.monotonic() - start) * 1000
+    return __record_agent_health(ci_cd_agent, ret, load, latency_ms)
+
+
+def check_new_agent_health(ci_cd_agent):
+    """Checks a newly registered CI/CD Agent, so tests can be dispatched to
+    it before the next round of health checks"""
+    start = time.monotonic()
+    try:
+        ret, load = __probe_agent(ci_cd_agent)
+    except Exception as e:
+        ret, load = False, str(e)
+    latency_ms = (time.monotonic() - start) * 1000
+    __store_agents_health([
+        __record_agent_health(ci_cd_agent, ret, load, latency_ms)
+    ])
+
+
+def __record_agent_health(ci_cd_agent, ret, load, latency_ms):
+    failures, _ = __checks_schedule.get(ci_cd_agent.id, (0, 0))
+    if ret:
+        failures = 0
+        delay = Constants.AGENT_HEALTH_CHECK_INTERVAL
+    else:
+        failures += 1
+        delay = min(
+            Constants.AGENT_HEALTH_CHECK_INTERVAL * 2 ** failures,
+            Constants.AGENT_HEALTH_CHECK_MAX_BACKOFF
+        )
+        logging.warning(f"CI/CD Agent {ci_cd_agent.id} ({ci_cd_agent.url}) "
+            f"is offline: {load}. Next check in {delay} seconds.")
+    __checks_schedule[ci_cd_agent.id] = (failures, time.time() + delay)
+
+    if ret:
+        agent_scheduler.update_agent_health(
+            ci_cd_agent.id, True, latency_ms, load["busy_executors"],
+            load["total_executors"], load["queued_items"])
+        return ci_cd_agent.id, True, latency_ms, load, failures
+    agent_scheduler.update_agent_health(ci_cd_agent.id, False)
+    return ci_cd_agent.id, False, None, None, failures
+
+
+def __probe_agent(ci_cd_agent):
+    ret, jenkins_wrapper = jenkins_client_pool.get_client(ci_cd_agent)
+    if not ret:
+        return False, jenkins_wrapper
+    ret, load = jenkins_wrapper.get_load()
+    if not ret:
+        jenkins_client_pool.evict(ci_cd_agent.id)
+    return ret, load
+
+
+def __get_all_agents():
+    db = SessionLocal()
+    try:
+        ci_cd_agents = CRUD_Agents.get_all_nodes(db)
+        # detach the agents from the session
+        db.expunge_all()
+        return ci_cd_agents
+    finally:
+        db.close()
+
+
+def __store_agents_health(results):
+    db = SessionLocal()
+    try:
+        for agent_id, is_online, latency_ms, load, failures in results:
+            if is_online:
+                CRUD_Agents.update_ci_cd_agent_health(
+                    db, agent_id, True, latency_ms, load["busy_executors"],
+                    load["total_executors"], load["queued_items"], failures)
+            else:
+                CRUD_Agents.update_ci_cd_agent_health(
+                    db, agent_id, False, consecutive_failures=failures)
+    finally:
+        db.close()
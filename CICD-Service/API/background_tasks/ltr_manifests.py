@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# @Description: Periodically publishes the manifests of the LTR directories
+# (the tests' and the metrics collection files'), so the manifests requested
+# by the CI/CD Agents only have to be revalidated.
+
+# generic imports
+import asyncio
+import logging
+
+# custom imports
+from sql_app.database import SessionLocal
+from test_helpers import ltr_manifest as ltr_manifest_helper
+import aux.constants as Constants
+
+# Logger
+logging.basicConfig(
+    format="%(module)-20s:%(levelname)-15s| %(message)s",
+    level=logging.INFO
+)
+
+__publisher = None
+
+
+async def start_ltr_manifests_publisher():
+    global __publisher
+    # The first round runs in the background, since walking the LTR may take
+    # a while. Until then, the manifests are published when requested
+    __publisher = asyncio.create_task(__publish_loop())
+    logging.info("Started the LTR manifests publisher.")
+
+
+async def __publish_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, publish_ltr_manifests)
+        except Exception as e:
+            logging.error(f"Could not publish the LTR manifests: {e}")
+        await asyncio.sleep(Constants.LTR_MANIFEST_PUBLISH_INTERVAL)
+
+
+def publish_ltr_manifests():
+    db = SessionLocal()
+    try:
+        ltr_directories = ltr_manifest_helper.get_ltr_directories(db)
+    finally:
+        db.close()
+    ltr_manifest_helper.publish_ltr_manifests(ltr_directories)
+    ltr_manifest_helper.prune_ltr_manifests(ltr_directories)
+    logging.info(f"Published the manifests of {len(ltr_directories)} LTR directories.")
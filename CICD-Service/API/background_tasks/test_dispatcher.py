@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+# @Description: Workers that drive the dispatch of the submitted tests to the
+# CI/CD Agents. The test submission endpoints only persist the test and
+# enqueue it. The (blocking) interaction with Jenkins happens here.
+
+# generic imports
+import asyncio
+import logging
+import json
+
+# custom imports
+from sql_app.database import SessionLocal
+from sql_app import crud
+import sql_app.CRUD.agents as CRUD_Agents
+import sql_app.CRUD.dispatch as CRUD_Dispatch
+from wrappers.jenkins.client_pool import jenkins_client_pool
+from wrappers.jenkins.agent_scheduler import agent_scheduler
+import aux.constants as Constants
+import wrappers.jenkins.constants as JenkinsConstants
+import wrappers.jenkins.pipeline_configuration as JenkinsPipelineConfiguration
+
+# Logger
+logging.basicConfig(
+    format="%(module)-20s:%(levelname)-15s| %(message)s",
+    level=logging.INFO
+)
+
+__loop = None
+__wakeup = None
+__workers = []
+__requeuer = None
+
+
+class Test_Dispatch_Error(Exception):
+    """Exception raised when a test could not be dispatched to a CI/CD Agent.
+
+    Attributes:
+        message -- reason why the test could not be dispatched
+        failed_status -- test status stored as failed if the test is not
+        dispatched at all
+        transient -- whether the dispatch may succeed if tried later, e.g.
+        when no CI/CD Agent is available or it can't be reached
+    """
+
+    def __init__(self, message, failed_status=None, transient=False):
+        self.message = message
+        self.failed_status = failed_status
+        self.transient = transient
+        super().__init__(self.message)
+
+    def __str__(self):
+        return self.message
+
+
+async def start_workers(number_of_workers=Constants.DISPATCH_WORKERS):
+    global __loop, __wakeup, __requeuer
+    __loop = asyncio.get_running_loop()
+    __wakeup = asyncio.Event()
+
+    # Dispatch the jobs that were interrupted by a shutdown, once their lease
+    # expires
+    __requeuer = asyncio.create_task(__requeue_loop())
+
+    for worker_id in range(number_of_workers):
+        __workers.append(asyncio.create_task(__worker(worker_id)))
+    logging.info(f"Started {number_of_workers} test dispatch workers.")
+
+
+async def __requeue_loop():
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            requeued = await loop.run_in_executor(None, requeue_interrupted_jobs)
+            if requeued:
+                notify_new_job()
+        except Exception as e:
+            logging.error(f"Could not requeue the interrupted dispatch jobs: {e}")
+        await asyncio.sleep(Constants.DISPATCH_JOB_LEASE)
+
+
+def requeue_interrupted_jobs():
+    db = SessionLocal()
+    try:
+        return CRUD_Dispatch.requeue_interrupted_test_dispatch_jobs(db)
+    finally:
+        db.close()
+
+
+def notify_new_job():
+    # May be invoked from the event loop or from a threadpool thread
+    if __loop is not None:
+        __loop.call_soon_threadsafe(__wakeup.set)
+
+
+async def __worker(worker_id):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            processed = await loop.run_in_executor(None, dispatch_next_job)
+        except Exception as e:
+            logging.error(f"Dispatch worker {worker_id} failed: {e}")
+            processed = False
+
+        if processed:
+            continue
+
+        # Nothing to do. Wait for a new job or poll again after a while
+        try:
+            await asyncio.wait_for(
+                __wakeup.wait(),
+                timeout=Constants.DISPATCH_POLL_INTERVAL
+            )
+        except asyncio.TimeoutError:
+            pass
+        __wakeup.clear()
+
+
+def dispatch_next_job():
+    db = SessionLocal()
+    try:
+        dispatch_job = CRUD_Dispatch.claim_next_test_dispatch_job(db)
+        if not dispatch_job:
+            return False
+
+        try:
+            # The job is marked as dispatched as soon as the build is queued
+            dispatch_test_instance(
+                db,
+                dispatch_job.id,
+                dispatch_job.test_instance_id,
+                json.loads(dispatch_job.payload)
+            )
+        except Exception as e:
+            logging.error(
+                f"Could not dispatch test instance "
+                f"{dispatch_job.test_instance_id}. Reason: {e}"
+            )
+            db.rollback()
+            __handle_dispatch_error(db, dispatch_job, e)
+        return True
+    finally:
+        db.close()
+
+
+def __handle_dispatch_error(db, dispatch_job, error):
+    transient = isinstance(error, Test_Dispatch_Error) and error.transient
+    if transient and dispatch_job.attempts < Constants.DISPATCH_MAX_ATTEMPTS:
+        delay = min(
+            Constants.DISPATCH_RETRY_INITIAL_DELAY * 2 ** (dispatch_job.attempts - 1),
+            Constants.DISPATCH_RETRY_MAX_DELAY
+        )
+        CRUD_Dispatch.retry_test_dispatch_job(db, dispatch_job.id, delay, str(error))
+        return
+
+    # The test will not be dispatched
+    if isinstance(error, Test_Dispatch_Error) and error.failed_status:
+        crud.create_test_status(db, dispatch_job.test_instance_id,
+                                error.failed_status, False)
+    CRUD_Dispatch.update_test_dispatch_job_state(
+        db,
+        dispatch_job.id,
+        Constants.DISPATCH_JOB_STATES["failed"],
+        str(error)
+    )
+
+
+def dispatch_test_instance(db, dispatch_job_id, test_instance_id, payload):
+    test_instance = crud.get_test_instance(db, test_instance_id)
+    executed_tests_info = payload["executed_tests_info"]
+    # Jobs enqueued before the execution groups were kept have no groups
+    test_executions = payload.get("test_executions")
+    descriptor_metrics_collection = payload["descriptor_metrics_collection"]
+    metrics_collection_information = Constants.METRICS_COLLECTION_INFO
+    testbed_tests = crud.get_test_info_by_testbed_id(db, test_instance.testbed_id)
+
+    # Check if the CI/CD Node for this test is already registered
+    logging.info(f"Will gather the testbed's CI/CD Agent...")
+    testbeds_ci_cd_agents = CRUD_Agents.get_ci_cd_agents_by_testbed(
+        db, test_instance.testbed_id)
+
+    logging.info("testbeds_ci_cd_agents: " + ",".join(
+        [
+            f"({agent.id}, {agent.url})"
+            for agent
+            in testbeds_ci_cd_agents
+        ]
+        )
+    )
+
+    selected_ci_cd_node = agent_scheduler.select_agent(testbeds_ci_cd_agents)
+
+    if selected_ci_cd_node is None:
+        raise Test_Dispatch_Error("No CI/CD Agent Available",
+                                  Constants.TEST_STATUS["ci_cd_agent_auth"],
+                                  transient=True)
+
+    logging.info("Testbed's CI/CD Agent has been selected!")
+    logging.info(
+        f"The agent is available at {selected_ci_cd_node.url}"
+    )
+
+    try:
+        __dispatch_to_agent(db, dispatch_job_id, test_instance, selected_ci_cd_node,
+                            executed_tests_info, test_executions, testbed_tests,
+                            descriptor_metrics_collection,
+                            metrics_collection_information)
+    except Exception:
+        # The build was accounted for when the agent was selected
+        agent_scheduler.build_finished(selected_ci_cd_node.id)
+        raise
+
+
+def __dispatch_to_agent(db, dispatch_job_id, test_instance, selected_ci_cd_node,
+                        executed_tests_info, test_executions, testbed_tests,
+                        descriptor_metrics_collection,
+                        metrics_collection_information):
+    ret, jenkins_wrapper = jenkins_client_pool.get_client(selected_ci_cd_node)
+    if not ret:
+        # Clients that can't connect are not pooled
+        raise Test_Dispatch_Error(jenkins_wrapper,
+                                  Constants.TEST_STATUS["ci_cd_agent_auth"],
+                                  transient=True)
+
+    # A retried dispatch doesn't store again the statuses of the steps that
+    # succeeded in the previous attempts
+    recorded_statuses = {
+        test_status.state
+        for test_status in crud.get_test_status_given_test_id(db, test_instance.id)
+        if test_status.success
+    }
+
+    # The statuses are committed before each call to the CI/CD Agent, the
+    # rows in between in a single transaction
+    with crud.Unit_Of_Work(db) as uow:
+        crud.update_test_instance_ci_cd_agent(
+            db, test_instance.id, selected_ci_cd_node.id, uow=uow)
+        __create_success_status(db, test_instance.id, recorded_statuses,
+                                Constants.TEST_STATUS["ci_cd_agent_auth"], uow)
+
+    # The Jenkins job is content-addressed: test instances with the same
+    # configuration reuse it, the test instance id being a build parameter
+    pipeline_configuration = JenkinsPipelineConfiguration.Jenkins_Pipeline_Configuration(
+        executed_tests_info,
+        testbed_tests,
+        descriptor_metrics_collection,
+        metrics_collection_information,
+        test_instance.testbed_id,
+        test_executions
+    )
+    try:
+        configuration_hash = pipeline_configuration.get_configuration_hash()
+    except Exception as e:
+        raise Test_Dispatch_Error(f"Couldn't create pipeline script - {e}",
+                                  Constants.TEST_STATUS["created_pipeline_script"])
+
+    jenkins_job_name = f"{test_instance.netapp_id}-{test_instance.network_service_id}-"\
+        f"{configuration_hash[:JenkinsConstants.JOB_HASH_LENGTH]}"
+
+    ret, job_exists = jenkins_wrapper.job_exists(jenkins_job_name)
+    if not ret:
+        jenkins_client_pool.evict(selected_ci_cd_node.id)
+        raise Test_Dispatch_Error(job_exists,
+                                  Constants.TEST_STATUS["submitted_pipeline_script"],
+                                  transient=True)
+
+    uow = crud.Unit_Of_Work(db)
+    if job_exists:
+        logging.info(f"Will reuse the Jenkins Job {jenkins_job_name}!")
+        __create_success_status(db, test_instance.id, recorded_statuses,
+                                Constants.TEST_STATUS["created_pipeline_script"], uow)
+    else:
+        logging.info(f"Will create Jenkins Pipeline Script!")
+        # create jenkins pipeline script
+        try:
+            pipeline_config = pipeline_configuration.create_jenkins_pipeline_script()
+        except Exception as e:
+            raise Test_Dispatch_Error(f"Couldn't create pipeline script - {e}",
+                                      Constants.TEST_STATUS["created_pipeline_script"])
+
+        __create_success_status(db, test_instance.id, recorded_statuses,
+                                Constants.TEST_STATUS["created_pipeline_script"], uow)
+        logging.info(f"Will submit Jenkins Pipeline!")
+
+        # submit pipeline scripts
+        ret, message = jenkins_wrapper.create_new_job(jenkins_job_name, pipeline_config)
+
+        if not ret:
+            # The job may have been created, meanwhile, by another worker
+            ret, job_exists = jenkins_wrapper.job_exists(jenkins_job_name)
+            if not ret or not job_exists:
+                jenkins_client_pool.evict(selected_ci_cd_node.id)
+                raise Test_Dispatch_Error(message,
+                                          Constants.TEST_STATUS["submitted_pipeline_script"],
+                                          transient=True)
+
+    __create_success_status(db, test_instance.id, recorded_statuses,
+                            Constants.TEST_STATUS["submitted_pipeline_script"], uow)
+    uow.commit()
+
+    logging.info("Trying to run Jenkins Job...")
+    # run jenkins job
+    ret, message = jenkins_wrapper.run_job(
+        jenkins_job_name, {"test_id": test_instance.id})
+
+    if not ret:
+        jenkins_client_pool.evict(selected_ci_cd_node.id)
+        raise Test_Dispatch_Error(message,
+                                  Constants.TEST_STATUS["submitted_pipeline_script"],
+                                  transient=True)
+    queue_item_id = message
+
+    # The build was queued, so the job must not be retried, even if one of
+    # the next steps fails
+    CRUD_Dispatch.update_test_dispatch_job_state(
+        db, dispatch_job_id, Constants.DISPATCH_JOB_STATES["dispatched"])
+
+    logging.info(f"Jenkins Job was dispatched for the CI/CD Agent")
+    try:
+        # The build number is only known once the queue item leaves the
+        # queue. It will be resolved asynchronously
+        crud.update_test_instance_extra_info(db, test_instance.id, json.dumps(
+            {
+                "job_name": jenkins_job_name,
+                "queue_item_id": queue_item_id,
+                "build_number": None
+            }
+        ))
+
+        asyncio.run_coroutine_threadsafe(
+            resolve_build_number(jenkins_wrapper, test_instance.id, queue_item_id),
+            __loop
+        )
+    except Exception as e:
+        db.rollback()
+        logging.error(
+            f"Could not store the queue item {queue_item_id} of test instance "
+            f"{test_instance.id}. Reason: {e}"
+        )
+
+    logging.info(
+        f"Test instance {test_instance.id} was dispatched to the CI/CD Agent "
+        f"at {selected_ci_cd_node.url} (job: {jenkins_job_name}, "
+        f"queue item: {queue_item_id})."
+    )
+
+
+def __create_success_status(db, test_instance_id, recorded_statuses, state, uow):
+    if state.upper() in recorded_statuses:
+        return
+    crud.create_test_status(db, test_instance_id, state, True, uow=uow)
+    recorded_statuses.add(state.upper())
+
+
+async def resolve_build_number(jenkins_wrapper, test_instance_id, queue_item_id):
+    loop = asyncio.get_running_loop()
+    delay = JenkinsConstants.QUEUE_ITEM_RESOLVE_INITIAL_DELAY
+    for _ in range(JenkinsConstants.QUEUE_ITEM_RESOLVE_MAX_ATTEMPTS):
+        await asyncio.sleep(delay)
+        ret, message = await loop.run_in_executor(
+            None, jenkins_wrapper.get_queue_item_build_number, queue_item_id)
+        if not ret:
+            logging.error(
+                f"Could not resolve the build number of test instance "
+                f"{test_instance_id}. Reason: {message}"
+            )
+            return
+        if message is not None:
+            await loop.run_in_executor(
+                None, __store_build_number, test_instance_id, message)
+            return
+        delay = min(delay * 2, JenkinsConstants.QUEUE_ITEM_RESOLVE_MAX_DELAY)
+
+    # The build number will be resolved when the results are published
+    logging.warning(
+        f"The queue item {queue_item_id} of test instance {test_instance_id} "
+        "is still waiting for an executor."
+    )
+
+
+def __store_build_number(test_instance_id, build_number):
+    db = SessionLocal()
+    try:
+        crud.update_test_instance_build_number(db, test_instance_id, build_number)
+    finally:
+        db.close()
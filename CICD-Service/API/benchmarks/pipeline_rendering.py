@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# @Description: Micro-benchmark of the rendering of the Jenkins Job
+# configuration, for testing descriptors with 1, 50 and 500 testcases.
+# Usage: python3 benchmarks/pipeline_rendering.py [number of repetitions]
+
+# generic imports
+import inspect
+import timeit
+import sys
+import os
+
+# import from parent directory
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# custom imports
+import aux.constants as Constants
+import wrappers.jenkins.constants as JenkinsConstants
+from wrappers.jenkins.pipeline_template import Pipeline_Template
+from wrappers.jenkins.pipeline_configuration import Jenkins_Pipeline_Configuration
+
+TESTCASES = [1, 50, 500]
+
+
+class Available_Test:
+
+    def __init__(self, testid):
+        self.testid = testid
+
+    def as_dict(self):
+        return {
+            "testid": self.testid,
+            "ftp_base_location": f"tests/{self.testid}/",
+            "test_filename": "testBandwidth.robot",
+        }
+
+
+def create_descriptor(number_of_testcases):
+    available_tests = [Available_Test("bandwidth"), Available_Test("packet_loss")]
+    executed_tests_info = [
+        {
+            "testcase_id": i,
+            "type": "predefined",
+            "name": available_tests[i % len(available_tests)].testid,
+            "full_name": f"{available_tests[i % len(available_tests)].testid}_{i}",
+            "parameters": [
+                {"key": "host1_ip", "value": "10.0.30.55"},
+                {"key": "host1_username", "value": "ubuntu"},
+            ],
+        }
+        for i in range(number_of_testcases)
+    ]
+    descriptor_metrics_collection = [
+        {"parameters": [{"key": "target_ip", "value": "10.0.30.55"}]}
+    ]
+    return executed_tests_info, available_tests, descriptor_metrics_collection
+
+
+def main(repetitions):
+    Constants.CI_CD_MANAGER_URL = "http://ci-cd-manager.5gasp.eu"
+    Constants.MR_LOCATION = "http://metrics-repository.5gasp.eu"
+    Constants.MR_DB = "metrics"
+    metrics_collection_information = {
+        "metrics_collection": {
+            "ftp_base_location": "metrics_collection/",
+            "test_filename": "metrics_collection.robot",
+        }
+    }
+
+    start = timeit.default_timer()
+    JenkinsConstants.BASE_PIPELINE = open(JenkinsConstants.BASE_PIPELINE_FILEPATH).read()
+    JenkinsConstants.PIPELINE_TEMPLATE = Pipeline_Template(
+        JenkinsConstants.JENKINS_BASE_PIPELINE_SCRIPT,
+        JenkinsConstants.BASE_PIPELINE
+    )
+    print(f"Template compilation: {(timeit.default_timer() - start) * 1000:.3f} ms")
+
+    for number_of_testcases in TESTCASES:
+        executed_tests_info, available_tests, descriptor_metrics_collection = \
+            create_descriptor(number_of_testcases)
+
+        def render():
+            return Jenkins_Pipeline_Configuration(
+                executed_tests_info, available_tests,
+                descriptor_metrics_collection, metrics_collection_information,
+                "testbed_itav"
+            ).create_jenkins_pipeline_script()
+
+        # Rendering prints each test, as the CI/CD Manager does
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            size = len(render())
+            total = timeit.timeit(render, number=repetitions)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(f"{number_of_testcases:>4} testcases: "
+              f"{total / repetitions * 1000:.3f} ms per render ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @Description: Compares the time and peak memory needed to parse Robot
+# Framework outputs (output.xml) of several sizes, with a full ElementTree
+# and with the streaming parser.
+# Usage: python3 benchmarks/robot_output_parsing.py [number of keywords]
+
+# generic imports
+import xml.etree.ElementTree as ET
+import tracemalloc
+import tempfile
+import inspect
+import timeit
+import sys
+import os
+
+# import from parent directory
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+# custom imports
+from test_helpers.robot_output import parse_robot_output
+
+KEYWORDS = [1000, 100000]
+
+
+def create_output(output_file, number_of_keywords):
+    status = 'status="PASS" starttime="20220601 10:00:00.000" ' \
+        'endtime="20220601 10:00:01.500"'
+    output_file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                      b'<robot generator="Robot 5.0">\n<suite id="s1" name="Test">\n'
+                      b'<test id="s1-t1" name="Test">\n')
+    for i in range(number_of_keywords):
+        output_file.write(
+            f'<kw name="Keyword {i % 20}" library="Library">'
+            f'<arg>argument {i}</arg><msg timestamp="20220601 10:00:00.500" '
+            f'level="INFO">{"x" * 200}</msg><status {status}/></kw>\n'.encode())
+    output_file.write(
+        f'<status {status}/>\n</test>\n<status {status}/>\n</suite>\n'
+        '<statistics><total><stat pass="1" fail="0" skip="0">All Tests</stat>'
+        '</total></statistics>\n<errors/>\n</robot>\n'.encode())
+
+
+def parse_with_element_tree(path):
+    root = ET.fromstring(open(path, "rb").read())
+    return int(root.findall("statistics")[0].find('total').find('stat').attrib['fail'])
+
+
+def parse_streaming(path):
+    with open(path, "rb") as output_file:
+        return parse_robot_output(output_file).failed
+
+
+def measure(parse, path):
+    # Tracing the memory allocations slows down the parsing, so the time and
+    # the memory are measured in different runs
+    start = timeit.default_timer()
+    parse(path)
+    elapsed = timeit.default_timer() - start
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(keywords):
+    for number_of_keywords in keywords:
+        with tempfile.NamedTemporaryFile(suffix=".xml") as output_file:
+            create_output(output_file, number_of_keywords)
+            output_file.flush()
+            size = os.path.getsize(output_file.name)
+            for name, parse in (("ElementTree", parse_with_element_tree),
+                                ("streaming", parse_streaming)):
+                elapsed, peak = measure(parse, output_file.name)
+                print(f"{number_of_keywords:>7} keywords ({size / 2**20:.1f} MB), "
+                      f"{name:>11}: {elapsed * 1000:.0f} ms, "
+                      f"peak memory {peak / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main([int(sys.argv[1])] if len(sys.argv) > 1 else KEYWORDS)
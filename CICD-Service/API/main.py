@@ -38,7 +38,9 @@ import aux.constants as Constants
 import aux.startup as Startup
 import aux.utils as Utils
 from sql_app import models
+from background_tasks import test_dispatcher, agents_health, ltr_manifests
 import wrappers.jenkins.constants as JenkinsConstants
+from wrappers.jenkins.pipeline_template import Pipeline_Template
 
 
 
@@ -127,7 +129,7 @@ async def startup_event():
     MODELS_INITIALIZED = False
     for i in range(10):
         try:
-            models.Base.metadata.create_all(bind=engine)
+            Startup.run_database_migrations()
             MODELS_INITIALIZED = True
             break
         except Exception as e:
@@ -173,6 +175,10 @@ async def startup_event():
     # Load Jenkins Pipeline
     try:
         JenkinsConstants.BASE_PIPELINE = open(JenkinsConstants.BASE_PIPELINE_FILEPATH).read()
+        JenkinsConstants.PIPELINE_TEMPLATE = Pipeline_Template(
+            JenkinsConstants.JENKINS_BASE_PIPELINE_SCRIPT,
+            JenkinsConstants.BASE_PIPELINE
+        )
     except Exception as e:
         logging.critical(3)
         db.close()
@@ -187,4 +193,16 @@ async def startup_event():
         logging.critical(3)
         db.close()
         return exit(7)
+
+    db.close()
+
+    # Check the CI/CD Agents health, so the dispatcher knows which ones are
+    # online before dispatching the first test
+    await agents_health.start_health_checker()
+
+    # Start the workers that dispatch the submitted tests to the CI/CD Agents
+    await test_dispatcher.start_workers()
+
+    # Publish the manifests of the LTR directories the CI/CD Agents sync
+    await ltr_manifests.start_ltr_manifests_publisher()
     
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# @Description: Runs the migrations of the CI/CD Manager's database, with the
+# API's engine (sql_app/database.py) and its models as the target schema.
+
+# generic imports
+from logging.config import fileConfig
+from alembic import context
+
+# custom imports
+from sql_app.database import engine, Base
+from sql_app import models
+
+config = context.config
+
+# The API keeps its own logging configuration when it runs the migrations
+if config.config_file_name is not None and \
+        config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    # Generates the SQL, instead of running it (alembic upgrade --sql)
+    context.configure(
+        url=engine.url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
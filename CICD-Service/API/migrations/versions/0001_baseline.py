@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# @Description: Baseline of the CI/CD Manager's database, as it was created
+# by Base.metadata.create_all before the migrations. Databases created that
+# way already have most of these tables, so only the missing ones are created.
+
+"""baseline
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    def create_table(name, *columns, indexes=()):
+        if name in existing_tables:
+            return
+        op.create_table(name, *columns)
+        for index_name, index_columns, unique in indexes:
+            op.create_index(index_name, name, index_columns, unique=unique)
+
+    create_table(
+        "testbeds",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+        sa.Column("description", sa.String()),
+        indexes=[("ix_testbeds_id", ["id"], False)]
+    )
+    create_table(
+        "ci_cd_nodes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("url", sa.String()),
+        sa.Column("username", sa.String()),
+        sa.Column("password", sa.String()),
+        sa.Column("testbed_id", sa.String(), sa.ForeignKey("testbeds.id"), nullable=False),
+        sa.Column("communication_token", sa.String()),
+        sa.Column("is_online", sa.Boolean()),
+        indexes=[("ix_ci_cd_nodes_id", ["id"], False)]
+    )
+    create_table(
+        "ci_cd_nodes_health",
+        sa.Column("ci_cd_node_id", sa.Integer(),
+                  sa.ForeignKey("ci_cd_nodes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("checked_at", sa.DateTime()),
+        sa.Column("latency_ms", sa.Float()),
+        sa.Column("busy_executors", sa.Integer()),
+        sa.Column("total_executors", sa.Integer()),
+        sa.Column("queued_items", sa.Integer()),
+        sa.Column("consecutive_failures", sa.Integer(), nullable=False),
+    )
+    create_table(
+        "test_instances",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("netapp_id", sa.String(), nullable=False),
+        sa.Column("network_service_id", sa.String(), nullable=False),
+        sa.Column("build", sa.Integer()),
+        sa.Column("testbed_id", sa.String(), sa.ForeignKey("testbeds.id"), nullable=False),
+        sa.Column("ci_cd_node_id", sa.Integer(), sa.ForeignKey("ci_cd_nodes.id"), nullable=True),
+        sa.Column("extra_information", sa.String()),
+        sa.Column("access_token", sa.String(), nullable=False),
+        sa.Column("test_log_location", sa.String()),
+        sa.Column("test_results_location", sa.String()),
+        sa.Column("nods_id", sa.String()),
+        indexes=[("ix_test_instances_id", ["id"], False)]
+    )
+    create_table(
+        "test_instance_build_counters",
+        sa.Column("netapp_id", sa.String(), primary_key=True),
+        sa.Column("network_service_id", sa.String(), primary_key=True),
+        sa.Column("last_build", sa.Integer(), nullable=False),
+    )
+    create_table(
+        "test_dispatch_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_instance_id", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("payload", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        indexes=[("ix_test_dispatch_jobs_id", ["id"], False)]
+    )
+    create_table(
+        "test_status",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("timestamp", sa.DateTime()),
+        sa.Column("test_id", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("success", sa.Boolean(), nullable=False),
+        indexes=[("ix_test_status_id", ["id"], False)]
+    )
+    create_table(
+        "testing_artifact",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_instance_id", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+        sa.Column("ftp_base_path", sa.String(), nullable=False),
+        indexes=[("ix_testing_artifact_id", ["id"], False)]
+    )
+    create_table(
+        "test_instance_tests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_instance", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("original_test_name", sa.String(), nullable=True),
+        sa.Column("performed_test", sa.String(), nullable=False),
+        sa.Column("is_developer_defined", sa.Boolean()),
+        sa.Column("developer_defined_test_filepath", sa.String()),
+        sa.Column("start_time", sa.String()),
+        sa.Column("end_time", sa.String()),
+        sa.Column("success", sa.Boolean()),
+        indexes=[("ix_test_instance_tests_id", ["id"], False)]
+    )
+    create_table(
+        "test_instance_test_timings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_instance", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+        sa.Column("performed_test", sa.String(), nullable=False),
+        sa.Column("element_type", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("start_time", sa.DateTime()),
+        sa.Column("end_time", sa.DateTime()),
+        sa.Column("duration_seconds", sa.Float()),
+        sa.Column("calls", sa.Integer()),
+        sa.Column("failures", sa.Integer()),
+        sa.Column("max_duration_seconds", sa.Float()),
+        indexes=[
+            ("ix_test_instance_test_timings_id", ["id"], False),
+            ("ix_test_instance_test_timings_test", ["test_instance", "performed_test"], False)
+        ]
+    )
+    create_table(
+        "developer_defined_test_blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    create_table(
+        "test_information",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("testid", sa.String()),
+        sa.Column("name", sa.String()),
+        sa.Column("testbed_id", sa.String(), sa.ForeignKey("testbeds.id"), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("ftp_base_location", sa.String()),
+        sa.Column("test_filename", sa.String()),
+        sa.Column("test_type", sa.String()),
+    )
+    create_table(
+        "test_variables",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("variable_name", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("mandatory", sa.Boolean()),
+        sa.Column("type", sa.String()),
+        sa.Column("testinformation_id", sa.Integer(), sa.ForeignKey("test_information.id")),
+        indexes=[("ix_test_variables_id", ["id"], False)]
+    )
+    create_table(
+        "variable_options",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("testvariable_id", sa.Integer(), sa.ForeignKey("test_variables.id")),
+        indexes=[("ix_variable_options_id", ["id"], False)]
+    )
+    create_table(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        indexes=[
+            ("ix_user_id", ["id"], False),
+            ("ix_user_username", ["username"], True)
+        ]
+    )
+    create_table(
+        "role",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("role", sa.String(), unique=True),
+        indexes=[("ix_role_id", ["id"], False)]
+    )
+    create_table(
+        "user_role",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("role", sa.Integer(), sa.ForeignKey("role.id"), nullable=False),
+        indexes=[
+            ("ix_user_role_id", ["id"], False),
+            ("ix_user_role_user", ["user"], False)
+        ]
+    )
+    for dashboard_table in ("test_metrics_dashboard", "test_logs_dashboard"):
+        create_table(
+            dashboard_table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("test_id", sa.Integer(), sa.ForeignKey("test_instances.id"), nullable=False),
+            sa.Column("url", sa.String(), nullable=False),
+            sa.Column("access_username", sa.String(), nullable=False),
+            sa.Column("access_password", sa.String(), nullable=False),
+            indexes=[(f"ix_{dashboard_table}_id", ["id"], False)]
+        )
+
+
+def downgrade():
+    # The baseline can't be reverted without losing the data
+    pass
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# @Description: Indexes matching the queries of sql_app/crud.py and
+# sql_app/CRUD, which used to scan their tables, and the unique build number
+# of each NetApp and network service.
+
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns)
+INDEXES = [
+    # Test statuses of a test instance, in order (GUI, get_test_base_information)
+    ("ix_test_status_test_id_timestamp", "test_status", ["test_id", "timestamp"]),
+    # Agent removal
+    ("ix_test_instances_ci_cd_node_id", "test_instances", ["ci_cd_node_id"]),
+    # Test instances accessed with their token (test results, reports)
+    ("ix_test_instances_access_token", "test_instances", ["access_token"]),
+    # Tests of a test instance, or one of them by name
+    ("ix_test_instance_tests_test", "test_instance_tests", ["test_instance", "performed_test"]),
+    ("ix_testing_artifact_test_instance_id", "testing_artifact", ["test_instance_id"]),
+    # Tests of a testbed, or one of them by id
+    ("ix_test_information_testbed", "test_information", ["testbed_id", "testid"]),
+    ("ix_test_variables_testinformation_id", "test_variables", ["testinformation_id"]),
+    ("ix_variable_options_testvariable_id", "variable_options", ["testvariable_id"]),
+    # Agents of a testbed, or one of them by url
+    ("ix_ci_cd_nodes_testbed", "ci_cd_nodes", ["testbed_id", "url"]),
+    # Oldest queued job, polled by the dispatch workers
+    ("ix_test_dispatch_jobs_state", "test_dispatch_jobs", ["state", "id"]),
+    ("ix_test_dispatch_jobs_test_instance_id", "test_dispatch_jobs", ["test_instance_id"]),
+    ("ix_test_metrics_dashboard_test_id", "test_metrics_dashboard", ["test_id"]),
+    ("ix_test_logs_dashboard_test_id", "test_logs_dashboard", ["test_id"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+    # The unique constraint also serves the lookups by NetApp and network
+    # service, and the max. build of each. Concurrent submissions may have
+    # got the same build number before it existed, so those are renumbered
+    # after the last build of their NetApp and network service
+    if "uq_test_instances_build" not in {
+            constraint["name"] for constraint
+            in inspector.get_unique_constraints("test_instances")}:
+        op.execute("""
+            UPDATE test_instances SET build = renumbered.build
+            FROM (
+                SELECT id,
+                    MAX(build) OVER (PARTITION BY netapp_id, network_service_id)
+                        + ROW_NUMBER() OVER (PARTITION BY netapp_id, network_service_id ORDER BY id)
+                        AS build,
+                    ROW_NUMBER() OVER (PARTITION BY netapp_id, network_service_id, build ORDER BY id)
+                        AS occurrence
+                FROM test_instances
+            ) AS renumbered
+            WHERE test_instances.id = renumbered.id AND test_instances.build IS NOT NULL
+                AND renumbered.occurrence > 1
+        """)
+        # The counters must not give those build numbers again
+        op.execute("""
+            UPDATE test_instance_build_counters SET last_build = builds.last_build
+            FROM (
+                SELECT netapp_id, network_service_id, MAX(build) AS last_build
+                FROM test_instances GROUP BY netapp_id, network_service_id
+            ) AS builds
+            WHERE test_instance_build_counters.netapp_id = builds.netapp_id
+                AND test_instance_build_counters.network_service_id = builds.network_service_id
+                AND test_instance_build_counters.last_build < builds.last_build
+        """)
+        op.create_unique_constraint(
+            "uq_test_instances_build", "test_instances",
+            ["netapp_id", "network_service_id", "build"])
+
+
+def downgrade():
+    op.drop_constraint("uq_test_instances_build", "test_instances", type_="unique")
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# @Description: Time before which a dispatch job that is being retried isn't
+# claimed by the dispatch workers.
+
+"""dispatch job retries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {
+        column["name"] for column
+        in sa.inspect(op.get_bind()).get_columns("test_dispatch_jobs")}
+    if "available_at" not in columns:
+        op.add_column("test_dispatch_jobs",
+                      sa.Column("available_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("test_dispatch_jobs", "available_at")
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# @Description: Time when a dispatch job was claimed, so only the jobs whose
+# lease expired are requeued as interrupted.
+
+"""dispatch job lease
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {
+        column["name"] for column
+        in sa.inspect(op.get_bind()).get_columns("test_dispatch_jobs")}
+    if "claimed_at" not in columns:
+        op.add_column("test_dispatch_jobs",
+                      sa.Column("claimed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("test_dispatch_jobs", "claimed_at")
@@ -33,6 +33,9 @@ from aux import auth
 from exceptions.auth import *
 import aux.utils as Utils
 from wrappers.jenkins.wrapper import Jenkins_Wrapper
+from wrappers.jenkins.client_pool import jenkins_client_pool
+from wrappers.jenkins.agent_scheduler import agent_scheduler
+from background_tasks import agents_health
 
 # import from parent directory
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
@@ -122,53 +125,30 @@ def create_agent(agent: ci_cd_manager_schemas.CI_CD_Agent_Create, token: str = D
         if not testbed_instance:
             return Utils.create_response(status_code=HTTPStatus.BAD_REQUEST, success=False, errors=[f"A testbed with the id {agent.testbed_id} does not exists"]) 
         db_ci_cd_agent = CRUD_Agents.create_ci_cd_agent(db=db, agent=agent)
+        # Keep the authenticated client, so it can be reused by the dispatcher
+        jenkins_client_pool.register(db_ci_cd_agent.id, jenkins_wrapper)
         
         # Create the Jenkins credentials
-        
-        # LTR-related credentials
-        ret, message = jenkins_wrapper.create_credential(
-            "ltr_user", Constants.FTP_LTR_USER, "ltr_user")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        ret, message = jenkins_wrapper.create_credential(
-            "ltr_password", Constants.FTP_LTR_PASSWORD, "ltr_password")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        ret, message = jenkins_wrapper.create_credential(
-            "ltr_location", Constants.FTP_LTR_URL, "ltr_location")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        
-        # Results Repository-related credentials
-        ret, message = jenkins_wrapper.create_credential(
-            "results_ftp_user", Constants.FTP_RESULTS_USER, "results_ftp_user")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        ret, message = jenkins_wrapper.create_credential(
-            "results_ftp_password", Constants.FTP_RESULTS_PASSWORD, "results_ftp_password")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        ret, message = jenkins_wrapper.create_credential(
-            "results_ftp_location", Constants.FTP_RESULTS_URL, "results_ftp_location")
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        # Communication Token
-        credential_id = "communication_token"
         credential_secret = binascii.b2a_hex(os.urandom(16)).decode('ascii')
-        credential_description = "Token used for communication with the CI/CD Manager"
-        ret, message = jenkins_wrapper.create_credential(
-            credential_id, credential_secret, credential_description)
+        ret, message = jenkins_wrapper.provision_credentials({
+            # LTR-related credentials
+            "ltr_user": (Constants.FTP_LTR_USER, "ltr_user"),
+            "ltr_password": (Constants.FTP_LTR_PASSWORD, "ltr_password"),
+            "ltr_location": (Constants.FTP_LTR_URL, "ltr_location"),
+            # Results Repository-related credentials
+            "results_ftp_user": (Constants.FTP_RESULTS_USER, "results_ftp_user"),
+            "results_ftp_password": (Constants.FTP_RESULTS_PASSWORD, "results_ftp_password"),
+            "results_ftp_location": (Constants.FTP_RESULTS_URL, "results_ftp_location"),
+            # Communication Token
+            "communication_token": (credential_secret, "Token used for communication with the CI/CD Manager"),
+        })
         if not ret:
             return Utils.create_response(status_code=400, success=False, errors=[message])
 
         # update communication credential on db
         CRUD_Agents.update_communication_token(db, db_ci_cd_agent.id, credential_secret)
+        # Tests can be dispatched to the agent once the scheduler knows it
+        agents_health.check_new_agent_health(db_ci_cd_agent)
         
         ret = db_ci_cd_agent.as_dict_without_password()
         ret["communication_token"] = credential_secret
@@ -215,6 +195,8 @@ def delete_agent(agent_id: int, token: str = Depends(auth.oauth2_scheme), db: Se
             raise NotEnoughPrivileges(login_username, 'delete_ci_cd_agent')
         # try to create a ci_cd_agent
         CRUD_Agents.delete_ci_cd_agent(db=db, agent_id=agent_id)
+        jenkins_client_pool.evict(agent_id)
+        agent_scheduler.forget_agent(agent_id)
         return Utils.create_response(status_code=HTTPStatus.OK, success=True, message="Deleted CI/CD Agent")
     except Exception as e:
         logging.error(e)
@@ -270,3 +252,43 @@ def get_agents(skip: int = 0, limit: int = 500, token: str = Depends(auth.oauth2
         logging.error(e)
         return Utils.create_response(status_code=401, success=False, errors=[e.message]) 
 
+
+@router.get(
+    "/agents/client-pool", 
+    tags=["agents"],
+    summary="Get the CI/CD Agents' client pool statistics",
+    description="Using this endpoint is possible to obtain the statistics (size, hits, misses and evictions) of the pool of Jenkins clients kept by the CI/CD Manager.",
+    responses={
+        200: {
+            "content": {
+                "application/json": {
+                    "example": {**Utils.response_dict,
+                    "message": "Got the client pool statistics",
+                    "data": {"size": 2, "hits": 40, "misses": 2, "evictions": 0}
+                }
+            }
+        }
+     },
+        401: {
+            "content": {
+                "application/json": {
+                    "example": {**Utils.response_dict,
+                    "message": "",
+                    "success": False,
+                    "errors": ["User does not have permission to perform this action"]}
+                }
+            }
+        }
+    }
+)
+def get_agents_client_pool_stats(token: str = Depends(auth.oauth2_scheme), db: Session = Depends(get_db)):
+    try:
+        login_username = auth.get_current_user(token)
+        roles = CRUD_Auth.get_user_roles(db, login_username)
+        # check if operation was ordered by an admin
+        if "ADMIN" not in roles:
+            raise NotEnoughPrivileges(login_username, 'get_agents_client_pool_stats')
+        return Utils.create_response(success=True, message="Got the client pool statistics", data=jenkins_client_pool.stats())
+    except Exception as e:
+        logging.error(e)
+        return Utils.create_response(status_code=401, success=False, errors=[e.message])
@@ -23,7 +23,7 @@ import inspect
 import sys
 import os
 import datetime
-from urllib.request import urlopen
+from fastapi import Request
 
 from sql_app.schemas import ci_cd_manager as ci_cd_manager_schemas
 from sql_app.schemas import test_info as test_info_schemas
@@ -34,7 +34,9 @@ parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
 # custom imports
-from wrappers.jenkins.wrapper import Jenkins_Wrapper
+from wrappers.ftp.client_pool import get_results_ftp_pool
+from wrappers.ftp.responses import create_ftp_file_response, \
+    create_ftp_gunzip_response, accepts_gzip
 import aux.constants as Constants
 import aux.utils as Utils
 
@@ -45,7 +47,6 @@ logging.basicConfig(
 )
 
 router = APIRouter()
-jenkins_wrapper = Jenkins_Wrapper()
 
 # Dependency
 def get_db():
@@ -104,10 +105,10 @@ def get_db():
 )
 async def get_testing_process_status(test_id: int, access_token: str, db: Session = Depends(get_db)):
     try:
-        data = crud.get_all_test_status_for_test_given_id(db, test_id, access_token)
-        if not data:
+        test_report = crud.get_test_report(db, test_id, access_token)
+        if not test_report:
             return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."]) 
-        return Utils.create_response(data=[status.as_dict() for status in data])
+        return Utils.create_response(data=test_report["test_status"])
     except Exception as e:
         logging.error(e)
         return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the tests status."]) 
@@ -164,14 +165,27 @@ async def get_testing_process_metrics_and_logs(
         }
     }
 )
-async def get_testing_console_log(test_id: int, access_token: str, db: Session = Depends(get_db)):
+async def get_testing_console_log(request: Request, test_id: int, access_token: str, db: Session = Depends(get_db)):
     # get test instance information
     test_instance = crud.get_test_instance(db, test_id, access_token)
     if not test_instance:
         return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."])
-    test_console_log = urlopen(f"ftp://{Constants.FTP_RESULTS_USER}:{Constants.FTP_RESULTS_PASSWORD}@{Constants.FTP_RESULTS_URL}/{test_instance.test_log_location}").read()
-    test_console_log = test_console_log.decode('utf-8')
-    return PlainTextResponse(content=test_console_log , headers={"Access-Control-Allow-Origin": "*"})
+    # The console log is only known once the results are published
+    if not test_instance.test_log_location:
+        return Utils.create_response(status_code=404, success=False, errors=["The console log isn't available yet."])
+    headers = {"Access-Control-Allow-Origin": "*"}
+    if not test_instance.test_log_location.endswith(".gz"):
+        return await create_ftp_file_response(request, get_results_ftp_pool(),
+            test_instance.test_log_location, "text/plain; charset=utf-8", headers)
+    # The console logs may be stored gzipped. They are sent as they are, and
+    # decompressed by the clients, unless the clients don't accept gzip
+    headers["Vary"] = "Accept-Encoding"
+    if not accepts_gzip(request):
+        return await create_ftp_gunzip_response(request, get_results_ftp_pool(),
+            test_instance.test_log_location, "text/plain; charset=utf-8", headers)
+    headers["Content-Encoding"] = "gzip"
+    return await create_ftp_file_response(request, get_results_ftp_pool(),
+        test_instance.test_log_location, "text/plain; charset=utf-8", headers)
     
 
 @router.get(
@@ -221,13 +235,11 @@ async def get_testing_console_log(test_id: int, access_token: str, db: Session =
     }
 )
 async def get_test_base_information(test_id: int, access_token: str, db: Session = Depends(get_db)):
-    print("access_token", access_token)
     try:
-        data = crud.get_test_base_information(db, test_id, access_token)
-        print(data)
-        if not data:
+        test_report = crud.get_test_report(db, test_id, access_token)
+        if not test_report:
             return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."]) 
-        return Utils.create_response(data=data)
+        return Utils.create_response(data=test_report["test_base_info"])
     except Exception as e:
         logging.error(e)
         return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the test base information."]) 
@@ -282,10 +294,10 @@ async def get_test_base_information(test_id: int, access_token: str, db: Session
 )
 async def get_tests_performed(test_id: int, access_token: str, db: Session = Depends(get_db)):
     try:
-        data = crud.get_tests_of_test_instance(db, test_id, access_token)
-        if not data:
+        test_report = crud.get_test_report(db, test_id, access_token)
+        if not test_report:
             return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."]) 
-        return Utils.create_response(data=[d.as_dict() for d in data])
+        return Utils.create_response(data=test_report["tests_performed"])
     except Exception as e:
         logging.error(e)
         return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the test performed."]) 
@@ -298,10 +310,10 @@ async def get_tests_performed(test_id: int, access_token: str, db: Session = Dep
     summary="Get Test Output File",
     description="After the validation pipeline, several files are created by the Robot Framework. This endpoint retrieves these files",
 )
-async def get_test_output_file(test_id: int, access_token: str, test_name: str, file_name: str, db: Session = Depends(get_db)):
+async def get_test_output_file(request: Request, test_id: int, access_token: str, test_name: str, file_name: str, db: Session = Depends(get_db)):
     test_instance = crud.get_test_instance(db, test_id, access_token)
     if not test_instance:
         return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."]) 
-    test_console_log = urlopen(f"ftp://{Constants.FTP_RESULTS_USER}:{Constants.FTP_RESULTS_PASSWORD}@{Constants.FTP_RESULTS_URL}/{test_instance.test_results_location}/{test_name}/{file_name}").read()
-    test_console_log = test_console_log.decode('utf-8')
-    return HTMLResponse(content=test_console_log,  headers={"Access-Control-Allow-Origin": "*"})
+    return await create_ftp_file_response(request, get_results_ftp_pool(),
+        f"{test_instance.test_results_location}/{test_name}/{file_name}",
+        "text/html; charset=utf-8", {"Access-Control-Allow-Origin": "*"})
@@ -12,15 +12,24 @@ from distutils.log import error
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import BackgroundTasks
+from fastapi import Request
+from fastapi import Query
+from typing import Optional
 from pydantic import NoneIsAllowedError
 from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sql_app.database import SessionLocal
 from sql_app import crud
 import sql_app.CRUD.agents as CRUD_Agents
+import sql_app.CRUD.dispatch as CRUD_Dispatch
 from sql_app.schemas import ci_cd_manager as ci_cd_manager_schemas, test_info as testinfo_schemas
 import test_helpers.developer_defined as dev_defined_test_helpers
+import test_helpers.blob_store as blob_store
 from test_helpers import testing_artifacts as testing_artifacts_helper
+from test_helpers import ltr_manifest as ltr_manifest_helper
+from test_helpers import test_results as test_results_helper
+from test_helpers.default_artifacts_cache import default_artifacts_cache
 from fastapi import File, UploadFile
 from sqlalchemy.orm import Session
 import logging
@@ -29,12 +38,7 @@ import sys
 import os
 import binascii
 import yaml
-import datetime as dt
-from urllib.request import urlopen
-import xml.etree.ElementTree as ET
 import json
-import ftplib
-import io
 
 # import from parent directory
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
@@ -42,8 +46,11 @@ parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
 # custom imports
-from wrappers.jenkins.wrapper import Jenkins_Wrapper
-from background_tasks import metrics_and_logs
+from wrappers.jenkins.client_pool import jenkins_client_pool
+from wrappers.ftp.client_pool import get_results_ftp_pool
+from wrappers.ftp.responses import create_ftp_file_response, create_local_file_response
+from wrappers.jenkins.agent_scheduler import agent_scheduler
+from background_tasks import metrics_and_logs, test_dispatcher
 from testing_descriptors_validator.test_descriptor_validator import Test_Descriptor_Validator
 import aux.constants as Constants
 import aux.utils as Utils
@@ -96,11 +103,16 @@ async def tests_per_testbed(testbed: str):
     "/tests/test-status",
     tags=["tests"],
     summary="Get the status of test",
-    description="The developers/apis/web_ui uses this endpoint to gather the status of a test",
+    description="The developers/apis/web_ui uses this endpoint to gather the status of a test. "\
+        "The builds are ordered by number, and may be paginated with limit and since_build "\
+        "(the next_since_build of the previous page).",
 )
-async def get_test_status(netapp_id: str, network_service_id: str , db: Session = Depends(get_db)):
+async def get_test_status(netapp_id: str, network_service_id: str,
+    since_build: Optional[int] = None, limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)):
     try:
-        data = crud.get_all_test_status_for_test(db, netapp_id, network_service_id)
+        data = crud.get_all_test_status_for_test(db, netapp_id, network_service_id,
+            since_build=since_build, limit=limit)
         return Utils.create_response(data=data)
     except Exception as e:
         logging.error(e)
@@ -116,6 +128,11 @@ async def get_test_status(netapp_id: str, network_service_id: str , db: Session
 async def update_test_status(test_status: ci_cd_manager_schemas.Test_Status_Update,  db: Session = Depends(get_db)):
     try:
         crud.create_test_status_ci_cd_agent(db, test_status)            
+        # The CI/CD Agent is no longer running this test
+        if test_status.state.upper() == Constants.TEST_STATUS["test_ended"]:
+            ci_cd_agent = crud.get_ci_cd_agent_given_test_instance_id(db, test_status.test_id)
+            if ci_cd_agent is not None:
+                agent_scheduler.build_finished(ci_cd_agent.id)
         return Utils.create_response()
     except Exception as e:
         return Utils.create_response(status_code=400, success=False, errors=[f"Couldn't update test status - {e}."]) 
@@ -127,10 +144,13 @@ async def update_test_status(test_status: ci_cd_manager_schemas.Test_Status_Upda
     summary="Store Tests Information on DB",
     description="Store the information of Tests available on the CI/CD Manager",
 )
-async def store_test_information(test_info: testinfo_schemas.TestInformation, db: Session = Depends(get_db)):
+async def store_test_information(background_tasks: BackgroundTasks, test_info: testinfo_schemas.TestInformation, db: Session = Depends(get_db)):
     #TODO: Validate more fields?
     instance,msg = crud.create_test_information(db,testinfo_data=test_info)
     if instance:
+        # The test's files may have changed too
+        background_tasks.add_task(ltr_manifest_helper.publish_ltr_manifests,
+                                  [instance.ftp_base_location])
         return Utils.create_response(data=instance.as_dict())
     else:
         return Utils.create_response(status_code=400,
@@ -142,9 +162,10 @@ async def store_test_information(test_info: testinfo_schemas.TestInformation, db
     "/tests/new", 
     tags=["tests"],
     summary="Create a new test",
-    description="Given a file with a test descriptor, create a new test.",
+    description="Given a file with a test descriptor, create a new test. The test is queued and dispatched to a CI/CD Agent asynchronously.",
+    status_code=202,
 )
-async def new_test(test_descriptor: UploadFile = File(...),  db: Session = Depends(get_db)):
+async def submit_new_test(background_tasks: BackgroundTasks, test_descriptor: UploadFile = File(...),  db: Session = Depends(get_db)):
     # Get data from the uploaded descriptor
     contents = await test_descriptor.read()
     try:
@@ -152,7 +173,9 @@ async def new_test(test_descriptor: UploadFile = File(...),  db: Session = Depen
     except:
         return Utils.create_response(status_code=400, success=False, errors=["Unable to parse the submitted file. It must be a YAML."])
 
-    return new_test(test_descriptor_data, None, None, None, db)
+    # Creating the test queries the database several times
+    return await run_in_threadpool(new_test, test_descriptor_data, None, None,
+                                   None, db, background_tasks)
     
     
 def new_test(test_descriptor_data, nods_id, developer_defined_tests, 
@@ -198,14 +221,30 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
         descriptor_metrics_collection = test_descriptor_data[
             "test_phases"]["setup"]["metrics_collection"]
 
+    # The CI/CD Agents are only contacted by the dispatch workers. Here we only
+    # make sure that the testbed has, at least, one registered agent
+    if not CRUD_Agents.get_ci_cd_agents_by_testbed(db, testbed_id):
+        logging.error("The selected testbed has no CI/CD Agents.")
+        return Utils.create_response(
+            status_code=400,
+            success=False,
+            errors=["No CI/CD Agent Available"]
+        )
+
     # register the test in database
     logging.info(f"Will register the tests in the database...")
     netapp_id = test_descriptor_data["test_info"]["netapp_id"]
     network_service_id = test_descriptor_data["test_info"]["network_service_id"]
 
+    # The test instance, its tests and its dispatch job are created in a
+    # single transaction
+    uow = crud.Unit_Of_Work(db)
+
     # register new test
     test_instance = crud.create_test_instance(
-        db, netapp_id, network_service_id, testbed_id, nods_id=nods_id)
+        db, netapp_id, network_service_id, testbed_id, nods_id=nods_id, uow=uow)
+    # The rows below need the test instance's id
+    uow.flush()
     logging.info(f"All tests were registered in the database...")
     
     if "metrics_collection" in test_descriptor_data:
@@ -229,9 +268,9 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
         )
     
     # Register Testing Artifacts
-    # Todo
-    testing_artifact_location_db = crud.create_testing_artifact(db, 
-        test_instance.id, testing_artifacts_location)
+    if testing_artifacts_location is not None:
+        crud.create_testing_artifact(db, 
+            test_instance.id, testing_artifacts_location, uow=uow)
     
 
     # update test status
@@ -239,78 +278,10 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
         db, 
         test_instance.id, 
         Constants.TEST_STATUS["submitted_on_manager"], 
-        True
+        True,
+        uow=uow
     )
 
-    # Check if the CI/CD Node for this test is already registered
-    logging.info(f"Will gather the testbed's CI/CD Agent...")
-    testbeds_ci_cd_agents = CRUD_Agents.get_ci_cd_agents_by_testbed(
-        db, testbed_id)
-    
-    logging.info("testbeds_ci_cd_agents: " + ",".join(
-        [
-            f"({agent.id}, {agent.url})"
-            for agent
-            in testbeds_ci_cd_agents
-        ]
-        )
-    )
-    
-    available_agents_jobs = []
-    
-    for ci_cd_agent in testbeds_ci_cd_agents:
-        jenkins_wrapper = Jenkins_Wrapper()
-        ret, message = jenkins_wrapper.connect_to_server(
-            ci_cd_agent.url,
-            ci_cd_agent.username,
-            ci_cd_agent.password
-        )
-        
-        #print(ci_cd_agent.url, ci_cd_agent.username, ci_cd_agent.password)
-        
-        logging.info(
-            f"Is the CI/CD Agent at {ci_cd_agent.url} available? {ret}"
-        )
-        
-        if ret:
-            active_jobs = [
-                job['color']
-                for job in jenkins_wrapper.get_jobs()[1]
-            ].count('blue_anime')
-            
-            available_agents_jobs.append(
-                (jenkins_wrapper, ci_cd_agent, active_jobs)
-            )
-    
-    if len(available_agents_jobs) == 0:
-        return Utils.create_response(
-            status_code=400,
-            success=False,
-            errors=["No CI/CD Agent Available"]
-        )
-    
-    logging.info(f"Testbed's CI/CD Agent has been selected!")
-
-    selected_ci_cd_agent_info = sorted(
-        available_agents_jobs,
-        key=lambda e: e[2]
-    )[0]
-    
-    logging.info("Testbed's CI/CD Agent has been selected!")
-    logging.info(
-        f"The agent is available at {selected_ci_cd_agent_info[1].url}"
-    )
-    
-    jenkins_wrapper = selected_ci_cd_agent_info[0]
-    
-    selected_ci_cd_node = selected_ci_cd_agent_info[1]
-
-    crud.update_test_instance_ci_cd_agent(
-        db, test_instance.id, selected_ci_cd_node.id)
-    crud.create_test_status(db, test_instance.id,
-                            Constants.TEST_STATUS["ci_cd_agent_auth"], True)
-
-
     executed_tests_info = test_descriptor_validator.executed_tests_info
 
     # register tests in database and prepare them to be added to the pipeline script
@@ -328,9 +299,11 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
             # db required info
             performed_test = f"dev-defined-{executed_test['name']}-test-id-{executed_test['testcase_id']}"
             is_developer_defined = True
+            # sha256 of the test, in the content-addressed store
             developer_defined_test_filepath = developer_defined_tests[executed_test['name']]
             # add extra parameters
-            executed_test["location"] = developer_defined_tests[executed_test['name']]
+            executed_test["location"] = blob_store.get_blob_path(
+                developer_defined_test_filepath)
             executed_test["test_instance_id"] = test_instance.id
             executed_test["full_name"] = f"dev-defined-{executed_test['name']}-test-id-{executed_test['testcase_id']}"
         
@@ -342,7 +315,8 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
                 executed_test["type"] == "predefined" else "developer-defined",
             description=executed_test["description"],
             is_developer_defined=is_developer_defined,
-            developer_defined_test_filepath=developer_defined_test_filepath
+            developer_defined_test_filepath=developer_defined_test_filepath,
+            uow=uow
         )
         
         logging.info(
@@ -350,78 +324,29 @@ def new_test(test_descriptor_data, nods_id, developer_defined_tests,
                 f"'{test_instance_test.performed_test}' for test instance "\
                 f" {test_instance.id}."
             )
-    logging.info(f"Will create Jenkins Pipeline Script!")
-    # create jenkins pipeline script
-    pipeline_config = jenkins_wrapper.create_jenkins_pipeline_script(
-        executed_tests_info, 
-        #developer_defined_tests_for_pipeline,
-        testbed_tests, 
-        descriptor_metrics_collection, 
-        metrics_collection_information, 
-        test_instance.id, 
-        test_instance.testbed_id
-    )
-    crud.create_test_status(
-        db,
-        test_instance.id,
-        Constants.TEST_STATUS["created_pipeline_script"],
-        True
-    )
-    logging.info(f"Will submit Jenkins Pipeline!")
-    
-    # submit pipeline scripts
-    job_name = f"{netapp_id}-{network_service_id}-{str(test_instance.build)}"
-    logging.info
-    
-    ret, message = jenkins_wrapper.create_new_job(job_name, pipeline_config)
-    
-    if not ret:
-        crud.create_test_status(
-            db,
-            test_instance.id,
-            Constants.TEST_STATUS["submitted_pipeline_script"],
-            False
-        )
-        logging.error("Couldn't submit Jenkins Pipeline - ")
-        return Utils.create_response(status_code=400, success=False, errors=[message])
 
-    crud.create_test_status(
+    # enqueue the test. The dispatch workers will select a CI/CD Agent, 
+    # create the Jenkins Pipeline and run it
+    dispatch_job = CRUD_Dispatch.enqueue_test_dispatch_job(
         db,
         test_instance.id,
-        Constants.TEST_STATUS["submitted_pipeline_script"],
-        True
+        {
+            "executed_tests_info": executed_tests_info,
+            "test_executions": test_descriptor_validator.test_executions,
+            "descriptor_metrics_collection": descriptor_metrics_collection
+        },
+        uow=uow
     )
-    
-    jenkins_job_name = message
-    
-    logging.info("Trying to run Jenkins Job...")
-    # run jenkins job
-    ret, message = jenkins_wrapper.run_job(jenkins_job_name)
-    
-    if not ret:
-        return Utils.create_response(status_code=400, success=False, errors=[message])
-    build_id = message
-
-    logging.info(f"Jenkins Job was dispatched for the CI/CD Agent")
-    # get jenkins job build number
-    ret, message = jenkins_wrapper.get_last_build_number(job_name)
-    if not ret:
-        return Utils.create_response(status_code=400, success=False, errors=[message])
-    job_build_number = message
-
-    # Update extra information
-    crud.update_test_instance_extra_info(db, test_instance.id, str(
-        {"job_name": job_name, "build_number": job_build_number}))
-    
-    logging.info(f"Got extra info from Jenkins Job.")
-    
-    return Utils.create_response(success=True, message=f"A new build job was created", data={
+    uow.commit()
+    test_dispatcher.notify_new_job()
+    logging.info(f"Test instance {test_instance.id} was queued for dispatch "\
+        f"(dispatch job {dispatch_job.id}).")
+
+    return Utils.create_response(status_code=202, success=True, message=f"The test was queued for dispatch", data={
         "test_id": test_instance.id,
         "testbed_id": test_instance.testbed_id,
         "netapp_id": netapp_id,
         "network_service_id": network_service_id,
-        "job_name": jenkins_job_name,
-        "build_number": job_build_number,
         "access_token": test_instance.access_token
     })
 
@@ -437,37 +362,15 @@ async def publish_test_results(test_results_information: ci_cd_manager_schemas.T
     tests = crud.get_tests_of_test_instance(db, test_results_information.test_id)
     tests = [t.performed_test for t in tests]
     payload = {'characteristic': []}
-    counter = 1
     test_instance_dic = crud.get_test_instances_by_id(db, test_results_information.test_id)
 
     try:
-        for test in tests:
-            logging.info(f"Parsing Test Execution Results for test '{test}'...")
-            ftp_url = Constants.FTP_RESULTS_URL.split(":")[0] if ":" in Constants.FTP_RESULTS_URL else Constants.FTP_RESULTS_URL
-            
-            try:
-                xml_str = urlopen(
-                    f"ftp://{Constants.FTP_RESULTS_USER}:{Constants.FTP_RESULTS_PASSWORD}@{ftp_url}/{test_results_information.ftp_results_directory}/{test}/output.xml").read()
-                root = ET.fromstring(xml_str)
-            
-
-                failed_tests = int(root.findall("statistics")[0].find('total').find('stat').attrib['fail'])
-            
-                start_timestamp = root.findall("suite")[0].findall('status')[0].attrib['starttime'].split(".")[0]
-                end_timestamp = root.findall("suite")[0].findall('status')[-1].attrib['endtime'].split(".")[0]
-                
-                start_date, start_time = start_timestamp.split()
-                start_dt = dt.datetime.strptime(start_time, '%H:%M:%S').replace(year=int(start_date[0:4]), month=int(start_date[4:6]), day=int(start_date[6:8]))
-                end_date, end_time = end_timestamp.split()
-                end_dt = dt.datetime.strptime(end_time, '%H:%M:%S').replace(year=int(end_date[0:4]), month=int(end_date[4:6]), day=int(end_date[6:8]))
-
-                success = failed_tests == 0
-                crud.update_test_status_of_test_instance(db, test_results_information.test_id, test, str(start_dt), str(end_dt), success)
-                token = test_instance_dic['access_token']
-                counter+=1
-            except Exception as e:
-                logging.error("Impossible to parse the test execution "\
-                    f"results for test '{test}'. Reason: {e}")
+        # fetch and parse the results of all tests concurrently, and store
+        # them in a single transaction
+        tests_results = await test_results_helper.collect_tests_results(
+            test_results_information.ftp_results_directory, tests)
+        crud.update_tests_status_of_test_instance(db, test_results_information.test_id, tests_results)
+        token = test_instance_dic['access_token']
             
         # Patch for the NODS
         url = f'{Constants.TRVD_HOST}/test-information.html?test_id={test_results_information.test_id}&access_token={token}'
@@ -485,24 +388,38 @@ async def publish_test_results(test_results_information: ci_cd_manager_schemas.T
         if selected_ci_cd_node is None or not selected_ci_cd_node.is_online:
             return Utils.create_response(status_code=400, success=False, errors=[f"It doesn't exist a CI/CD Agent for the selected testbed, or it is offline."])
         
-        jenkins_wrapper = Jenkins_Wrapper() 
-        
-        ret, message = jenkins_wrapper.connect_to_server(selected_ci_cd_node.url, selected_ci_cd_node.username, selected_ci_cd_node.password)
-        if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-
-        ret, message = jenkins_wrapper.get_build_log(extra_information['job_name'], extra_information['build_number'])
+        ret, jenkins_wrapper = jenkins_client_pool.get_client(selected_ci_cd_node)
         if not ret:
-            return Utils.create_response(status_code=400, success=False, errors=[message])
-        
-        testbed_id = test_instance_dic["testbed_id"]
-        # save console log to ftp
-        session = ftplib.FTP(Constants.FTP_RESULTS_URL.split(':')[0], Constants.FTP_RESULTS_USER, Constants.FTP_RESULTS_PASSWORD)
-        session.storbinary(f'STOR {test_results_information.ftp_results_directory}/console_log.log', io.BytesIO(message.encode('utf-8')) )
-        session.quit()
+            return Utils.create_response(status_code=400, success=False, errors=[jenkins_wrapper])
+
+        # The build number may not have been resolved yet
+        if extra_information.get('build_number') is None:
+            ret, message = jenkins_wrapper.get_queue_item_build_number(extra_information['queue_item_id'])
+            if not ret or message is None:
+                return Utils.create_response(status_code=400, success=False, errors=[message or "The test's build hasn't started yet."])
+            extra_information['build_number'] = message
+            crud.update_test_instance_build_number(db, test_results_information.test_id, message)
+
+        def open_build_log():
+            ret, build_log = jenkins_wrapper.get_build_log_stream(extra_information['job_name'], extra_information['build_number'])
+            if not ret:
+                raise Exception(build_log)
+            return build_log
+
+        # stream the console log from the CI/CD Agent to the ftp
+        console_log_location = f"{test_results_information.ftp_results_directory}/console_log.log"
+        if Constants.CONSOLE_LOG_COMPRESSION:
+            console_log_location += ".gz"
+        try:
+            await run_in_threadpool(
+                get_results_ftp_pool().upload_stream, console_log_location,
+                open_build_log, Constants.CONSOLE_LOG_COMPRESSION)
+        except Exception as e:
+            jenkins_client_pool.evict(selected_ci_cd_node.id)
+            return Utils.create_response(status_code=400, success=False, errors=[str(e)])
 
         # update test instance
-        crud.update_test_instance_after_validation_process(db, test_results_information.test_id , f"{test_results_information.ftp_results_directory}/console_log.log", test_results_information.ftp_results_directory)
+        crud.update_test_instance_after_validation_process(db, test_results_information.test_id , console_log_location, test_results_information.ftp_results_directory)
 
         # patch data on NODS
         _,token = Utils.get_nods_token()
@@ -522,39 +439,15 @@ async def publish_test_results(test_results_information: ci_cd_manager_schemas.T
     description="The developers can use this endpoint to gather the report of a test",
 )
 async def get_test_status(test_id: int, access_token: str, db: Session = Depends(get_db)):
-    # test status
-    test_status = None
-    try:
-        data = crud.get_all_test_status_for_test_given_id(db, test_id)
-        test_status = [status.as_dict() for status in data]
-    except Exception as e:
-        logging.error(e)
-        return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the tests status."]) 
-
-    # test base info
-    test_base_info = None
     try:
-        data = crud.get_test_base_information(db, test_id)
-        test_base_info = data
+        test_report = crud.get_test_report(db, test_id, access_token)
     except Exception as e:
         logging.error(e)
-        return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the test base information."]) 
+        return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the test report."]) 
+    if test_report is None:
+        return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."]) 
 
-    # tests performed
-    tests_performed = None
-    try:
-        data = crud.get_tests_of_test_instance(db, test_id)
-        tests_performed = [d.as_dict() for d in data]
-    except Exception as e:
-        logging.error(e)
-        return Utils.create_response(status_code=400, success=False, errors=["Couldn't retrieve the test performed."]) 
-
-
-    return Utils.create_response(data={
-        "test_status": test_status,
-        "test_base_info": test_base_info,
-        "tests_performed": tests_performed,
-    })
+    return Utils.create_response(data=test_report)
 
 
 @router.get(
@@ -607,6 +500,7 @@ async def get_developer_defined_tests(
     description="",
 )
 async def download_developer_defined_test(
+    request: Request,
     test_instance_test: ci_cd_manager_schemas.Test_Instance_Test_Download,
     db: Session = Depends(get_db)
     ) -> JSONResponse:
@@ -615,16 +509,65 @@ async def download_developer_defined_test(
     communication_token = test_instance_test.communication_token
     developer_defined_test_name = test_instance_test.developer_defined_test_name
 
-    file_location = crud.get_developer_defined_test_for_test_instance(
-        db, test_instance_id, communication_token, developer_defined_test_name
+    file_location = blob_store.get_developer_defined_test_path(
+        crud.get_developer_defined_test_for_test_instance(
+            db, test_instance_id, communication_token, developer_defined_test_name
+        )
     )
     print(file_location)
-    test_content = dev_defined_test_helpers.download_test_from_ftp(file_location)
-    
+    logging.info("Will Obtain Developer Defined Test from "\
+        f"'{Constants.FTP_RESULTS_URL}/{file_location}'.")
     
-    return Response(test_content, media_type="application/tar+gzip")
+    return await create_ftp_file_response(request, get_results_ftp_pool(),
+        file_location, "application/tar+gzip")
+
+
+
+
+@router.get(
+    "/tests/ltr-manifest",
+    tags=["tests"],
+    summary="Get the manifest of an LTR directory",
+    description="The CI/CD Agents use this endpoint to know which files of "\
+        "a predefined test, or of the metrics collection, changed since they "\
+        "last obtained them. The manifest has the sha256sum format.",
+)
+def get_ltr_manifest(location: str, test_id: int, communication_token: str,
+                     db: Session = Depends(get_db)):
+    try:
+        valid_credentials = crud.is_communication_token_for_test_valid(
+            db, test_id, communication_token)
+    except Exception as e:
+        logging.error(e)
+        valid_credentials = False
+    if not valid_credentials:
+        return Utils.create_response(status_code=403, success=False, errors=["Invalid credentials."])
+
+    try:
+        # only the directories of the tests and of the metrics collection 
+        # files may be listed
+        if location.strip("/") not in ltr_manifest_helper.get_ltr_directories(db):
+            raise Exception(f"'{location}' is not an LTR directory")
+
+        manifest = ltr_manifest_helper.get_published_ltr_manifest(location)
+        return Response(manifest, media_type="text/plain")
+    except Exception as e:
+        logging.error(e)
+        return Utils.create_response(
+            status_code=400,
+            success=False,
+            errors=[f"Couldn't create the LTR manifest. Exception {e}"]
+        )
 
 
+@router.get(
+    "/tests/testing-artifacts/cache",
+    tags=["tests"],
+    summary="Get the default testing artifacts cache statistics",
+    description="Using this endpoint is possible to obtain the statistics (entries, size, hits, misses and evictions) of the local cache of the default testing artifacts.",
+)
+async def get_default_testing_artifacts_cache_stats():
+    return Utils.create_response(success=True, message="Got the default testing artifacts cache statistics", data=default_artifacts_cache.stats())
 
 
 @router.get(
@@ -633,7 +576,7 @@ async def download_developer_defined_test(
     summary="Get the report of test process",
     description="The developers can use this endpoint to gather the report of a test",
 )
-async def get_test_status(test_id: int = None, artifact: str= None,
+async def get_test_status(request: Request, test_id: int = None, artifact: str= None,
                         access_token: str= None, db: Session = Depends(get_db)):
     
     try:
@@ -641,11 +584,16 @@ async def get_test_status(test_id: int = None, artifact: str= None,
         if test_id is None \
             and access_token is None\
             and artifact is not None:
-            testing_artifact_content, mime_type = testing_artifacts_helper.\
-                    get_default_testing_artifact_from_ftp(
+            testing_artifact_location, mime_type = testing_artifacts_helper.\
+                    get_default_testing_artifact_location(
                         artifact
                     )                        
-            return Response(testing_artifact_content, media_type=mime_type)        
+            # The default testing artifacts are served from a local cache
+            testing_artifact_file, size, mtime = await run_in_threadpool(
+                default_artifacts_cache.open_artifact,
+                artifact, testing_artifact_location)
+            return create_local_file_response(request, testing_artifact_file,
+                size, mtime, mime_type)
         
         # If the user is trying to obtain a test specific artifact...
         elif test_id is not None \
@@ -663,13 +611,14 @@ async def get_test_status(test_id: int = None, artifact: str= None,
                             f"{testing_artifact_base_path}")
                 
                 
-                testing_artifact_content, mime_type = testing_artifacts_helper.\
-                    get_testing_artifact_from_ftp(
+                testing_artifact_location, mime_type = testing_artifacts_helper.\
+                    get_testing_artifact_location(
                         testing_artifact_base_path,
                         artifact
                     )
                         
-                return Response(testing_artifact_content, media_type=mime_type)
+                return await create_ftp_file_response(request,
+                    get_results_ftp_pool(), testing_artifact_location, mime_type)
         
         else:
             raise Exception("Not Enough Data to Obtain the Testing Artifact")
@@ -11,6 +11,7 @@ from wsgiref import headers
 from fastapi import APIRouter
 from fastapi import BackgroundTasks
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sql_app.database import SessionLocal
 from sqlalchemy.orm import Session
@@ -122,20 +123,19 @@ async def validate_test_descriptor(test_descriptor:UploadFile = File(...) , db:
     "/tmf-api/serviceTestManagement/v4/serviceTest",
     tags=["TMF-653"],
     summary="Creates a Service Test",
-    description="Creates a Service Test, given a Valid TMF-653 Payload file, and execute the associated tests",
+    description="Creates a Service Test, given a Valid TMF-653 Payload file, and queues the associated tests to be executed",
+    status_code=202,
     responses={
-        200: {
+        202: {
             "content": {
                 "application/json": {
                     "example": {**Utils.response_dict,
-                    "message": "A new build job was created",
+                    "message": "The test was queued for dispatch",
                      "data": {
                             "test_id": 1,
                             "testbed_id" : "testbed_itav",
                             "netapp_id": "OBU",
                             "network_service_id": "vOBU",
-                            "job_name": "testjob", 
-                            "build_number": 1,
                             "access_token": "12345abcde"}
                 }
             }
@@ -152,8 +152,7 @@ async def validate_test_descriptor(test_descriptor:UploadFile = File(...) , db:
                     "Invalid Testing Descriptor format",
                     "The selected testbed doesn't exist.",
                     "Error on validating test parameters",
-                    "No CI/CD Agent Available",
-                    "Couldn't create pipeline script"
+                    "No CI/CD Agent Available"
                     ]}
                 }
             }
@@ -262,11 +261,14 @@ async def create_service_test(
         logging.info("Developer Defined Tests:" + str(developer_defined_tests))
     
         try:
-            loaded_tests_dict = dev_defined_test_helpers.load_developer_defined_tests(
+            loaded_tests_dict = await run_in_threadpool(
+                dev_defined_test_helpers.load_developer_defined_tests,
                 token, developer_defined_tests, attachments, nods_id)
         except Exception as e:
             return Utils.create_response(status_code=400, success=False, 
                 message=f"Unable to Obtain the Developer Defined Tests from NODS -{e}",
                 data=[])
     #return Utils.create_response(status_code=200, success=True, message=f"IXXXX", data=[])
-    return TestRouters.new_test(rendered_descriptor, nods_id, loaded_tests_dict, testing_artifacts_location, db, background_tasks)
+    return await run_in_threadpool(TestRouters.new_test, rendered_descriptor,
+        nods_id, loaded_tests_dict, testing_artifacts_location, db,
+        background_tasks)
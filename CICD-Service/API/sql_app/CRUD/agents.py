@@ -10,6 +10,7 @@
 
 
 import logging
+import datetime
 import random
 import string
 # generic imports
@@ -49,6 +50,8 @@ def delete_ci_cd_agent(db: Session, agent_id: int):
     db_ci_cd_agent = db.query(models.CI_CD_Agent).filter(models.CI_CD_Agent.id == agent_id).first()
     if not db_ci_cd_agent:
         raise AgentDoesNotExist(id)
+    db.query(models.CI_CD_Agent_Health).filter(
+        models.CI_CD_Agent_Health.ci_cd_node_id == db_ci_cd_agent.id).delete()
     # set the test_instances agent to null
     for test_instance in db.query(models.Test_Instance).filter(
         models.Test_Instance.ci_cd_node_id == db_ci_cd_agent.id).all():
@@ -79,4 +82,29 @@ def update_communication_token(db: Session, id: int, token: str):
     db.commit()
     db.refresh(db_ci_cd_node)
     logging.info(f"Updated ci_cd_nodes communication token on CI/CD Agent with id {db_ci_cd_node.id}")
-    return db_ci_cd_node
\ No newline at end of file
+    return db_ci_cd_node
+
+
+def update_ci_cd_agent_health(db: Session, id: int, is_online: bool, 
+    latency_ms: float = None, busy_executors: int = None, 
+    total_executors: int = None, queued_items: int = None,
+    consecutive_failures: int = 0):
+    db_ci_cd_node = db.query(models.CI_CD_Agent).filter(models.CI_CD_Agent.id == id).first()
+    if not db_ci_cd_node:
+        return None
+    db_ci_cd_node.is_online = is_online
+
+    db_health = db.query(models.CI_CD_Agent_Health).filter(
+        models.CI_CD_Agent_Health.ci_cd_node_id == id).first()
+    if not db_health:
+        db_health = models.CI_CD_Agent_Health(ci_cd_node_id=id)
+        db.add(db_health)
+    db_health.checked_at = datetime.datetime.utcnow()
+    db_health.consecutive_failures = consecutive_failures
+    if is_online:
+        db_health.latency_ms = latency_ms
+        db_health.busy_executors = busy_executors
+        db_health.total_executors = total_executors
+        db_health.queued_items = queued_items
+    db.commit()
+    return db_health
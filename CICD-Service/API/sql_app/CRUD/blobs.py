@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Author: Rafael Direito (rdireito@av.it.pt)
+
+# Description:
+# Contains all the CRUD operations over the references to the developer
+# defined tests' blobs (content-addressed store)
+
+
+import logging
+import datetime
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+# custom imports
+from .. import models
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+
+def add_blob_reference(db: Session, sha256: str, commit: bool = True):
+    # A single statement, so concurrent submissions of the same test don't
+    # race to create the blob's row
+    table = models.Developer_Defined_Test_Blob.__table__
+    db.execute(
+        insert(table)
+        .values(sha256=sha256, ref_count=1,
+                created_at=datetime.datetime.utcnow(),
+                updated_at=datetime.datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=[table.c.sha256],
+            set_={
+                "ref_count": table.c.ref_count + 1,
+                "updated_at": datetime.datetime.utcnow()
+            }
+        )
+    )
+    if commit:
+        db.commit()
+
+
+def touch_blob(db: Session, sha256: str):
+    # Creates the blob's row, without references, or refreshes it, so the
+    # garbage collector keeps the blob until a reference is added
+    table = models.Developer_Defined_Test_Blob.__table__
+    db.execute(
+        insert(table)
+        .values(sha256=sha256, ref_count=0,
+                created_at=datetime.datetime.utcnow(),
+                updated_at=datetime.datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=[table.c.sha256],
+            set_={"updated_at": datetime.datetime.utcnow()}
+        )
+    )
+    db.commit()
+
+
+def recount_blob_references(db: Session) -> int:
+    """Sets the reference count of every blob to the number of test
+    instances' tests that use it
+
+    Returns:
+        int: number of blobs whose reference count was wrong
+    """
+    # The blobs are locked first, so the references being added meanwhile
+    # are either counted or wait for the recount to finish
+    blobs = db.query(models.Developer_Defined_Test_Blob)\
+        .with_for_update().all()
+    references = dict(
+        db.query(models.Test_Instance_Tests.developer_defined_test_filepath,
+                 func.count(models.Test_Instance_Tests.id))
+        .filter(models.Test_Instance_Tests.is_developer_defined == True,
+                models.Test_Instance_Tests.developer_defined_test_filepath.in_(
+                    db.query(models.Developer_Defined_Test_Blob.sha256)))
+        .group_by(models.Test_Instance_Tests.developer_defined_test_filepath)
+        .all()
+    )
+    fixed = 0
+    for blob in blobs:
+        ref_count = references.get(blob.sha256, 0)
+        if blob.ref_count != ref_count:
+            logging.warning(f"Blob {blob.sha256} had {blob.ref_count} "\
+                f"references instead of {ref_count}. Fixed it.")
+            blob.ref_count = ref_count
+            fixed += 1
+    db.commit()
+    return fixed
+
+
+def get_blobs(db: Session):
+    return db.query(models.Developer_Defined_Test_Blob).all()
+
+
+def get_unreferenced_blobs(db: Session, updated_before: datetime.datetime):
+    return db.query(models.Developer_Defined_Test_Blob)\
+        .filter(models.Developer_Defined_Test_Blob.ref_count == 0,
+                models.Developer_Defined_Test_Blob.updated_at < updated_before)\
+        .all()
+
+
+def delete_unreferenced_blob(db: Session, sha256: str,
+                             updated_before: datetime.datetime) -> bool:
+    # Only if no reference was added, nor the blob stored again, in the
+    # meantime
+    deleted = db.query(models.Developer_Defined_Test_Blob)\
+        .filter(models.Developer_Defined_Test_Blob.sha256 == sha256,
+                models.Developer_Defined_Test_Blob.ref_count == 0,
+                models.Developer_Defined_Test_Blob.updated_at < updated_before)\
+        .delete(synchronize_session=False)
+    db.commit()
+    return deleted == 1
+
+
+def get_developer_defined_test_filepaths(db: Session):
+    return {
+        filepath for filepath, in db.query(
+            models.Test_Instance_Tests.developer_defined_test_filepath)
+        .filter(models.Test_Instance_Tests.is_developer_defined == True,
+                models.Test_Instance_Tests.developer_defined_test_filepath != None)
+        .distinct()
+    }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Author: Rafael Direito (rdireito@av.it.pt)
+
+# Description:
+# Contains all the CRUD operations over the Test Dispatch Queue
+
+
+import logging
+import datetime
+import json
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+# custom imports
+from .. import models
+from ..unit_of_work import Unit_Of_Work
+import aux.constants as Constants
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+
+def enqueue_test_dispatch_job(db: Session, test_instance_id: int, payload: dict, uow: Unit_Of_Work = None):
+    dispatch_job = models.Test_Dispatch_Job(
+        test_instance_id=test_instance_id,
+        state=Constants.DISPATCH_JOB_STATES["queued"],
+        payload=json.dumps(payload),
+        attempts=0
+    )
+    if uow is not None:
+        # Visible to the dispatch workers once the caller commits
+        return uow.add(dispatch_job)
+    db.add(dispatch_job)
+    db.commit()
+    db.refresh(dispatch_job)
+    logging.info(f"Enqueued dispatch job {dispatch_job.id} for test instance {test_instance_id}.")
+    return dispatch_job
+
+
+def claim_next_test_dispatch_job(db: Session):
+    # SKIP LOCKED allows several workers to poll the queue without blocking
+    # each other or claiming the same job
+    dispatch_job = db.query(models.Test_Dispatch_Job)\
+        .filter(models.Test_Dispatch_Job.state == Constants.DISPATCH_JOB_STATES["queued"],
+                or_(models.Test_Dispatch_Job.available_at == None,
+                    models.Test_Dispatch_Job.available_at <= datetime.datetime.utcnow()))\
+        .order_by(models.Test_Dispatch_Job.id)\
+        .with_for_update(skip_locked=True)\
+        .first()
+    if not dispatch_job:
+        db.rollback()
+        return None
+    dispatch_job.state = Constants.DISPATCH_JOB_STATES["running"]
+    dispatch_job.attempts += 1
+    dispatch_job.claimed_at = datetime.datetime.utcnow()
+    db.commit()
+    db.refresh(dispatch_job)
+    logging.info(f"Claimed dispatch job {dispatch_job.id} (test instance {dispatch_job.test_instance_id}).")
+    return dispatch_job
+
+
+def update_test_dispatch_job_state(db: Session, dispatch_job_id: int, state: str, error: str = None):
+    dispatch_job = db.query(models.Test_Dispatch_Job).filter(models.Test_Dispatch_Job.id == dispatch_job_id).first()
+    dispatch_job.state = state
+    dispatch_job.error = error
+    db.commit()
+    db.refresh(dispatch_job)
+    logging.info(f"Dispatch job {dispatch_job.id} is now {state}.")
+    return dispatch_job
+
+
+def retry_test_dispatch_job(db: Session, dispatch_job_id: int, delay: float, error: str):
+    # The job goes back to the queue, but isn't claimed before the delay
+    dispatch_job = db.query(models.Test_Dispatch_Job).filter(models.Test_Dispatch_Job.id == dispatch_job_id).first()
+    dispatch_job.state = Constants.DISPATCH_JOB_STATES["queued"]
+    dispatch_job.error = error
+    dispatch_job.available_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+    db.commit()
+    db.refresh(dispatch_job)
+    logging.info(f"Dispatch job {dispatch_job.id} will be retried in {delay} seconds.")
+    return dispatch_job
+
+
+def requeue_interrupted_test_dispatch_jobs(db: Session, lease: float = Constants.DISPATCH_JOB_LEASE):
+    # Jobs that were running when a CI/CD Manager stopped must be dispatched
+    # again. The ones claimed less than a lease ago may still be running, in
+    # this or in another CI/CD Manager
+    claimed_before = datetime.datetime.utcnow() - datetime.timedelta(seconds=lease)
+    dispatch_jobs = db.query(models.Test_Dispatch_Job).filter(
+        models.Test_Dispatch_Job.state == Constants.DISPATCH_JOB_STATES["running"],
+        or_(models.Test_Dispatch_Job.claimed_at == None,
+            models.Test_Dispatch_Job.claimed_at < claimed_before))\
+        .with_for_update(skip_locked=True)\
+        .all()
+    for dispatch_job in dispatch_jobs:
+        dispatch_job.state = Constants.DISPATCH_JOB_STATES["queued"]
+    db.commit()
+    if dispatch_jobs:
+        logging.info(f"Requeued {len(dispatch_jobs)} interrupted dispatch jobs.")
+    return len(dispatch_jobs)
+
+
+def get_test_dispatch_job_given_test_instance_id(db: Session, test_instance_id: int):
+    return db.query(models.Test_Dispatch_Job).filter(
+        models.Test_Dispatch_Job.test_instance_id == test_instance_id).first()
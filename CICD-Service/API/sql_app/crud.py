@@ -8,19 +8,24 @@
 
 
 import logging
+import json
 import random
 from statistics import mode
 import string
 # generic imports
 from os import access, name
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 # custom imports
 from . import models
 from sql_app.schemas import ci_cd_manager as ci_cd_manager_schemas, test_info as testinfo_schemas
 from aux import auth
 from sql_app.CRUD import agents as agents_crud
+from sql_app.CRUD import blobs as blobs_crud
+from sql_app.unit_of_work import Unit_Of_Work
 from exceptions.auth import *
 from exceptions.agents import *
 # Logger
@@ -125,26 +130,34 @@ def get_all_testbeds(db: Session, skip: int = 0, limit: int = 500):
 # ------------ Test Instances ------------ #
 # ---------------------------------------- #
 
-def create_test_instance(db: Session, netapp_id: str, network_service_id: str, testbed_id: str, extra_information: str = None, nods_id:str = None):
-    current_build = get_last_build_of_test_instance(db, netapp_id, network_service_id) + 1
+def create_test_instance(db: Session, netapp_id: str, network_service_id: str, testbed_id: str, extra_information: str = None, nods_id:str = None, uow: Unit_Of_Work = None):
+    current_build = allocate_build_number(db, netapp_id, network_service_id)
     test_instance = models.Test_Instance(netapp_id=netapp_id, network_service_id=network_service_id, build=current_build, testbed_id=testbed_id, access_token=''.join(random.choice(string.ascii_lowercase) for i in range(16)))
     if extra_information:
         test_instance.extra_information = extra_information
     if nods_id:
         test_instance.nods_id = nods_id
-    db.add(test_instance)
-    db.commit()
-    db.refresh(test_instance)
+    __save(db, test_instance, uow)
     logging.info(f"Created test instance for netapp_id '{netapp_id}' and network_service_id '{network_service_id}'.")
     return test_instance
 
 
-def update_test_instance_extra_info(db: Session, test_id: int, extra_information: str):
+def update_test_instance_extra_info(db: Session, test_id: int, extra_information: str, uow: Unit_Of_Work = None):
     db_test_instance = db.query(models.Test_Instance).filter(models.Test_Instance.id == test_id).first()
     db_test_instance.extra_information = extra_information
+    __save(db, db_test_instance, uow, is_new=False)
+    logging.info(f"Updated extra information on test instance {db_test_instance.id}.")
+    return db_test_instance
+
+
+def update_test_instance_build_number(db: Session, test_id: int, build_number: int):
+    db_test_instance = db.query(models.Test_Instance).filter(models.Test_Instance.id == test_id).first()
+    extra_information = json.loads(db_test_instance.extra_information)
+    extra_information["build_number"] = build_number
+    db_test_instance.extra_information = json.dumps(extra_information)
     db.commit()
     db.refresh(db_test_instance)
-    logging.info(f"Updated extra information on test instance {db_test_instance.id}.")
+    logging.info(f"Test instance {db_test_instance.id} is running on build {build_number}.")
     return db_test_instance
 
 
@@ -156,11 +169,10 @@ def get_test_instance(db: Session, test_id: int, access_token: str = None):
     return db_test_instance
 
 
-def update_test_instance_ci_cd_agent(db: Session, test_id: int, ci_cd_id: int):
+def update_test_instance_ci_cd_agent(db: Session, test_id: int, ci_cd_id: int, uow: Unit_Of_Work = None):
     db_test_instance = db.query(models.Test_Instance).filter(models.Test_Instance.id == test_id).first()
     db_test_instance.ci_cd_node_id = ci_cd_id
-    db.commit()
-    db.refresh(db_test_instance)
+    __save(db, db_test_instance, uow, is_new=False)
     logging.info(f"Updated ci_cd_node agent on test instance {db_test_instance.id}.")
     return db_test_instance
 
@@ -183,8 +195,28 @@ def get_test_instances_by_id(db: Session, test_instance_id: int):
     return db.query(models.Test_Instance).filter(models.Test_Instance.id == test_instance_id).first().as_dict()
 
 
-def get_last_build_of_test_instance(db: Session, netapp_id: str, network_service_id: str):
-    return len(db.query(models.Test_Instance).filter(models.Test_Instance.netapp_id == netapp_id, models.Test_Instance.network_service_id == network_service_id).all())
+def allocate_build_number(db: Session, netapp_id: str, network_service_id: str):
+    # A single statement increments the counter, so concurrent submissions
+    # never get the same build number. The counter's row stays locked until
+    # the caller's transaction ends. The first time, it starts from the last
+    # build of the test instances created before the counters existed
+    counters = models.Test_Instance_Build_Counter.__table__
+    return db.execute(
+        insert(counters)
+        .values(
+            netapp_id=netapp_id,
+            network_service_id=network_service_id,
+            last_build=select(func.coalesce(func.max(models.Test_Instance.build), 0) + 1)
+                .where(models.Test_Instance.netapp_id == netapp_id,
+                       models.Test_Instance.network_service_id == network_service_id)
+                .scalar_subquery()
+        )
+        .on_conflict_do_update(
+            index_elements=[counters.c.netapp_id, counters.c.network_service_id],
+            set_={"last_build": counters.c.last_build + 1}
+        )
+        .returning(counters.c.last_build)
+    ).scalar()
 
 
 def get_ci_cd_agent_given_test_instance_id(db: Session, test_instance_id: int):
@@ -197,11 +229,9 @@ def get_ci_cd_agent_given_test_instance_id(db: Session, test_instance_id: int):
 # -------------- Test Status ------------- #
 # ---------------------------------------- #
 
-def create_test_status(db: Session, test_id: int, state: str, success: bool):
+def create_test_status(db: Session, test_id: int, state: str, success: bool, uow: Unit_Of_Work = None):
     test_status = models.Test_Status(test_id=test_id, state=state.upper(), success=success)
-    db.add(test_status)
-    db.commit()
-    db.refresh(test_status)
+    __save(db, test_status, uow)
     logging.info(f"Created test status: {test_status.as_dict()}")
     return test_status
 
@@ -223,15 +253,53 @@ def get_test_status_given_test_id(db: Session, test_id: int):
     return db.query(models.Test_Status).filter(models.Test_Status.test_id == test_id).all()
 
 
-def get_all_test_status_for_test(db: Session, netapp_id: str, network_service_id: str):
-    test_instances = get_test_instances_by_netapp_and_network_service(db, netapp_id, network_service_id)
+def get_all_test_status_for_test(db: Session, netapp_id: str, network_service_id: str,
+    since_build: int = None, limit: int = None):
+    """Gets the test statuses of the builds of a NetApp and network service,
+    in a single query, ordered by build
+
+    Args:
+        since_build (int, optional): only the builds after this one
+        limit (int, optional): max. number of builds
+
+    Returns:
+        dict: the test statuses by build ("Build N"), and next_since_build,
+        the since_build of the next page (None if this is the last one)
+    """
+    builds = db.query(models.Test_Instance.build).filter(
+        models.Test_Instance.netapp_id == netapp_id,
+        models.Test_Instance.network_service_id == network_service_id)
+    if since_build is not None:
+        builds = builds.filter(models.Test_Instance.build > since_build)
+    builds = builds.order_by(models.Test_Instance.build)
+    if limit is not None:
+        # One more build tells if there is a next page
+        builds = builds.limit(limit + 1)
+
+    rows = db.query(models.Test_Instance.build, models.Test_Status)\
+        .outerjoin(models.Test_Status, models.Test_Status.test_id == models.Test_Instance.id)\
+        .filter(models.Test_Instance.netapp_id == netapp_id,
+                models.Test_Instance.network_service_id == network_service_id,
+                models.Test_Instance.build.in_(builds.scalar_subquery()))\
+        .order_by(models.Test_Instance.build, models.Test_Status.timestamp, models.Test_Status.id)\
+        .all()
+
     dic = {
         "netapp_id": netapp_id,
         "network_service_id": network_service_id,
-        "test_status": {}
+        "test_status": {},
+        "next_since_build": None
     }
-    for t in test_instances:
-        dic["test_status"]["Build " + str(t.build)] = [ts.as_dict() for ts in get_test_status_given_test_id(db, t.id)]
+    last_build = None
+    for build, test_status in rows:
+        if build != last_build and len(dic["test_status"]) == limit:
+            # The first build of the next page
+            dic["next_since_build"] = last_build
+            break
+        last_build = build
+        statuses = dic["test_status"].setdefault("Build " + str(build), [])
+        if test_status is not None:
+            statuses.append(test_status.as_dict())
     return dic
 
 
@@ -250,7 +318,7 @@ def get_all_test_status_for_test_given_id(db: Session, test_id: int, access_toke
 def create_test_instance_test(db: Session, test_instance_id: int, 
     performed_test: str, original_test_name: str, description: str,
     performed_test_results_location: str = None, is_developer_defined=False, 
-    developer_defined_test_filepath = None):
+    developer_defined_test_filepath = None, uow: Unit_Of_Work = None):
     
     test_instance_test = models.Test_Instance_Tests(
         test_instance=test_instance_id,
@@ -263,9 +331,11 @@ def create_test_instance_test(db: Session, test_instance_id: int,
     
     if performed_test_results_location:
         test_instance_test.performed_test_results_location = performed_test_results_location
-    db.add(test_instance_test)
-    db.commit()
-    db.refresh(test_instance_test)
+    if is_developer_defined and developer_defined_test_filepath:
+        # The test references a blob of the content-addressed store
+        blobs_crud.add_blob_reference(db, developer_defined_test_filepath,
+            commit=False)
+    __save(db, test_instance_test, uow)
     logging.info(f"Test Instance Test created : {test_instance_test.as_dict()}")
     return test_instance_test
 
@@ -299,6 +369,64 @@ def update_test_status_of_test_instance(db: Session, test_instance_id: int, perf
     return test_instance_test
 
 
+def update_tests_status_of_test_instance(db: Session, test_instance_id: int, tests_results: dict):
+    # tests_results: performed test -> Robot_Test_Results
+    # All the tests, and their timings, are updated in a single transaction
+    test_instance_tests = db.query(models.Test_Instance_Tests).filter(models.Test_Instance_Tests.test_instance == test_instance_id, 
+    models.Test_Instance_Tests.performed_test.in_(list(tests_results.keys()))).all()
+    for test_instance_test in test_instance_tests:
+        test_results = tests_results[test_instance_test.performed_test]
+        test_instance_test.start_time = str(test_results.start_time.replace(microsecond=0))
+        test_instance_test.end_time = str(test_results.end_time.replace(microsecond=0))
+        test_instance_test.success = test_results.success
+
+    # The results may be published more than once
+    db.query(models.Test_Instance_Test_Timing).filter(models.Test_Instance_Test_Timing.test_instance == test_instance_id, 
+    models.Test_Instance_Test_Timing.performed_test.in_(list(tests_results.keys()))).delete(synchronize_session=False)
+    timings = [
+        timing
+        for performed_test, test_results in tests_results.items()
+        for timing in __get_test_timings(test_instance_id, performed_test, test_results)
+    ]
+    db.bulk_insert_mappings(models.Test_Instance_Test_Timing, timings)
+    db.commit()
+    logging.info(f"Updated the status of {len(test_instance_tests)} tests of the test instance {test_instance_id} ({len(timings)} timings).")
+    return test_instance_tests
+
+
+def __get_test_timings(test_instance_id: int, performed_test: str, test_results):
+    # Every mapping has the same keys, so they are inserted in a single batch
+    for element_type, elements in (("suite", test_results.suites), ("test", test_results.tests)):
+        for element in elements:
+            yield {
+                "test_instance": test_instance_id,
+                "performed_test": performed_test,
+                "element_type": element_type,
+                "name": element.name,
+                "status": element.status,
+                "start_time": element.start_time,
+                "end_time": element.end_time,
+                "duration_seconds": element.duration_seconds,
+                "calls": None,
+                "failures": None,
+                "max_duration_seconds": None,
+            }
+    for name, keyword in test_results.keywords.items():
+        yield {
+            "test_instance": test_instance_id,
+            "performed_test": performed_test,
+            "element_type": "keyword",
+            "name": name,
+            "status": "FAIL" if keyword.failures else "PASS",
+            "start_time": None,
+            "end_time": None,
+            "duration_seconds": keyword.total_seconds,
+            "calls": keyword.calls,
+            "failures": keyword.failures,
+            "max_duration_seconds": keyword.max_seconds,
+        }
+
+
 def get_developer_defined_tests_for_test_instance(db: Session, 
     test_instance_id: int, communication_token: str = None):
     
@@ -335,6 +463,12 @@ def get_test_info_by_testbed_id(db: Session, testbed_id: int):
         models.Test_Information.testbed_id == testbed_id)
     return test_info_instance.all()
 
+def get_tests_ftp_base_locations(db: Session):
+    return [
+        test_info.ftp_base_location
+        for test_info in db.query(models.Test_Information.ftp_base_location).distinct().all()
+    ]
+
 def is_testinfo_valid(db: Session, test_info_instances: models.Test_Information,
 testinfo_data:testinfo_schemas.TestInformation):
     return all( [t.testid != testinfo_data.testid for t in test_info_instances])
@@ -444,35 +578,32 @@ def create_test_information(db: Session,testinfo_data: testinfo_schemas.TestInfo
 
 
 def create_testing_artifact(db: Session, test_instance_id: int, 
-                            ftp_base_path: str):
+                            ftp_base_path: str, uow: Unit_Of_Work = None):
     
     testing_artifact_db = db.query(models.Testing_Artifact).filter(
         models.Testing_Artifact.test_instance_id == test_instance_id).first()
     
     if testing_artifact_db is not None:
-        update_testing_artifact(db, test_instance_id, ftp_base_path)
+        update_testing_artifact(db, test_instance_id, ftp_base_path, uow)
   
     testing_artifact_db = models.Testing_Artifact(
         test_instance_id=test_instance_id,
         ftp_base_path=ftp_base_path,
     )
     
-    db.add(testing_artifact_db)
-    db.commit()
-    db.refresh(testing_artifact_db)
+    __save(db, testing_artifact_db, uow)
     logging.info(f"Testing Artifacts Created : {testing_artifact_db.as_dict()}")
     return testing_artifact_db
 
 
 def update_testing_artifact(db: Session, test_instance_id: int, 
-                            ftp_base_path: str):
+                            ftp_base_path: str, uow: Unit_Of_Work = None):
     
     testing_artifact_db = db.query(models.Testing_Artifact).filter(
         models.Testing_Artifact.test_instance_id == test_instance_id).first()
     
     testing_artifact_db.ftp_base_path = ftp_base_path    
-    db.commit()
-    db.refresh(testing_artifact_db)
+    __save(db, testing_artifact_db, uow, is_new=False)
     logging.info(f"Testing Artifacts Updated : {testing_artifact_db.as_dict()}")
     return testing_artifact_db
 
@@ -505,6 +636,48 @@ def is_communication_token_for_test_valid(db: Session, test_instance_id: int, co
     return True
 
 
+def get_test_report(db: Session, test_instance_id: int, access_token: str = None):
+    """Gets all the information of a test instance in two queries: the test
+    instance, with its statuses and dashboards (a test instance has, at most,
+    one of each dashboard), and its performed tests
+
+    Returns:
+        dict: test_status, test_base_info, tests_performed,
+        metrics_dashboards and logs_dashboards, or None if the test instance
+        doesn't exist or the access token is invalid
+    """
+    query = db.query(models.Test_Instance).options(
+        joinedload(models.Test_Instance.statuses),
+        joinedload(models.Test_Instance.metrics_dashboards),
+        joinedload(models.Test_Instance.logs_dashboards),
+        selectinload(models.Test_Instance.tests)
+    ).filter(models.Test_Instance.id == test_instance_id)
+    if access_token is not None:
+        query = query.filter(models.Test_Instance.access_token == access_token)
+    db_test_instance = query.first()
+    if db_test_instance is None:
+        logging.info(f"Invalid access_token for test_instance_id {test_instance_id}.")
+        return None
+
+    statuses = db_test_instance.statuses
+    return {
+        "test_status": [test_status.as_dict() for test_status in statuses],
+        "test_base_info": {
+            "test_id": db_test_instance.id,
+            "netapp_id": db_test_instance.netapp_id,
+            "network_service_id": db_test_instance.network_service_id,
+            "testbed_id": db_test_instance.testbed_id,
+            "started_at": str(statuses[0].timestamp) if statuses else None,
+            "test_status": all([ts.success for ts in statuses]),
+        },
+        "tests_performed": [test.as_dict() for test in db_test_instance.tests],
+        "metrics_dashboards": [
+            dashboard.as_dict() for dashboard in db_test_instance.metrics_dashboards],
+        "logs_dashboards": [
+            dashboard.as_dict() for dashboard in db_test_instance.logs_dashboards],
+    }
+
+
 def get_test_base_information(db: Session, test_instance_id: int, access_token: str = None):
     data = {}
     if __validate_test_instance_access_token(db, test_instance_id, access_token):
@@ -528,3 +701,16 @@ def __validate_test_instance_access_token(db: Session, test_instance_id: int, ac
             logging.info(f"Invalid access_token for test_instance_id {test_instance_id}.")
             return False
     return True
+
+
+def __save(db: Session, instance, uow: Unit_Of_Work = None, is_new=True):
+    # In a unit of work, the caller commits. Otherwise, each row is committed
+    # on its own
+    if uow is not None:
+        if is_new:
+            uow.add(instance)
+        return
+    if is_new:
+        db.add(instance)
+    db.commit()
+    db.refresh(instance)
@@ -19,8 +19,8 @@
 
 # generic imports
 from email.policy import default
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
-from sqlalchemy import Column, Integer, DateTime, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float
+from sqlalchemy import Column, Integer, DateTime, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 import datetime
 
@@ -30,6 +30,9 @@ from .database import Base
 
 class CI_CD_Agent(Base):
 	__tablename__ = "ci_cd_nodes"
+	__table_args__ = (
+		Index("ix_ci_cd_nodes_testbed", "testbed_id", "url"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	url = Column(String)
@@ -49,6 +52,23 @@ class CI_CD_Agent(Base):
 		return dic
 
 
+class CI_CD_Agent_Health(Base):
+	__tablename__ = "ci_cd_nodes_health"
+
+	ci_cd_node_id = Column(Integer, ForeignKey("ci_cd_nodes.id", ondelete="CASCADE"), primary_key=True)
+	checked_at = Column(DateTime, default=datetime.datetime.utcnow)
+	latency_ms = Column(Float)
+	busy_executors = Column(Integer)
+	total_executors = Column(Integer)
+	queued_items = Column(Integer)
+	consecutive_failures = Column(Integer, nullable=False, default=0)
+
+	def as_dict(self):
+		dic = {c.name: getattr(self, c.name) for c in self.__table__.columns}
+		dic["checked_at"] = self.checked_at.isoformat() if self.checked_at else None
+		return dic
+
+
 class Testbed(Base):
 	__tablename__ = "testbeds"
 
@@ -63,6 +83,12 @@ class Testbed(Base):
 
 class Test_Instance(Base):
 	__tablename__ = "test_instances"
+	__table_args__ = (
+		UniqueConstraint("netapp_id", "network_service_id", "build",
+			name="uq_test_instances_build"),
+		Index("ix_test_instances_ci_cd_node_id", "ci_cd_node_id"),
+		Index("ix_test_instances_access_token", "access_token"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	netapp_id = Column(String, nullable=False)
@@ -75,6 +101,48 @@ class Test_Instance(Base):
 	test_log_location = Column(String)
 	test_results_location = Column(String)
 	nods_id = Column(String)
+	# Loaded together by crud.get_test_report
+	statuses = relationship("Test_Status", order_by="Test_Status.id")
+	tests = relationship("Test_Instance_Tests", order_by="Test_Instance_Tests.id")
+	metrics_dashboards = relationship("Test_Metrics_Dashboard", order_by="Test_Metrics_Dashboard.id")
+	logs_dashboards = relationship("Test_Logs_Dashboard", order_by="Test_Logs_Dashboard.id")
+
+	def as_dict(self):
+		return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+
+class Test_Instance_Build_Counter(Base):
+	# Last build number given to the test instances of each NetApp and
+	# network service
+	__tablename__ = "test_instance_build_counters"
+
+	netapp_id = Column(String, primary_key=True)
+	network_service_id = Column(String, primary_key=True)
+	last_build = Column(Integer, nullable=False)
+
+	def as_dict(self):
+		return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+
+class Test_Dispatch_Job(Base):
+	__tablename__ = "test_dispatch_jobs"
+	__table_args__ = (
+		Index("ix_test_dispatch_jobs_state", "state", "id"),
+		Index("ix_test_dispatch_jobs_test_instance_id", "test_instance_id"),
+	)
+
+	id = Column(Integer, primary_key=True, index=True)
+	test_instance_id = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
+	state = Column(String, nullable=False)
+	payload = Column(String, nullable=False)
+	attempts = Column(Integer, nullable=False, default=0)
+	error = Column(String)
+	# Jobs that are retried aren't claimed before this time
+	available_at = Column(DateTime, nullable=True)
+	# When a dispatch worker claimed the job for the last time
+	claimed_at = Column(DateTime, nullable=True)
+	created_at = Column(DateTime, default=datetime.datetime.utcnow)
+	updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
 	def as_dict(self):
 		return {c.name: getattr(self, c.name) for c in self.__table__.columns}
@@ -82,6 +150,9 @@ class Test_Instance(Base):
 
 class Test_Status(Base):
 	__tablename__ = "test_status"
+	__table_args__ = (
+		Index("ix_test_status_test_id_timestamp", "test_id", "timestamp"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	timestamp =  Column(DateTime, default=datetime.datetime.utcnow)
@@ -92,12 +163,16 @@ class Test_Status(Base):
 
 	def as_dict(self):
 		dic =  {c.name: getattr(self, c.name) for c in self.__table__.columns}
-		dic["timestamp"] = self.timestamp.isoformat()
+		# Statuses added to a unit of work have no timestamp until flushed
+		dic["timestamp"] = self.timestamp.isoformat() if self.timestamp else None
 		return dic
 
 
 class Testing_Artifact(Base):
 	__tablename__ = "testing_artifact"
+	__table_args__ = (
+		Index("ix_testing_artifact_test_instance_id", "test_instance_id"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	test_instance_id = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
@@ -111,6 +186,9 @@ class Testing_Artifact(Base):
 
 class Test_Instance_Tests(Base):
     __tablename__ = "test_instance_tests"   
+    __table_args__ = (
+        Index("ix_test_instance_tests_test", "test_instance", "performed_test"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)    
     test_instance = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
@@ -127,8 +205,58 @@ class Test_Instance_Tests(Base):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
 
+class Test_Instance_Test_Timing(Base):
+	# Suites, tests and keywords timings of the performed tests, parsed from
+	# the Robot Framework outputs. Keywords are aggregated by name
+	__tablename__ = "test_instance_test_timings"
+	__table_args__ = (
+		Index("ix_test_instance_test_timings_test", "test_instance", "performed_test"),
+	)
+
+	id = Column(Integer, primary_key=True, index=True)
+	test_instance = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
+	performed_test = Column(String, nullable=False)
+	# suite, test or keyword
+	element_type = Column(String, nullable=False)
+	name = Column(String, nullable=False)
+	status = Column(String)
+	start_time = Column(DateTime)
+	end_time = Column(DateTime)
+	duration_seconds = Column(Float)
+	# Keywords only
+	calls = Column(Integer)
+	failures = Column(Integer)
+	max_duration_seconds = Column(Float)
+
+	def as_dict(self):
+		dic = {c.name: getattr(self, c.name) for c in self.__table__.columns}
+		for key in ("start_time", "end_time"):
+			if dic[key] is not None:
+				dic[key] = dic[key].isoformat()
+		return dic
+
+
+class Developer_Defined_Test_Blob(Base):
+	# Developer defined tests stored in the FTP server, by the SHA-256 of their
+	# content. ref_count is the number of test instances' tests that use each
+	# one, so the unreferenced blobs can be garbage collected
+	__tablename__ = "developer_defined_test_blobs"
+
+	sha256 = Column(String(64), primary_key=True)
+	ref_count = Column(Integer, nullable=False, default=0)
+	created_at = Column(DateTime, default=datetime.datetime.utcnow)
+	# Last time a reference was added or removed
+	updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+	def as_dict(self):
+		return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+
 class Test_Information(Base):
 	__tablename__ = "test_information"
+	__table_args__ = (
+		Index("ix_test_information_testbed", "testbed_id", "testid"),
+	)
 	id  = Column(Integer,primary_key=True, autoincrement=True)
 	testid = Column(String)
 	name = Column(String)
@@ -144,6 +272,9 @@ class Test_Information(Base):
 
 class Test_Variables(Base):
 	__tablename__ = "test_variables"
+	__table_args__ = (
+		Index("ix_test_variables_testinformation_id", "testinformation_id"),
+	)
 	id = Column(Integer, primary_key=True, index=True)
 	variable_name = Column(String)
 	description = Column(String)
@@ -158,6 +289,9 @@ class Test_Variables(Base):
 
 class Variable_Options(Base):
 	__tablename__ = "variable_options"
+	__table_args__ = (
+		Index("ix_variable_options_testvariable_id", "testvariable_id"),
+	)
 	id = Column(Integer, primary_key=True, index=True)
 	name = Column (String)
 	testvariable_id = Column(Integer, ForeignKey('test_variables.id'))
@@ -196,6 +330,9 @@ class Role(Base):
 
 class Test_Metrics_Dashboard(Base):
 	__tablename__ = "test_metrics_dashboard"
+	__table_args__ = (
+		Index("ix_test_metrics_dashboard_test_id", "test_id"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	test_id = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
@@ -209,6 +346,9 @@ class Test_Metrics_Dashboard(Base):
 
 class Test_Logs_Dashboard(Base):
 	__tablename__ = "test_logs_dashboard"
+	__table_args__ = (
+		Index("ix_test_logs_dashboard_test_id", "test_id"),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	test_id = Column(Integer, ForeignKey("test_instances.id"), nullable=False)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Author: Rafael Direito (rdireito@av.it.pt)
+
+# Description:
+# Unit of work over a database session. The CRUD functions that receive one
+# add their new rows to it, and don't commit, so a caller can create several
+# rows with a single flush and a single commit
+
+
+from sqlalchemy.orm import Session
+
+
+class Unit_Of_Work:
+
+    def __init__(self, db: Session):
+        self.db = db
+        # New rows, inserted on the next flush
+        self.pending = []
+
+
+    def add(self, instance):
+        self.pending.append(instance)
+        return instance
+
+
+    def flush(self):
+        """Inserts the pending rows, e.g. when their ids are needed"""
+        if self.pending:
+            self.db.add_all(self.pending)
+            self.pending = []
+        self.db.flush()
+
+
+    def commit(self):
+        self.flush()
+        self.db.commit()
+
+
+    def rollback(self):
+        self.pending = []
+        self.db.rollback()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
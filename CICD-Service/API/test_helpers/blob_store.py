@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# @Description: Content-addressed store of the developer defined tests, in
+# the results FTP server. Each test is stored once, named after the SHA-256 of
+# its content, however many times it is submitted and under whichever NODS
+# ids. The blobs are spread over directories named after the first two hex
+# digits of their hash, so no directory listing grows too large. The test
+# instances' tests reference the blobs by their hash, and the references are
+# counted in the database, so the unreferenced blobs can be garbage collected.
+
+# generic imports
+from uuid import uuid4
+import threading
+import hashlib
+import logging
+import ftplib
+import re
+
+# custom imports
+from sql_app.database import SessionLocal
+import sql_app.CRUD.blobs as CRUD_Blobs
+from wrappers.ftp.client_pool import get_results_ftp_pool
+import aux.constants as Constants
+
+SHA256_REGEX = re.compile(r"^[0-9a-f]{64}$")
+BLOB_EXTENSION = ".tar.gz"
+
+# Blobs directories known to exist, to skip their creation
+__blob_directories = set()
+__blob_directories_lock = threading.Lock()
+
+
+def get_blobs_directory() -> str:
+    return f"{Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR}/"\
+        f"{Constants.DEVELOPER_DEFINED_TEST_BLOBS_FTP_DIR}"
+
+
+def get_uploads_directory() -> str:
+    return f"{Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR}/"\
+        f"{Constants.DEVELOPER_DEFINED_TEST_UPLOADS_FTP_DIR}"
+
+
+def get_blob_path(sha256: str) -> str:
+    return f"{get_blobs_directory()}/{sha256[:2]}/{sha256}{BLOB_EXTENSION}"
+
+
+def is_blob_reference(developer_defined_test_filepath: str) -> bool:
+    return developer_defined_test_filepath is not None and \
+        SHA256_REGEX.match(developer_defined_test_filepath) is not None
+
+
+def get_developer_defined_test_path(developer_defined_test_filepath: str) -> str:
+    # Tests submitted before the content-addressed store reference their
+    # file directly
+    if is_blob_reference(developer_defined_test_filepath):
+        return get_blob_path(developer_defined_test_filepath)
+    return developer_defined_test_filepath
+
+
+def store_blob(open_stream) -> str:
+    """Streams a developer defined test to the store, hashing it on the fly
+
+    Args:
+        open_stream (callable): returns a new iterable of the test's chunks.
+        It is called again if the upload has to be retried
+
+    Returns:
+        str: SHA-256 of the test, which references its blob
+    """
+    ftp_pool = get_results_ftp_pool()
+    # The test is first uploaded to a temporary file, since its hash, and so
+    # its blob, is only known at the end
+    temporary_path = f"{get_uploads_directory()}/{uuid4().hex}.part"
+
+    # One hash per attempt, since a retried upload starts over
+    blob_hashes = []
+    def open_hashed_stream():
+        blob_hash = hashlib.sha256()
+        blob_hashes.append(blob_hash)
+        def chunks():
+            for chunk in open_stream():
+                blob_hash.update(chunk)
+                yield chunk
+        return chunks()
+
+    ftp_pool.upload_stream(temporary_path, open_hashed_stream)
+    sha256 = blob_hashes[-1].hexdigest()
+    blob_path = get_blob_path(sha256)
+
+    # The blob's row is refreshed before checking if the blob is stored, so
+    # the garbage collector doesn't remove it before the new reference is
+    # added, even if the server doesn't replace it below
+    db = SessionLocal()
+    try:
+        CRUD_Blobs.touch_blob(db, sha256)
+    finally:
+        db.close()
+
+    try:
+        ftp_pool.stat(blob_path)
+        is_stored = True
+    except ftplib.error_perm:
+        is_stored = False
+        __create_blob_directory(ftp_pool, sha256[:2])
+
+    try:
+        # A stored blob is replaced by its identical copy, which also
+        # refreshes its modification time
+        ftp_pool.rename(temporary_path, blob_path)
+    except ftplib.error_perm:
+        if not is_stored:
+            raise
+        # The server doesn't replace existing files
+        ftp_pool.delete(temporary_path)
+
+    if is_stored:
+        logging.info(f"Blob {sha256} was already stored - {blob_path}")
+    else:
+        logging.info(f"Stored new blob {sha256} - {blob_path}")
+    return sha256
+
+
+def __create_blob_directory(ftp_pool, prefix):
+    with __blob_directories_lock:
+        if prefix in __blob_directories:
+            return
+    ftp_pool.makedirs(f"{get_blobs_directory()}/{prefix}")
+    with __blob_directories_lock:
+        __blob_directories.add(prefix)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# @Description: Read-through local cache of the default 5GASP testing
+# artifacts (e.g. wordlists), which every validation pipeline downloads.
+# Entries are validated against the FTP file's size and modification time
+# (SIZE and MDTM), and the least recently used ones are removed once the
+# cache exceeds its max. size.
+
+# generic imports
+from collections import OrderedDict
+import threading
+import logging
+import time
+import os
+
+# custom imports
+from wrappers.ftp.client_pool import get_results_ftp_pool
+import aux.constants as Constants
+
+
+class Default_Artifacts_Cache:
+
+    def __init__(self, directory, max_size_bytes):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        # artifact -> (size, mtime, time of the last validation), the least
+        # recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Avoids downloading the same artifact twice at the same time. The
+        # artifacts share a fixed number of locks, since their names come
+        # from the requests
+        self.download_locks = [
+            threading.Lock()
+            for _ in range(Constants.DEFAULT_ARTIFACTS_CACHE_DOWNLOAD_LOCKS)
+        ]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def open_artifact(self, artifact, ftp_path):
+        """Opens a cached artifact, downloading it first if it is not cached
+        or changed in the FTP server
+
+        Returns:
+            tuple: (file, size, mtime). The file is opened before the entry
+            can be evicted, so it can be read until the caller closes it
+        """
+        local_path = os.path.join(self.directory, artifact)
+        with self.lock:
+            entry = self.entries.get(artifact)
+            # Entries are only checked against the FTP server once in a while
+            if entry is not None and \
+                    time.monotonic() - entry[2] < Constants.DEFAULT_ARTIFACTS_CACHE_VALIDATION_TTL:
+                cached_file = self.__open(artifact, local_path)
+                if cached_file is not None:
+                    return cached_file, entry[0], entry[1]
+
+        with self.download_locks[hash(artifact) % len(self.download_locks)]:
+            size, mtime = get_results_ftp_pool().stat(ftp_path)
+            with self.lock:
+                entry = self.entries.get(artifact)
+                if entry is not None and entry[:2] == (size, mtime):
+                    cached_file = self.__open(artifact, local_path)
+                    if cached_file is not None:
+                        self.entries[artifact] = (size, mtime, time.monotonic())
+                        return cached_file, size, mtime
+                self.misses += 1
+
+            # Downloaded to a temporary file, so a cached artifact being
+            # served is never partially overwritten
+            temporary_path = f"{local_path}.{threading.get_ident()}.part"
+            try:
+                self.__download(ftp_path, temporary_path)
+                with self.lock:
+                    os.replace(temporary_path, local_path)
+                    self.entries[artifact] = (size, mtime, time.monotonic())
+                    self.entries.move_to_end(artifact)
+                    self.__evict(keep=artifact)
+                    cached_file = open(local_path, "rb")
+            finally:
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+            logging.info(f"Cached the default testing artifact '{artifact}' "\
+                f"({size} bytes).")
+            return cached_file, size, mtime
+
+
+    def __open(self, artifact, local_path):
+        # Invoked with the lock held, so the entry is not evicted before the
+        # file is opened. Once open, it can be read even if it is removed
+        try:
+            cached_file = open(local_path, "rb")
+        except OSError:
+            return None
+        self.hits += 1
+        self.entries.move_to_end(artifact)
+        return cached_file
+
+
+    def __download(self, ftp_path, temporary_path):
+        os.makedirs(self.directory, exist_ok=True)
+        def operation(ftp):
+            with open(temporary_path, "wb") as local_file:
+                ftp.retrbinary(f"RETR {ftp_path}", local_file.write,
+                               blocksize=Constants.FTP_STREAM_CHUNK_SIZE)
+        get_results_ftp_pool().run(operation)
+
+
+    def __evict(self, keep):
+        total_size = sum(size for size, _, _ in self.entries.values())
+        for artifact in list(self.entries.keys()):
+            if total_size <= self.max_size_bytes:
+                break
+            if artifact == keep:
+                continue
+            size, _, _ = self.entries.pop(artifact)
+            total_size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, artifact))
+            except OSError:
+                pass
+            logging.info(f"Evicted the default testing artifact '{artifact}' "\
+                "from the cache.")
+
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "size_bytes": sum(size for size, _, _ in self.entries.values()),
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+default_artifacts_cache = Default_Artifacts_Cache(
+    os.path.join(Constants.TESTING_ARTIFACTS_FTP_TEMP_STORAGE_DIR,
+                 Constants.DEFAULT_ARTIFACTS_CACHE_DIR),
+    Constants.DEFAULT_ARTIFACTS_CACHE_MAX_SIZE_MB * 1024 * 1024
+)
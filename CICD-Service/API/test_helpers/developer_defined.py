@@ -10,11 +10,8 @@ import aux.utils as Utils
 import logging
 from uuid import UUID
 import aux.constants as Constants
-import requests
-import tarfile
-from ftplib import FTP
-import os
-import urllib
+from concurrent.futures import ThreadPoolExecutor
+import test_helpers.blob_store as blob_store
 from typing import List
 
 def load_developer_defined_tests(nods_token, developer_defined_tests: List[str], 
@@ -28,32 +25,37 @@ def load_developer_defined_tests(nods_token, developer_defined_tests: List[str],
         nods_id (str): id of the serviceTestSpecification in NODS
 
     Returns:
-        dic: dict of the developer defined tests filepaths, in the ftp server,
-        indexed by name
+        dic: dict of the developer defined tests SHA-256, which reference
+        them in the ftp server, indexed by name
     """
-    # Get the Developer Defined Tests to the local warehouse directory and then
-    # move them to the FTP Server
-    loaded_tests_ftp_filepath = {}
-    for developer_defined_test_name in developer_defined_tests:
-        url_to_download = attachments.get(
-            f"{developer_defined_test_name}.tar.gz")
-        if url_to_download:
-            compressed_test_file_location = get_developer_defined_test_to_local_dir(
-                nods_token,
-                developer_defined_test_name,
-                url_to_download,
-                nods_id
-            )
-            logging.info(f"Got the Developer Defined Test '{developer_defined_test_name}'!")
-            ftp_test_full_path = move_test_to_ftp(compressed_test_file_location)
-            loaded_tests_ftp_filepath[developer_defined_test_name] = ftp_test_full_path
-    
-    return loaded_tests_ftp_filepath
-
-
-def get_developer_defined_test_to_local_dir(nods_token, developer_defined_test_name: str, 
+    # Stream the Developer Defined Tests from NODS to the FTP Server, several
+    # at a time
+    tests_to_load = [
+        (developer_defined_test_name, attachments.get(f"{developer_defined_test_name}.tar.gz"))
+        for developer_defined_test_name in developer_defined_tests
+        if attachments.get(f"{developer_defined_test_name}.tar.gz")
+    ]
+    if not tests_to_load:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(
+            len(tests_to_load), Constants.DEVELOPER_DEFINED_TESTS_LOAD_WORKERS)) as executor:
+        tests_hashes = executor.map(
+            lambda test: upload_test_to_ftp(nods_token, test[0], test[1], nods_id),
+            tests_to_load
+        )
+        return {
+            developer_defined_test_name: test_hash
+            for (developer_defined_test_name, _), test_hash
+            in zip(tests_to_load, tests_hashes)
+        }
+
+
+def upload_test_to_ftp(nods_token, developer_defined_test_name: str, 
     url_to_download: str, nods_id: UUID) -> str:
-    """Downloads the developer defined test to the warehouse local directory
+    """Streams a developer defined test from NODS to the FTP server's
+    content-addressed store. A test that is already stored, even if it was
+    submitted under another NODS id, is not stored again
 
     Args:
         developer_defined_test_name (str): name of the developer defined test
@@ -61,88 +63,19 @@ def get_developer_defined_test_to_local_dir(nods_token, developer_defined_test_n
         nods_id (UUID): id of the serviceTestSpecification in NODS
 
     Returns:
-        str: local path to the downloaded developer defined test
+        str: SHA-256 of the developer defined test, which references it in
+        the store
     """
-    # Get Compressed Test Files
-    
-    #r = requests.get(
-    #    f"{Constants.NODS_HOST}/tmf-api{url_to_download}",
-    #    allow_redirects=True
-    #)
-    
-    r = Utils.get_attachment(nods_token, url_to_download)
-
-    compressed_test_file_location = os.path.join(
-        Constants.DEVELOPER_DEFINED_TEST_TEMP_STORAGE_DIR,
-        f"{nods_id}-{developer_defined_test_name}.tar.gz"
-    )
-    open(compressed_test_file_location, 'wb').write(r.content)
-    
-    return compressed_test_file_location
-
-
-def move_test_to_ftp(developer_defined_test_path: str) -> None:    
-    """Copies a developer defined test to the FTP server
-
-    Args:
-        developer_defined_test_path (str): local path to the developer defined test
-    """
-    ftp_url = Constants.FTP_RESULTS_URL.split(":")[0] \
-        if ":" in Constants.FTP_RESULTS_URL else Constants.FTP_RESULTS_URL
-        
-    ftp_session = FTP(
-        ftp_url,
-        Constants.FTP_RESULTS_USER,
-        Constants.FTP_RESULTS_PASSWORD
-    )
-
-    # If a directory to store the developer defined tests does not exist, create it
-    if Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR not in ftp_session.nlst():
-        ftp_session.mkd(Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR)
-
-    ftp_test_full_path = os.path.join(
-        Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR,
-        os.path.basename(developer_defined_test_path)
-    )
-        
-    if os.path.basename(developer_defined_test_path) in [
-        f.split("/")[-1] 
-        for f 
-        in ftp_session.nlst(Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR)
-    ]:
-        # delete old version of the test
-        ftp_session.delete(ftp_test_full_path)
-        
-        logging.info(f"Removed old version of the developer defined test\
-        ({developer_defined_test_path}) from the FTP server")
-        
-    # store new version of the test
-    ret_store = ftp_session.storbinary(
-        'STOR ' + ftp_test_full_path, open(developer_defined_test_path, 'rb')
-    )
-    
-    # if this is successful we can remove the local copy of the test
-    if "complete" in ret_store.lower():
-        os.remove(developer_defined_test_path)
-        logging.info(f"Removed old version of the developer defined test\
-        ({developer_defined_test_path}) from the local warehouse")
-    
-    logging.info("Created new version of the developer defined test - "\
-        f"{developer_defined_test_path}")
-    
-    return ftp_test_full_path
-    #return os.path.dirname(ftp_test_full_path)
-
-
-def download_test_from_ftp(developer_defined_test_path: str) -> bytes:
-    ftp_location = Constants.FTP_RESULTS_URL.split(":")[0] \
-        if ":" in Constants.FTP_RESULTS_URL else Constants.FTP_RESULTS_URL
-        
-    url = f"ftp://{Constants.FTP_RESULTS_USER}:{Constants.FTP_RESULTS_PASSWORD}" \
-        f"@{ftp_location}/{developer_defined_test_path}"
-
-    logging.info(f"Will Obtain Developer Defined Test from '{ftp_location}/{developer_defined_test_path}'.")
-    r = urllib.request.urlopen(url)
-    test_content = r.read()
-    
-    return test_content
+    def open_test_stream():
+        ret, response = Utils.get_attachment_stream(nods_token, url_to_download)
+        if not ret:
+            raise Exception(response)
+        def chunks():
+            with response:
+                yield from response.iter_content(Constants.FTP_STREAM_CHUNK_SIZE)
+        return chunks()
+
+    test_hash = blob_store.store_blob(open_test_stream)
+    logging.info(f"Got the Developer Defined Test '{developer_defined_test_name}' "\
+        f"of {nods_id} (sha256: {test_hash})!")
+    return test_hash
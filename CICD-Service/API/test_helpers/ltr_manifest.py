@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# @Description: Manifests of the directories of the Local Test Repository
+# (LTR). A manifest lists the files of an LTR directory and their SHA-256
+# hashes, in the format used by sha256sum, so the CI/CD Agents only download
+# the files that changed since their last sync. The manifests are published
+# when the tests information changes, and periodically. When requested, a
+# published manifest is revalidated with the files' size and modification
+# time, so only the files that changed since it was published are hashed.
+
+from wrappers.ftp.client_pool import get_ltr_ftp_pool
+from sql_app import crud
+import aux.constants as Constants
+import threading
+import hashlib
+import logging
+import ftplib
+import time
+
+# path -> ((size, mtime), sha256, time when it was computed)
+__hashes = {}
+__hashes_lock = threading.Lock()
+# LTR directory -> ({path: (size, mtime)}, published manifest)
+__manifests = {}
+__manifests_lock = threading.Lock()
+
+
+def get_ltr_directories(db) -> list:
+    """Returns the LTR directories that have a manifest: the ones of the tests
+    and the one of the metrics collection files"""
+    ltr_directories = crud.get_tests_ftp_base_locations(db)
+    ltr_directories.append(Constants.METRICS_COLLECTION_INFO\
+        ["metrics_collection"]["ftp_base_location"])
+    return sorted({
+        ltr_directory.strip("/") for ltr_directory in ltr_directories if ltr_directory})
+
+
+def get_published_ltr_manifest(ltr_directory: str) -> str:
+    """Returns the published manifest of a directory of the LTR, publishing it
+    again if it wasn't yet or if any of its files changed since then"""
+    ltr_directory = ltr_directory.strip("/")
+    files = __list_ltr_directory(ltr_directory)
+    with __manifests_lock:
+        published = __manifests.get(ltr_directory)
+    if published is not None and published[0] == dict(files):
+        return published[1]
+    return publish_ltr_manifest(ltr_directory, files)
+
+
+def publish_ltr_manifest(ltr_directory: str, files: list = None) -> str:
+    """Builds the manifest of a directory of the LTR and publishes it"""
+    ltr_directory = ltr_directory.strip("/")
+    if files is None:
+        files = __list_ltr_directory(ltr_directory)
+    manifest = build_ltr_manifest(ltr_directory, files)
+    with __manifests_lock:
+        __manifests[ltr_directory] = (dict(files), manifest)
+    return manifest
+
+
+def publish_ltr_manifests(ltr_directories: list):
+    for ltr_directory in ltr_directories:
+        try:
+            publish_ltr_manifest(ltr_directory)
+        except Exception as e:
+            logging.warning(f"Couldn't publish the manifest of the LTR "\
+                f"directory '{ltr_directory}': {e}")
+
+
+def prune_ltr_manifests(ltr_directories: list):
+    """Forgets the manifests, and the hashes of the files, of the directories
+    that are no longer LTR directories"""
+    ltr_directories = {ltr_directory.strip("/") for ltr_directory in ltr_directories}
+    with __manifests_lock:
+        for ltr_directory in set(__manifests) - ltr_directories:
+            del __manifests[ltr_directory]
+    prefixes = tuple(f"{ltr_directory}/" for ltr_directory in ltr_directories)
+    with __hashes_lock:
+        for path in [path for path in __hashes if not path.startswith(prefixes)]:
+            del __hashes[path]
+
+
+def build_ltr_manifest(ltr_directory: str, files: list = None) -> str:
+    """Creates the manifest of a directory of the LTR
+
+    Args:
+        ltr_directory (str): directory, in the LTR, of a test or of the
+        metrics collection files
+        files (list, optional): [(path, (size, mtime))] of the files of the
+        directory, if they were already listed
+
+    Returns:
+        str: one "<sha256>  <relative path>" line per file
+    """
+    ltr_directory = ltr_directory.strip("/")
+    ftp_pool = get_ltr_ftp_pool()
+    if files is None:
+        files = __list_ltr_directory(ltr_directory)
+
+    manifest = []
+    for path, version in files:
+        file_hash = __get_file_hash(ftp_pool, path, version)
+        relative_path = path[len(ltr_directory):].lstrip("/")
+        manifest.append(f"{file_hash}  {relative_path}")
+
+    # the hashes of the files removed from the directory are no longer needed
+    paths = {path for path, _ in files}
+    with __hashes_lock:
+        for path in [path for path in __hashes
+                     if path.startswith(f"{ltr_directory}/") and path not in paths]:
+            del __hashes[path]
+
+    logging.info(f"Created the manifest of the LTR directory '{ltr_directory}' "\
+        f"({len(manifest)} files).")
+    return "".join(f"{line}\n" for line in sorted(manifest, key=lambda line: line[66:]))
+
+
+def __list_ltr_directory(ltr_directory):
+    ftp_pool = get_ltr_ftp_pool()
+    if not ftp_pool.is_dir(ltr_directory):
+        raise Exception(f"The LTR directory '{ltr_directory}' does not exist.")
+    return ftp_pool.run(lambda ftp: __list_files(ftp, ltr_directory))
+
+
+def __list_files(ftp, ltr_directory):
+    # Returns [(path, (size, modification time))] of the files in the
+    # directory and its subdirectories. Only SIZE and MDTM are used, so the
+    # directory listings don't have to be parsed
+    ftp.voidcmd("TYPE I")
+    files = []
+    directories = [ltr_directory]
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = ftp.nlst(directory)
+        except ftplib.error_perm:
+            # Some servers reply with an error to empty directories
+            continue
+        for entry in entries:
+            name = entry.rstrip("/").split("/")[-1]
+            if name in (".", ".."):
+                continue
+            path = f"{directory}/{name}"
+            try:
+                size = ftp.size(path)
+            except ftplib.error_perm:
+                # Directories have no size
+                try:
+                    ftp.cwd(path)
+                except ftplib.error_perm:
+                    logging.warning(f"Ignoring the LTR entry '{path}'.")
+                    continue
+                ftp.cwd(ftp.home)
+                directories.append(path)
+                continue
+            mtime = ftp.sendcmd(f"MDTM {path}")[4:].strip()
+            files.append((path, (size, mtime)))
+    return files
+
+
+def __get_file_hash(ftp_pool, path, version):
+    # The hashes are reused while the files' size and modification time do
+    # not change. Since the modification time only has seconds precision,
+    # they are also recomputed once in a while
+    with __hashes_lock:
+        cached_hash = __hashes.get(path)
+    if cached_hash is not None and cached_hash[0] == version \
+            and time.time() - cached_hash[2] < Constants.LTR_MANIFEST_HASH_TTL:
+        return cached_hash[1]
+
+    def operation(ftp):
+        file_hash = hashlib.sha256()
+        ftp.retrbinary(f"RETR {path}", file_hash.update,
+                       blocksize=Constants.LTR_MANIFEST_CHUNK_SIZE)
+        return file_hash.hexdigest()
+    file_hash = ftp_pool.run(operation)
+
+    with __hashes_lock:
+        __hashes[path] = (version, file_hash, time.time())
+    return file_hash
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# @Description: Streaming parser of the Robot Framework outputs (output.xml).
+# The output is parsed incrementally, as it is received, and each element is
+# discarded as soon as it is processed, so the memory used does not depend on
+# the output's size.
+
+from dataclasses import dataclass, field
+import xml.etree.ElementTree as ET
+import datetime as dt
+from typing import Dict, List, Optional
+
+# Robot Framework < 7: starttime="20220601 10:00:00.000" endtime="..."
+ROBOT_TIMESTAMP_FORMAT = "%Y%m%d %H:%M:%S.%f"
+
+
+@dataclass
+class Element_Timing:
+    name: str
+    status: str
+    start_time: Optional[dt.datetime]
+    end_time: Optional[dt.datetime]
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        if self.start_time is None or self.end_time is None:
+            return None
+        return (self.end_time - self.start_time).total_seconds()
+
+
+@dataclass
+class Keyword_Timing:
+    calls: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+@dataclass
+class Robot_Test_Results:
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    start_time: Optional[dt.datetime] = None
+    end_time: Optional[dt.datetime] = None
+    # All the suites and tests, in the order they finished
+    suites: List[Element_Timing] = field(default_factory=list)
+    tests: List[Element_Timing] = field(default_factory=list)
+    # keyword name -> timing of all its calls
+    keywords: Dict[str, Keyword_Timing] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.failed == 0
+
+
+class Robot_Output_Parser:
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        # Elements being parsed, from the root to the current one
+        self.stack = []
+        self.results = Robot_Test_Results()
+        self.statistics_read = False
+
+
+    def feed(self, data: bytes):
+        self.parser.feed(data)
+        self.__process_events()
+
+
+    def close(self) -> Robot_Test_Results:
+        self.parser.close()
+        self.__process_events()
+        if not self.statistics_read or self.results.start_time is None \
+                or self.results.end_time is None:
+            raise ValueError("The output has no statistics or no suite status")
+        return self.results
+
+
+    def __process_events(self):
+        for event, element in self.parser.read_events():
+            if event == "start":
+                self.stack.append(element)
+                continue
+
+            self.stack.pop()
+            parent = self.stack[-1] if self.stack else None
+            if element.tag == "status" and parent is not None:
+                self.__process_status(element, parent)
+            elif element.tag == "stat" and not self.statistics_read \
+                    and parent is not None and parent.tag == "total":
+                # The first statistic of the total is the one of all tests
+                # (or of the critical ones, in Robot Framework < 4)
+                self.results.passed = int(element.get("pass", 0))
+                self.results.failed = int(element.get("fail", 0))
+                self.results.skipped = int(element.get("skip", 0))
+                self.statistics_read = True
+
+            # The processed elements are no longer needed
+            if parent is not None:
+                parent.remove(element)
+
+
+    def __process_status(self, status, parent):
+        start_time, end_time = get_status_times(status)
+        if parent.tag == "kw":
+            name = parent.get("name")
+            if parent.get("library"):
+                name = f"{parent.get('library')}.{name}"
+            timing = self.results.keywords.setdefault(name, Keyword_Timing())
+            seconds = (end_time - start_time).total_seconds() \
+                if start_time and end_time else 0.0
+            timing.calls += 1
+            timing.total_seconds += seconds
+            timing.max_seconds = max(timing.max_seconds, seconds)
+            if status.get("status") == "FAIL":
+                timing.failures += 1
+        elif parent.tag == "test":
+            self.results.tests.append(Element_Timing(
+                parent.get("name"), status.get("status"), start_time, end_time))
+        elif parent.tag == "suite":
+            self.results.suites.append(Element_Timing(
+                parent.get("name"), status.get("status"), start_time, end_time))
+            if len(self.stack) == 2:
+                # Status of the top-level suite (robot > suite > status)
+                self.results.start_time = start_time
+                self.results.end_time = end_time
+
+
+def get_status_times(status):
+    if status.get("starttime") is not None:
+        return __parse_timestamp(status.get("starttime")), \
+            __parse_timestamp(status.get("endtime"))
+    # Robot Framework >= 7: start="2024-01-01T10:00:00.000000" elapsed="1.5"
+    if status.get("start") is None:
+        return None, None
+    start_time = dt.datetime.fromisoformat(status.get("start"))
+    return start_time, start_time + dt.timedelta(
+        seconds=float(status.get("elapsed", 0)))
+
+
+def __parse_timestamp(timestamp):
+    if not timestamp or timestamp == "N/A":
+        return None
+    # Outputs have one timestamp per keyword, and strptime is slow
+    try:
+        return dt.datetime(
+            int(timestamp[0:4]), int(timestamp[4:6]), int(timestamp[6:8]),
+            int(timestamp[9:11]), int(timestamp[12:14]), int(timestamp[15:17]),
+            int(timestamp[18:21] or 0) * 1000
+        )
+    except ValueError:
+        return dt.datetime.strptime(timestamp, ROBOT_TIMESTAMP_FORMAT)
+
+
+def parse_robot_output(output_file, chunk_size: int = 64 * 1024) -> Robot_Test_Results:
+    """Parses a Robot Framework output
+
+    Args:
+        output_file: binary file-like object with the output.xml
+        chunk_size (int): bytes read at a time
+
+    Returns:
+        Robot_Test_Results: tests statistics, suites and tests timings and
+        keywords timings
+    """
+    parser = Robot_Output_Parser()
+    for chunk in iter(lambda: output_file.read(chunk_size), b""):
+        parser.feed(chunk)
+    return parser.close()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# @Description: Collection of the results of the tests performed by a
+# validation pipeline. The Robot Framework outputs of the tests are fetched
+# from the FTP server and parsed concurrently, in worker threads, while they
+# are downloaded.
+
+import asyncio
+import logging
+
+from wrappers.ftp.client_pool import get_results_ftp_pool
+from test_helpers.robot_output import Robot_Output_Parser, Robot_Test_Results
+import aux.constants as Constants
+
+
+def get_test_results(ftp_results_directory: str, test: str) -> Robot_Test_Results:
+    """Fetches and parses the Robot Framework output of a performed test
+
+    Args:
+        ftp_results_directory (str): FTP directory of the test instance's
+        results
+        test (str): performed test
+
+    Returns:
+        Robot_Test_Results: the test's results
+    """
+    # The output is parsed as it is downloaded
+    def operation(ftp):
+        parser = Robot_Output_Parser()
+        ftp.retrbinary(f"RETR {ftp_results_directory}/{test}/output.xml",
+                       parser.feed, blocksize=Constants.ROBOT_OUTPUT_CHUNK_SIZE)
+        return parser.close()
+    return get_results_ftp_pool().run(operation)
+
+
+async def collect_tests_results(ftp_results_directory: str, tests: list) -> dict:
+    """Collects the results of several performed tests, at most
+    RESULTS_COLLECTION_CONCURRENCY at a time
+
+    Returns:
+        dict: performed test -> Robot_Test_Results. The tests
+        whose results could not be collected are left out
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(Constants.RESULTS_COLLECTION_CONCURRENCY)
+
+    async def collect(test):
+        async with semaphore:
+            logging.info(f"Parsing Test Execution Results for test '{test}'...")
+            try:
+                return test, await loop.run_in_executor(
+                    None, get_test_results, ftp_results_directory, test)
+            except Exception as e:
+                logging.error("Impossible to parse the test execution "\
+                    f"results for test '{test}'. Reason: {e}")
+                return test, None
+
+    results = await asyncio.gather(*[collect(test) for test in tests])
+    return {test: result for test, result in results if result is not None}
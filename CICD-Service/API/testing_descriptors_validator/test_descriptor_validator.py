@@ -38,6 +38,7 @@ class Test_Descriptor_Validator:
     def __init__(self, descriptor_content):
         self.descriptor_content = descriptor_content
         self.executed_tests_info = None
+        self.test_executions = None
 
 
     def is_test_description_valid(test_name, test_info, available_tests):
@@ -67,9 +68,20 @@ class Test_Descriptor_Validator:
         try:
             executed_tests_info = []
             executed_tests_descriptor_id = []
+            # batches are executed sequentially. The executions of a batch are
+            # independent from each other
+            test_executions = []
             for execution in self.descriptor_content["test_phases"]["execution"]:
+                batch_executions = []
                 for executions in execution["executions"]:
                     executed_tests_descriptor_id +=  executions["testcase_ids"]
+                    batch_executions.append({
+                        "execution_id": executions["execution_id"],
+                        "name": executions.get("name"),
+                        "testcase_ids": executions["testcase_ids"]
+                    })
+                test_executions.append(batch_executions)
+            self.test_executions = test_executions
             for test_case in self.descriptor_content["test_phases"]["setup"]["testcases"]:
                 if test_case["testcase_id"] in executed_tests_descriptor_id:
                     executed_tests_info.append(test_case)     
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+# @Description: The tests import the API's modules the way the API does, from
+# the API's directory.
+
+# generic imports
+import inspect
+import sys
+import os
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the selection of the CI/CD Agent that runs a test.
+
+# generic imports
+from types import SimpleNamespace
+
+# custom imports
+from wrappers.jenkins.agent_scheduler import Agent_Scheduler
+
+
+def create_agents(*agents_ids):
+    return [SimpleNamespace(id=agent_id) for agent_id in agents_ids]
+
+
+def test_no_agent_is_selected_before_its_health_is_known():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    assert scheduler.select_agent(create_agents(1, 2)) is None
+
+
+def test_offline_agents_are_not_selected():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, False)
+    scheduler.update_agent_health(2, True, 10, busy_executors=4, total_executors=4)
+    assert scheduler.select_agent(create_agents(1, 2)).id == 2
+    scheduler.update_agent_health(2, False)
+    assert scheduler.select_agent(create_agents(1, 2)) is None
+
+
+def test_only_the_given_agents_are_selected():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, total_executors=4)
+    scheduler.update_agent_health(2, True, 10, total_executors=4)
+    assert scheduler.select_agent(create_agents(2)).id == 2
+
+
+def test_the_least_loaded_agent_is_selected():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, busy_executors=2, total_executors=4,
+                                  queued_items=1)
+    scheduler.update_agent_health(2, True, 10, busy_executors=2, total_executors=4)
+    assert scheduler.select_agent(create_agents(1, 2)).id == 2
+
+
+def test_dispatched_builds_spread_the_load():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, busy_executors=1, total_executors=4)
+    scheduler.update_agent_health(2, True, 10, total_executors=4)
+    selected = [scheduler.select_agent(create_agents(1, 2)).id for _ in range(3)]
+    # 2 gets the first build, then both have one running
+    assert selected[0] == 2
+    assert sorted(selected[1:]) == [1, 2]
+    assert scheduler.get_snapshot()[2]["in_flight_builds"] == 2
+
+
+def test_health_checks_keep_the_builds_dispatched_after_them():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, total_executors=4)
+    scheduler.select_agent(create_agents(1))
+    scheduler.select_agent(create_agents(1))
+    assert scheduler.get_snapshot()[1]["running_builds"] == 2
+
+    # The agent already runs the 2 builds, so they aren't counted twice
+    scheduler.update_agent_health(1, True, 10, busy_executors=2, total_executors=4)
+    assert scheduler.get_snapshot()[1]["running_builds"] == 2
+    scheduler.select_agent(create_agents(1))
+    assert scheduler.get_snapshot()[1]["running_builds"] == 3
+
+    # Builds that aren't running yet are counted until the agent reports them
+    scheduler.update_agent_health(1, True, 10, busy_executors=1, total_executors=4)
+    assert scheduler.get_snapshot()[1]["running_builds"] == 1
+    scheduler.select_agent(create_agents(1))
+    assert scheduler.get_snapshot()[1]["running_builds"] == 2
+
+
+def test_finished_builds_free_the_agent():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, total_executors=1)
+    scheduler.select_agent(create_agents(1))
+    scheduler.build_finished(1)
+    scheduler.build_finished(1)
+    snapshot = scheduler.get_snapshot()[1]
+    assert snapshot["running_builds"] == 0
+    assert snapshot["in_flight_builds"] == 0
+
+
+def test_the_weighted_policy_prefers_the_agents_with_free_executors():
+    scheduler = Agent_Scheduler(policy="weighted")
+    scheduler.update_agent_health(1, True, 10, busy_executors=100, total_executors=100)
+    scheduler.update_agent_health(2, True, 10, total_executors=100)
+    selected = [scheduler.select_agent(create_agents(1, 2)).id for _ in range(50)]
+    assert selected.count(2) > selected.count(1)
+
+
+def test_forgotten_agents_are_not_selected():
+    scheduler = Agent_Scheduler(policy="least_loaded")
+    scheduler.update_agent_health(1, True, 10, total_executors=4)
+    scheduler.forget_agent(1)
+    assert scheduler.select_agent(create_agents(1)) is None
+    assert scheduler.get_snapshot() == {}
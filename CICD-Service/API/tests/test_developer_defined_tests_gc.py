@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the garbage collector of the developer defined
+# tests, with an in-memory FTP server and blobs table.
+
+# generic imports
+import datetime as dt
+import ftplib
+import types
+import sys
+import pytest
+
+orm = pytest.importorskip("sqlalchemy.orm")
+
+# sql_app.database connects to the database when it is imported
+database = types.ModuleType("sql_app.database")
+database.Base = orm.declarative_base()
+database.SessionLocal = None
+sys.modules.setdefault("sql_app.database", database)
+
+developer_defined_tests_gc = pytest.importorskip("aux.developer_defined_tests_gc")
+
+# custom imports
+import test_helpers.blob_store as blob_store
+
+GRACE_PERIOD = 3600
+NOW = dt.datetime.utcnow()
+OLD = NOW - dt.timedelta(seconds=2 * GRACE_PERIOD)
+RECENT = NOW - dt.timedelta(seconds=GRACE_PERIOD / 2)
+
+
+class Fake_FTP_Pool:
+
+    def __init__(self):
+        # path -> modification time
+        self.files = {}
+
+
+    def add(self, path, mtime):
+        self.files[path] = mtime
+
+
+    def stat(self, path):
+        if path not in self.files:
+            raise ftplib.error_perm(f"550 {path}: No such file")
+        return 1, self.files[path].strftime("%Y%m%d%H%M%S")
+
+
+    def is_dir(self, path):
+        return any(file_path.startswith(f"{path}/") for file_path in self.files)
+
+
+    def list_dir(self, path):
+        return sorted({
+            file_path[len(path) + 1:].split("/")[0]
+            for file_path in self.files if file_path.startswith(f"{path}/")
+        })
+
+
+    def delete(self, path):
+        if self.files.pop(path, None) is None:
+            raise ftplib.error_perm(f"550 {path}: No such file")
+
+
+class Fake_Blobs_CRUD:
+
+    def __init__(self):
+        # sha256 -> [reference count, time of the last update]
+        self.blobs = {}
+        self.developer_defined_test_filepaths = set()
+        self.recounted = False
+
+
+    def recount_blob_references(self, db):
+        self.recounted = True
+        return 0
+
+
+    def get_blobs(self, db):
+        return [types.SimpleNamespace(sha256=sha256) for sha256 in self.blobs]
+
+
+    def get_unreferenced_blobs(self, db, updated_before):
+        return [
+            types.SimpleNamespace(sha256=sha256)
+            for sha256, (ref_count, updated_at) in self.blobs.items()
+            if ref_count == 0 and updated_at < updated_before
+        ]
+
+
+    def delete_unreferenced_blob(self, db, sha256, updated_before):
+        ref_count, updated_at = self.blobs[sha256]
+        if ref_count != 0 or updated_at >= updated_before:
+            return False
+        del self.blobs[sha256]
+        return True
+
+
+    def get_developer_defined_test_filepaths(self, db):
+        return self.developer_defined_test_filepaths
+
+
+@pytest.fixture
+def ftp_pool(monkeypatch):
+    ftp_pool = Fake_FTP_Pool()
+    monkeypatch.setattr(developer_defined_tests_gc, "get_results_ftp_pool",
+                        lambda: ftp_pool)
+    return ftp_pool
+
+
+@pytest.fixture
+def blobs_crud(monkeypatch):
+    blobs_crud = Fake_Blobs_CRUD()
+    monkeypatch.setattr(developer_defined_tests_gc, "CRUD_Blobs", blobs_crud)
+    return blobs_crud
+
+
+def add_blob(ftp_pool, blobs_crud, sha256, ref_count, updated_at, mtime):
+    ftp_pool.add(blob_store.get_blob_path(sha256), mtime)
+    if ref_count is not None:
+        blobs_crud.blobs[sha256] = [ref_count, updated_at]
+
+
+def collect_garbage(dry_run=False):
+    return developer_defined_tests_gc.collect_garbage(None, GRACE_PERIOD, dry_run)
+
+
+def test_unreferenced_blobs_are_removed(ftp_pool, blobs_crud):
+    add_blob(ftp_pool, blobs_crud, "a" * 64, 0, OLD, OLD)
+    add_blob(ftp_pool, blobs_crud, "b" * 64, 1, OLD, OLD)
+
+    removed = collect_garbage()
+
+    assert removed["blobs"] == 1
+    assert blobs_crud.recounted
+    assert list(blobs_crud.blobs) == ["b" * 64]
+    assert list(ftp_pool.files) == [blob_store.get_blob_path("b" * 64)]
+
+
+def test_blobs_changed_in_the_grace_period_are_kept(ftp_pool, blobs_crud):
+    # Stored again, or its file replaced, recently
+    add_blob(ftp_pool, blobs_crud, "a" * 64, 0, RECENT, OLD)
+    add_blob(ftp_pool, blobs_crud, "b" * 64, 0, OLD, RECENT)
+
+    removed = collect_garbage()
+
+    assert removed["blobs"] == 0
+    assert len(blobs_crud.blobs) == 2
+    assert len(ftp_pool.files) == 2
+
+
+def test_orphan_blobs_are_removed(ftp_pool, blobs_crud):
+    add_blob(ftp_pool, blobs_crud, "a" * 64, None, None, OLD)
+    add_blob(ftp_pool, blobs_crud, "b" * 64, None, None, RECENT)
+
+    removed = collect_garbage()
+
+    assert removed["orphan_blobs"] == 1
+    assert list(ftp_pool.files) == [blob_store.get_blob_path("b" * 64)]
+
+
+def test_interrupted_uploads_are_removed(ftp_pool, blobs_crud):
+    uploads_directory = blob_store.get_uploads_directory()
+    ftp_pool.add(f"{uploads_directory}/old.part", OLD)
+    ftp_pool.add(f"{uploads_directory}/new.part", RECENT)
+
+    removed = collect_garbage()
+
+    assert removed["uploads"] == 1
+    assert list(ftp_pool.files) == [f"{uploads_directory}/new.part"]
+
+
+def test_unreferenced_legacy_tests_are_removed(ftp_pool, blobs_crud):
+    base_directory = developer_defined_tests_gc.Constants.DEVELOPER_DEFINED_TEST_BASE_FTP_DIR
+    for name in ("n1-t.tar.gz", "n1-t.tar.gz.sha256", "n2-t.tar.gz",
+                 "n2-t.tar.gz.sha256", "n3-t.tar.gz.part", "notes.txt"):
+        ftp_pool.add(f"{base_directory}/{name}", OLD)
+    blobs_crud.developer_defined_test_filepaths = {f"{base_directory}/n2-t.tar.gz"}
+
+    removed = collect_garbage()
+
+    assert removed["legacy_tests"] == 3
+    assert sorted(ftp_pool.files) == [
+        f"{base_directory}/{name}"
+        for name in ("n2-t.tar.gz", "n2-t.tar.gz.sha256", "notes.txt")
+    ]
+
+
+def test_dry_runs_remove_nothing(ftp_pool, blobs_crud):
+    add_blob(ftp_pool, blobs_crud, "a" * 64, 0, OLD, OLD)
+    add_blob(ftp_pool, blobs_crud, "b" * 64, None, None, OLD)
+    ftp_pool.add(f"{blob_store.get_uploads_directory()}/old.part", OLD)
+
+    removed = collect_garbage(dry_run=True)
+
+    assert removed == {"blobs": 1, "orphan_blobs": 1, "uploads": 1,
+                       "legacy_tests": 0, "fixed_reference_counts": 0}
+    assert not blobs_crud.recounted
+    assert len(blobs_crud.blobs) == 1
+    assert len(ftp_pool.files) == 3
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the rendering of the Jenkins job configurations.
+
+# generic imports
+import xml.etree.ElementTree as ET
+import pytest
+
+# custom imports
+from wrappers.jenkins.pipeline_template import Pipeline_Template
+
+JOB_CONFIG_XML = "<flow-definition><definition><script>"\
+    "add_pipeline_configuration_here</script></definition></flow-definition>"
+
+PIPELINE_SCRIPT = """pipeline {
+    stages {
+        stage('Tests') {
+            steps {
+                <perform_tests>
+            }
+        }
+    }
+    environment { test_id = "<test_id>" }
+}"""
+
+
+def get_script(job_config_xml):
+    return ET.fromstring(job_config_xml).find("definition/script").text
+
+
+def test_slots_are_filled():
+    template = Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML)
+    script = get_script(template.render({
+        "perform_tests": "sh 'robot .'",
+        "test_id": 7
+    }))
+    assert script == PIPELINE_SCRIPT\
+        .replace("<perform_tests>", "sh 'robot .'")\
+        .replace("<test_id>", "7")
+
+
+def test_lines_are_indented_as_their_slot():
+    template = Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML)
+    script = get_script(template.render({
+        "perform_tests": ["sh 'cd tests'", "sh 'robot .'"],
+        "test_id": 7
+    }))
+    assert "                sh 'cd tests'\n                sh 'robot .'\n" in script
+
+
+def test_the_script_and_the_values_are_escaped():
+    template = Pipeline_Template(
+        'if (a < b && c > d) { <perform_tests> }', JOB_CONFIG_XML)
+    job_config_xml = template.render({"perform_tests": "echo '<b>' & \"x\""})
+    assert "'&lt;b&gt;' &amp;" in job_config_xml
+    assert get_script(job_config_xml) == \
+        "if (a < b && c > d) { echo '<b>' & \"x\" }"
+
+
+def test_the_job_xml_is_not_escaped():
+    template = Pipeline_Template("<perform_tests>", JOB_CONFIG_XML)
+    job_config_xml = template.render({"perform_tests": "a"})
+    assert job_config_xml == JOB_CONFIG_XML.replace(
+        "add_pipeline_configuration_here", "a")
+
+
+def test_every_slot_needs_a_value():
+    template = Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML)
+    with pytest.raises(ValueError, match="perform_tests"):
+        template.render({"test_id": 7})
+
+
+def test_the_version_changes_with_the_templates():
+    version = Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML).version
+    assert Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML).version == version
+    assert Pipeline_Template(PIPELINE_SCRIPT + " ", JOB_CONFIG_XML).version != version
+    assert Pipeline_Template(PIPELINE_SCRIPT, JOB_CONFIG_XML + " ").version != version
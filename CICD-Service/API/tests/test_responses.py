@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the byte ranges and conditional requests of the file
+# responses.
+
+# generic imports
+import asyncio
+import gzip
+import io
+import pytest
+
+pytest.importorskip("fastapi")
+
+# custom imports
+from wrappers.ftp.responses import get_etag, parse_range, accepts_gzip, \
+    create_local_file_response, create_ftp_gunzip_response
+
+CONTENT = bytes(range(256)) * 4
+MTIME = "20220601100000"
+
+
+class Fake_Request:
+
+    def __init__(self, headers=None, disconnect_after=None):
+        self.headers = headers or {}
+        # Number of chunks sent before the client disconnects
+        self.disconnect_after = disconnect_after
+        self.checks = 0
+
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after is not None \
+            and self.checks > self.disconnect_after
+
+
+def read_body(response):
+    async def read():
+        return [chunk async for chunk in response.body_iterator]
+    return b"".join(asyncio.run(read()))
+
+
+def create_response(headers=None):
+    local_file = io.BytesIO(CONTENT)
+    response = create_local_file_response(
+        Fake_Request(headers), local_file, len(CONTENT), MTIME, "text/plain")
+    return response, local_file
+
+
+@pytest.mark.parametrize("range_header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    # Reversed, multiple or invalid ranges are answered with the whole file
+    ("bytes=99-0", None),
+    ("bytes=0-1,5-6", None),
+    ("bytes=-", None),
+    ("items=0-1", None),
+    # Ranges past the end of the file can't be satisfied
+    ("bytes=1024-", False),
+    ("bytes=5000-6000", False),
+])
+def test_parse_range(range_header, expected):
+    assert parse_range(range_header, len(CONTENT)) == expected
+
+
+def test_empty_files_have_no_ranges():
+    assert parse_range("bytes=-10", 0) is False
+    assert parse_range("bytes=0-", 0) is False
+
+
+def test_etag():
+    assert get_etag(1024, MTIME) == f'"400-{MTIME}"'
+    assert get_etag(1024, "20220601100001") != get_etag(1024, MTIME)
+    # Servers without MDTM give no modification time
+    assert get_etag(1024, None) is None
+
+
+def test_whole_file():
+    response, _ = create_response()
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["etag"] == get_etag(len(CONTENT), MTIME)
+    assert response.headers["accept-ranges"] == "bytes"
+    assert read_body(response) == CONTENT
+
+
+def test_byte_range():
+    response, _ = create_response({"range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response.headers["content-length"] == "10"
+    assert read_body(response) == CONTENT[10:20]
+
+
+def test_unsatisfiable_range():
+    response, local_file = create_response({"range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    assert local_file.closed
+
+
+@pytest.mark.parametrize("if_none_match", [
+    get_etag(len(CONTENT), MTIME),
+    f'"other", W/{get_etag(len(CONTENT), MTIME)}',
+    "*",
+])
+def test_not_modified(if_none_match):
+    response, local_file = create_response({"if-none-match": if_none_match})
+    assert response.status_code == 304
+    assert local_file.closed
+
+
+def test_modified():
+    response, _ = create_response({"if-none-match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_if_range():
+    etag = get_etag(len(CONTENT), MTIME)
+    response, _ = create_response({"range": "bytes=10-19", "if-range": etag})
+    assert response.status_code == 206
+    # The file changed since the client got the first part of it
+    response, _ = create_response({"range": "bytes=10-19", "if-range": '"other"'})
+    assert response.status_code == 200
+    assert read_body(response) == CONTENT
+
+
+def test_the_file_is_closed_when_the_client_disconnects():
+    local_file = io.BytesIO(CONTENT * 1024)
+    response = create_local_file_response(
+        Fake_Request(disconnect_after=1), local_file, len(CONTENT) * 1024, MTIME,
+        "text/plain")
+    assert 0 < len(read_body(response)) < len(CONTENT) * 1024
+    assert local_file.closed
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, False),
+    ("gzip", True),
+    ("deflate, GZIP;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("identity", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    headers = {"accept-encoding": accept_encoding} if accept_encoding else {}
+    assert accepts_gzip(Fake_Request(headers)) is expected
+
+
+class Fake_FTP_Pool:
+
+    def __init__(self, content):
+        self.content = content
+        self.closed = False
+
+
+    def stat(self, path):
+        return len(self.content), MTIME
+
+
+    def iter_file(self, path):
+        try:
+            for first in range(0, len(self.content), 100):
+                yield self.content[first:first + 100]
+        finally:
+            self.closed = True
+
+
+def test_gzipped_files_are_decompressed():
+    ftp_pool = Fake_FTP_Pool(gzip.compress(CONTENT * 16))
+    response = asyncio.run(create_ftp_gunzip_response(
+        Fake_Request({"range": "bytes=0-9"}), ftp_pool, "log.gz", "text/plain"))
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert read_body(response) == CONTENT * 16
+    assert ftp_pool.closed
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the streaming parser of the Robot Framework outputs.
+
+# generic imports
+import datetime as dt
+import io
+import pytest
+
+# custom imports
+from test_helpers.robot_output import Robot_Output_Parser, parse_robot_output
+
+OUTPUT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<robot generator="Robot 6.0.2">
+<suite id="s1" name="Tests">
+<suite id="s1-s1" name="Ping">
+<test id="s1-s1-t1" name="Ping Host">
+<kw name="Run Process" library="Process">
+<status status="PASS" starttime="20220601 10:00:00.000" endtime="20220601 10:00:01.500"/>
+</kw>
+<kw name="Run Process" library="Process">
+<status status="FAIL" starttime="20220601 10:00:01.500" endtime="20220601 10:00:02.000"/>
+</kw>
+<status status="FAIL" starttime="20220601 10:00:00.000" endtime="20220601 10:00:02.000"/>
+</test>
+<test id="s1-s1-t2" name="Skipped">
+<status status="SKIP" starttime="N/A" endtime="N/A"/>
+</test>
+<status status="FAIL" starttime="20220601 10:00:00.000" endtime="20220601 10:00:02.000"/>
+</suite>
+<status status="FAIL" starttime="20220601 09:59:59.000" endtime="20220601 10:00:03.000"/>
+</suite>
+<statistics>
+<total><stat pass="0" fail="1" skip="1">All Tests</stat></total>
+<suite><stat pass="0" fail="1" skip="1" id="s1" name="Tests">Tests</stat></suite>
+</statistics>
+<errors/>
+</robot>
+"""
+
+# Robot Framework >= 7
+OUTPUT_V7 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<robot generator="Robot 7.0">
+<suite id="s1" name="Tests">
+<test id="s1-t1" name="Test">
+<kw name="Log" owner="BuiltIn">
+<status status="PASS" start="2024-01-01T10:00:00.000000" elapsed="0.250"/>
+</kw>
+<status status="PASS" start="2024-01-01T10:00:00.000000" elapsed="1.5"/>
+</test>
+<status status="PASS" start="2024-01-01T10:00:00.000000" elapsed="2"/>
+</suite>
+<statistics><total><stat pass="1" fail="0" skip="0">All Tests</stat></total></statistics>
+</robot>
+"""
+
+
+def test_statistics_and_suite_times():
+    results = parse_robot_output(io.BytesIO(OUTPUT))
+    assert (results.passed, results.failed, results.skipped) == (0, 1, 1)
+    assert not results.success
+    assert results.start_time == dt.datetime(2022, 6, 1, 9, 59, 59)
+    assert results.end_time == dt.datetime(2022, 6, 1, 10, 0, 3)
+
+
+def test_suites_and_tests_timings():
+    results = parse_robot_output(io.BytesIO(OUTPUT))
+    assert [(suite.name, suite.status) for suite in results.suites] == \
+        [("Ping", "FAIL"), ("Tests", "FAIL")]
+    ping_host, skipped = results.tests
+    assert (ping_host.name, ping_host.status, ping_host.duration_seconds) == \
+        ("Ping Host", "FAIL", 2.0)
+    assert (skipped.name, skipped.status, skipped.duration_seconds) == \
+        ("Skipped", "SKIP", None)
+
+
+def test_keywords_timings():
+    timing = parse_robot_output(io.BytesIO(OUTPUT)).keywords["Process.Run Process"]
+    assert (timing.calls, timing.failures) == (2, 1)
+    assert timing.total_seconds == pytest.approx(2.0)
+    assert timing.max_seconds == pytest.approx(1.5)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_the_output_may_be_fed_in_any_chunks(chunk_size):
+    results = parse_robot_output(io.BytesIO(OUTPUT), chunk_size)
+    assert (results.passed, results.failed, len(results.tests)) == (0, 1, 2)
+
+
+def test_robot_framework_7_outputs():
+    results = parse_robot_output(io.BytesIO(OUTPUT_V7))
+    assert results.success
+    assert results.start_time == dt.datetime(2024, 1, 1, 10, 0, 0)
+    assert results.end_time == dt.datetime(2024, 1, 1, 10, 0, 2)
+    assert results.tests[0].duration_seconds == 1.5
+    assert results.keywords["Log"].total_seconds == pytest.approx(0.25)
+
+
+def test_outputs_without_statistics_are_rejected():
+    parser = Robot_Output_Parser()
+    parser.feed(OUTPUT[:OUTPUT.index(b"<statistics>")] + b"</robot>")
+    with pytest.raises(ValueError):
+        parser.close()
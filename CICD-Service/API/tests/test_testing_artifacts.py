@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the registration of the testing artifacts of a test
+# instance, in the unit of work of its submission.
+
+# generic imports
+import types
+import sys
+import pytest
+
+orm = pytest.importorskip("sqlalchemy.orm")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+# sql_app.database connects to the database when it is imported
+database = types.ModuleType("sql_app.database")
+database.Base = orm.declarative_base()
+database.SessionLocal = None
+sys.modules.setdefault("sql_app.database", database)
+
+# custom imports
+from sql_app import crud, models
+
+
+@pytest.fixture
+def db():
+    engine = sqlalchemy.create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = orm.sessionmaker(bind=engine)()
+    db.add(models.Testbed(id="testbed", name="testbed", description=""))
+    db.commit()
+    yield db
+    db.close()
+
+
+def submit_test(db, testing_artifacts_location):
+    # Same steps as routers.tests.new_test. The build numbers are allocated
+    # with a PostgreSQL upsert, so the test instance is created here
+    uow = crud.Unit_Of_Work(db)
+    test_instance = uow.add(models.Test_Instance(
+        netapp_id="netapp", network_service_id="network_service", build=1,
+        testbed_id="testbed", access_token="token"))
+    uow.flush()
+    crud.create_testing_artifact(
+        db, test_instance.id, testing_artifacts_location, uow=uow)
+    uow.commit()
+    return test_instance
+
+
+def test_the_testing_artifacts_are_registered(db):
+    test_instance = submit_test(db, "artifacts/1")
+    testing_artifact = db.query(models.Testing_Artifact).one()
+    assert testing_artifact.test_instance_id == test_instance.id
+    assert testing_artifact.ftp_base_path == "artifacts/1"
+
+
+def test_tests_without_testing_artifacts_register_none(db):
+    # The tests submitted to /tests/new have no testing artifacts. A row
+    # without a location violates the schema, and would roll back the whole
+    # submission, so new_test doesn't register it
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        submit_test(db, None)
+    db.rollback()
+    assert db.query(models.Test_Instance).count() == 0
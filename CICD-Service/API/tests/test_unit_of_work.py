@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# @Description: Tests of the unit of work over a database session.
+
+# generic imports
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+# custom imports
+from sql_app.unit_of_work import Unit_Of_Work
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+def count_rows(db):
+    return db.query(Row).count()
+
+
+def test_rows_are_inserted_on_commit(db):
+    uow = Unit_Of_Work(db)
+    row = uow.add(Row(name="a"))
+    uow.add(Row(name="b"))
+    assert row.id is None
+    assert count_rows(db) == 0
+
+    uow.commit()
+    assert row.id is not None
+    assert uow.pending == []
+    db.rollback()
+    assert count_rows(db) == 2
+
+
+def test_flush_gives_the_ids_without_committing(db):
+    uow = Unit_Of_Work(db)
+    row = uow.add(Row(name="a"))
+    uow.flush()
+    assert row.id is not None
+    db.rollback()
+    assert count_rows(db) == 0
+
+
+def test_rollback_discards_the_pending_rows(db):
+    uow = Unit_Of_Work(db)
+    uow.add(Row(name="a"))
+    uow.rollback()
+    uow.commit()
+    assert count_rows(db) == 0
+
+
+def test_context_manager_commits(db):
+    with Unit_Of_Work(db) as uow:
+        uow.add(Row(name="a"))
+    db.rollback()
+    assert count_rows(db) == 1
+
+
+def test_context_manager_rolls_back_on_errors(db):
+    with pytest.raises(RuntimeError):
+        with Unit_Of_Work(db) as uow:
+            uow.add(Row(name="a"))
+            uow.flush()
+            uow.add(Row(name="b"))
+            raise RuntimeError("failed")
+    assert count_rows(db) == 0
+
+
+def test_failed_commits_insert_nothing(db):
+    uow = Unit_Of_Work(db)
+    uow.add(Row(name="a"))
+    uow.add(Row(name=None))
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        uow.commit()
+    uow.rollback()
+    assert count_rows(db) == 0
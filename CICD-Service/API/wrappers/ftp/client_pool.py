@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+# @Description: Bounded pools of authenticated FTP control connections, one
+# per FTP server (results and LTR). Avoids a new connection and login each
+# time the CI/CD Manager reads or writes a file. Idle connections are checked
+# (NOOP) before being reused, broken ones are replaced and the operations
+# that fail because of a broken connection are retried once.
+
+# generic imports
+import contextlib
+import threading
+import logging
+import ftplib
+import zlib
+import time
+import io
+
+# custom imports
+import aux.constants as Constants
+
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+# Errors after which a connection can no longer be trusted. Permanent errors
+# (5xx replies, e.g. a missing file) leave the connection usable
+CONNECTION_ERRORS = (OSError, EOFError, ftplib.error_temp, ftplib.error_reply,
+                     ftplib.error_proto)
+
+
+class FTP_Pool_Error(Exception):
+    pass
+
+
+class Stream_Reader(io.RawIOBase):
+    # Read-only file over an iterable of bytes chunks, optionally gzipped on
+    # the fly, so a stream can be uploaded without being held in memory
+
+    def __init__(self, chunks, compress=False):
+        self.chunks = iter(chunks)
+        self.buffer = b""
+        self.compressor = zlib.compressobj(wbits=31) if compress else None
+
+
+    def readable(self):
+        return True
+
+
+    def read(self, size=-1):
+        while self.chunks is not None and (size < 0 or len(self.buffer) < size):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.chunks = None
+                if self.compressor is not None:
+                    self.buffer += self.compressor.flush()
+            elif self.compressor is not None:
+                self.buffer += self.compressor.compress(chunk)
+            else:
+                self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class Pooled_FTP(ftplib.FTP):
+
+    def __init__(self, host, port, username, password, timeout):
+        super().__init__(timeout=timeout)
+        self.connect(host, port)
+        self.login(username, password)
+        # Pooled connections are always returned in their home directory, so
+        # relative paths mean the same for every borrower
+        self.home = self.pwd()
+        self.last_used = time.monotonic()
+        # Set to False by borrowers that left the connection in an unknown
+        # state (e.g. an aborted transfer)
+        self.reusable = True
+
+
+class FTP_Client_Pool:
+
+    def __init__(self, url, username, password,
+                 max_size=Constants.FTP_POOL_MAX_SIZE,
+                 timeout=Constants.FTP_TIMEOUT):
+        host, _, port = url.partition(":")
+        self.host = host
+        self.port = int(port) if port else 21
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_size = max_size
+        # Idle connections, the most recently used at the end
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+
+    def __acquire(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise FTP_Pool_Error(f"No FTP connection to {self.host} became "\
+                f"available in {self.timeout} seconds")
+        try:
+            while True:
+                with self.lock:
+                    if not self.idle:
+                        self.misses += 1
+                        break
+                    ftp = self.idle.pop()
+                idle_time = time.monotonic() - ftp.last_used
+                if idle_time > Constants.FTP_POOL_MAX_IDLE_TIME:
+                    # The server has probably closed it already
+                    self.__discard(ftp)
+                    continue
+                if idle_time > Constants.FTP_POOL_HEALTH_CHECK_AFTER:
+                    try:
+                        ftp.voidcmd("NOOP")
+                    except ftplib.all_errors:
+                        self.__discard(ftp)
+                        continue
+                with self.lock:
+                    self.hits += 1
+                return ftp
+            return Pooled_FTP(self.host, self.port, self.username,
+                              self.password, self.timeout)
+        except BaseException:
+            self.slots.release()
+            raise
+
+
+    def __release(self, ftp, reusable):
+        try:
+            if not reusable:
+                self.__discard(ftp)
+                return
+            ftp.last_used = time.monotonic()
+            with self.lock:
+                self.idle.append(ftp)
+        finally:
+            self.slots.release()
+
+
+    def __discard(self, ftp):
+        with self.lock:
+            self.discarded += 1
+        try:
+            ftp.close()
+        except Exception:
+            pass
+
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Borrows a connection from the pool. The borrower must leave it in
+        its home directory (ftp.home)
+
+        Args:
+            timeout (int, optional): max. time (in seconds) each operation
+            may take. Defaults to the pool's timeout.
+        """
+        ftp = self.__acquire()
+        reusable = False
+        try:
+            ftp.timeout = timeout or self.timeout
+            ftp.sock.settimeout(ftp.timeout)
+            yield ftp
+            reusable = True
+        except ftplib.error_perm:
+            reusable = True
+            raise
+        finally:
+            self.__release(ftp, reusable and ftp.reusable)
+
+
+    def run(self, operation, timeout=None):
+        """Runs operation(ftp) on a pooled connection. If the connection is
+        broken, runs it again, once, on a new connection
+
+        Returns:
+            the value returned by the operation
+        """
+        for attempt in range(2):
+            try:
+                with self.connection(timeout) as ftp:
+                    return operation(ftp)
+            except CONNECTION_ERRORS as e:
+                if attempt:
+                    raise
+                logging.warning(f"FTP connection to {self.host} failed "\
+                    f"({e!r}). Retrying on a new connection...")
+
+
+    def read(self, path, timeout=None) -> bytes:
+        def operation(ftp):
+            content = io.BytesIO()
+            ftp.retrbinary(f"RETR {path}", content.write)
+            return content.getvalue()
+        return self.run(operation, timeout)
+
+
+    def stat(self, path, timeout=None):
+        """Returns the size and the modification time (YYYYMMDDHHMMSS, or
+        None if the server does not support MDTM) of a file"""
+        def operation(ftp):
+            ftp.voidcmd("TYPE I")
+            size = ftp.size(path)
+            try:
+                mtime = ftp.sendcmd(f"MDTM {path}")[4:].strip()
+            except ftplib.error_perm:
+                mtime = None
+            return size, mtime
+        return self.run(operation, timeout)
+
+
+    def iter_file(self, path, start=0, length=None,
+                  blocksize=Constants.FTP_STREAM_CHUNK_SIZE, timeout=None):
+        """Yields the content of a file, in chunks, from the byte start on.
+        Reads at most length bytes, if given
+
+        The transfer is not retried, since part of it may have been consumed.
+        The connection is held until the generator is exhausted or closed
+        """
+        with self.connection(timeout) as ftp:
+            ftp.voidcmd("TYPE I")
+            data_connection = ftp.transfercmd(f"RETR {path}", rest=start or None)
+            complete = False
+            try:
+                while length is None or length > 0:
+                    chunk = data_connection.recv(
+                        blocksize if length is None else min(blocksize, length))
+                    if not chunk:
+                        complete = True
+                        break
+                    if length is not None:
+                        length -= len(chunk)
+                    yield chunk
+                else:
+                    # The requested bytes were read. Check if the file ended
+                    # too, otherwise the transfer has to be aborted
+                    complete = not data_connection.recv(1)
+            finally:
+                data_connection.close()
+                if complete:
+                    ftp.voidresp()
+                else:
+                    ftp.reusable = False
+
+
+    def upload(self, path, file, timeout=None) -> str:
+        def operation(ftp):
+            # A retry has to upload the file from its beginning
+            file.seek(0)
+            return ftp.storbinary(f"STOR {path}", file)
+        return self.run(operation, timeout)
+
+
+    def upload_stream(self, path, open_stream, compress=False,
+                      blocksize=Constants.FTP_STREAM_CHUNK_SIZE, timeout=None) -> str:
+        """Uploads a stream of bytes chunks
+
+        Args:
+            open_stream (callable): returns a new iterable of the chunks. It
+            is called again if the upload has to be retried
+            compress (bool): gzip the stream while uploading it
+        """
+        def operation(ftp):
+            return ftp.storbinary(
+                f"STOR {path}", Stream_Reader(open_stream(), compress), blocksize)
+        return self.run(operation, timeout)
+
+
+    def delete(self, path):
+        return self.run(lambda ftp: ftp.delete(path))
+
+
+    def rename(self, from_path, to_path):
+        return self.run(lambda ftp: ftp.rename(from_path, to_path))
+
+
+    def list_dir(self, path=""):
+        # Some servers reply with the paths (dir/file), others with the names
+        return self.run(lambda ftp: [
+            entry.rstrip("/").split("/")[-1]
+            for entry in ftp.nlst(path)
+        ])
+
+
+    def is_dir(self, path) -> bool:
+        def operation(ftp):
+            try:
+                ftp.cwd(path)
+            except ftplib.error_perm:
+                return False
+            ftp.cwd(ftp.home)
+            return True
+        return self.run(operation)
+
+
+    def makedirs(self, path) -> bool:
+        """Creates a directory and its missing parents
+
+        Returns:
+            bool: True if any directory was created
+        """
+        def operation(ftp):
+            created = False
+            parts = path.split("/")
+            for i in range(1, len(parts) + 1):
+                directory = "/".join(parts[:i])
+                if not directory.strip("/"):
+                    continue
+                try:
+                    ftp.mkd(directory)
+                    created = True
+                except ftplib.error_perm:
+                    # The directory already exists, or it can't be created,
+                    # which the next step, or the caller, will find out
+                    pass
+            return created
+        created = self.run(operation)
+        if not created and not self.is_dir(path):
+            raise FTP_Pool_Error(f"Could not create the FTP directory '{path}'")
+        return created
+
+
+    def stats(self):
+        with self.lock:
+            return {
+                "max_size": self.max_size,
+                "idle": len(self.idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "discarded": self.discarded
+            }
+
+
+__pools = {}
+__pools_lock = threading.Lock()
+
+
+def __get_pool(name, url, username, password):
+    with __pools_lock:
+        pool = __pools.get(name)
+        if pool is None or (pool.host, pool.username, pool.password) != \
+                (url.partition(":")[0], username, password):
+            pool = FTP_Client_Pool(url, username, password)
+            __pools[name] = pool
+        return pool
+
+
+def get_results_ftp_pool() -> FTP_Client_Pool:
+    # The configuration is only loaded at startup, so the pools are created
+    # on their first use
+    return __get_pool("results", Constants.FTP_RESULTS_URL,
+                      Constants.FTP_RESULTS_USER, Constants.FTP_RESULTS_PASSWORD)
+
+
+def get_ltr_ftp_pool() -> FTP_Client_Pool:
+    return __get_pool("ltr", Constants.FTP_LTR_URL,
+                      Constants.FTP_LTR_USER, Constants.FTP_LTR_PASSWORD)
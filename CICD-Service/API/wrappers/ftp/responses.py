@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# @Description: HTTP responses that stream files stored in an FTP server, or
+# cached locally, chunk by chunk, instead of reading them fully into memory.
+# Single byte ranges (Range / If-Range) and conditional requests
+# (If-None-Match) are supported, so clients can resume downloads and follow
+# growing files. Gzipped files may also be decompressed on the fly, for the
+# clients that don't accept gzip.
+
+# generic imports
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+import zlib
+import re
+
+# custom imports
+import aux.constants as Constants
+
+# Range: bytes=<first>-<last>, bytes=<first>- or bytes=-<suffix length>
+RANGE_REGEX = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_etag(size, mtime):
+    if mtime is None:
+        return None
+    return f'"{size:x}-{mtime}"'
+
+
+def accepts_gzip(request):
+    """Whether the client accepts gzipped bodies, according to its
+    Accept-Encoding header"""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, parameters = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "x-gzip", "*"):
+            continue
+        quality = parameters.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def parse_range(range_header, size):
+    """Parses a single byte range
+
+    Returns:
+        tuple: (first byte, last byte), None if the whole file was requested,
+        or False if the range can't be satisfied
+    """
+    match = RANGE_REGEX.match(range_header.strip()) if range_header else None
+    if match is None or match.groups() == ("", ""):
+        # Multiple ranges, or invalid ones, are answered with the whole file
+        return None
+    first, last = match.groups()
+    if first == "":
+        # The last bytes of the file
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first = int(first)
+        if last and int(last) < first:
+            return None
+        last = min(int(last), size - 1) if last else size - 1
+    if first > last or first >= size:
+        return False
+    return first, last
+
+
+async def create_ftp_file_response(request, ftp_pool, path, media_type,
+                                   headers=None):
+    """Creates a response that streams a file from an FTP server
+
+    Args:
+        request (Request): the request, for its Range, If-Range and
+        If-None-Match headers
+        ftp_pool (FTP_Client_Pool): pool of the FTP server with the file
+        path (str): path of the file in the FTP server
+        media_type (str): media type of the file
+        headers (dict, optional): additional response headers
+    """
+    size, mtime = await run_in_threadpool(ftp_pool.stat, path)
+    # The file may grow while it is sent (e.g. a console log), so only the
+    # requested bytes are read
+    return __create_file_response(
+        request, size, mtime,
+        lambda first, length: ftp_pool.iter_file(path, first, length),
+        media_type, headers)
+
+
+async def create_ftp_gunzip_response(request, ftp_pool, path, media_type,
+                                     headers=None):
+    """Creates a response that streams a gzipped file from an FTP server,
+    decompressing it. Since the size of the decompressed file is unknown,
+    byte ranges are not supported
+
+    Args:
+        request (Request): the request, to know when the client disconnects
+        ftp_pool (FTP_Client_Pool): pool of the FTP server with the file
+        path (str): path of the gzipped file in the FTP server
+        media_type (str): media type of the decompressed file
+        headers (dict, optional): additional response headers
+    """
+    def iter_file(chunks):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+            data = decompressor.flush()
+            if data:
+                yield data
+        finally:
+            chunks.close()
+
+    # Fails before the response starts if the file doesn't exist
+    await run_in_threadpool(ftp_pool.stat, path)
+    headers = {**(headers or {}), "Accept-Ranges": "none"}
+    return StreamingResponse(
+        __stream(request, iter_file(ftp_pool.iter_file(path))),
+        media_type=media_type, headers=headers)
+
+
+def create_local_file_response(request, local_file, size, mtime, media_type,
+                               headers=None):
+    """Creates a response that streams an open local file, and closes it
+
+    Args:
+        request (Request): the request, for its Range, If-Range and
+        If-None-Match headers
+        local_file (file): file opened in binary mode
+        size (int): size of the file
+        mtime (str): modification time of the file, for its ETag
+        media_type (str): media type of the file
+        headers (dict, optional): additional response headers
+    """
+    def iter_file(first, length):
+        local_file.seek(first)
+        while length > 0:
+            chunk = local_file.read(min(length, Constants.FTP_STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+    response = __create_file_response(request, size, mtime, iter_file,
+                                      media_type, headers, local_file.close)
+    if not isinstance(response, StreamingResponse):
+        local_file.close()
+    return response
+
+
+def __create_file_response(request, size, mtime, iter_file, media_type,
+                           headers, on_close=None):
+    etag = get_etag(size, mtime)
+
+    headers = {**(headers or {}), "Accept-Ranges": "bytes"}
+    if etag is not None:
+        headers["ETag"] = etag
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [
+                tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+
+    byte_range = parse_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if byte_range and if_range is not None and if_range.strip() != etag:
+        # The file changed since the client got the first part of it
+        byte_range = None
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(__stream(request, iter_file(0, size), on_close),
+                                 media_type=media_type, headers=headers)
+
+    first, last = byte_range
+    headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    headers["Content-Length"] = str(last - first + 1)
+    return StreamingResponse(
+        __stream(request, iter_file(first, last - first + 1), on_close),
+        status_code=206, media_type=media_type, headers=headers)
+
+
+async def __stream(request, chunks, on_close=None):
+    # The chunks are read in the threadpool. The iterator holds an FTP
+    # connection of the pool, or a file, so it is closed as soon as the
+    # client disconnects, instead of when it is garbage collected
+    try:
+        while not await request.is_disconnected():
+            chunk = await run_in_threadpool(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        chunks.close()
+        if on_close is not None:
+            on_close()
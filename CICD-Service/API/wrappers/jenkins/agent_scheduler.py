@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# @Description: Selects the CI/CD Agent that will run a test. Keeps an
+# in-memory snapshot of the health and load (running builds) of each agent,
+# fed by the agents' health checker, by the dispatcher and by the status
+# updates sent by the pipelines, so no agent has to be contacted when a test
+# is dispatched.
+
+# generic imports
+import threading
+import logging
+import random
+import time
+
+# custom imports
+import aux.constants as Constants
+
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+
+class Agent_Load:
+
+    def __init__(self):
+        self.is_online = False
+        self.latency_ms = None
+        # Reported by the agent in its last health check
+        self.busy_executors = 0
+        self.total_executors = 0
+        self.queued_items = 0
+        self.checked_at = 0
+        # Builds dispatched to the agent that haven't finished, and how many
+        # of them the last health check already accounted for
+        self.in_flight_builds = 0
+        self.in_flight_builds_at_check = 0
+
+
+    def get_running_builds(self):
+        # The builds dispatched after the last health check aren't in the
+        # agent's executors or queue yet
+        dispatched_since_check = max(
+            self.in_flight_builds - self.in_flight_builds_at_check, 0)
+        return self.busy_executors + self.queued_items + dispatched_since_check
+
+
+    def get_free_executors(self):
+        return max(self.total_executors - self.get_running_builds(), 0)
+
+
+    def as_dict(self):
+        return {
+            "is_online": self.is_online,
+            "latency_ms": self.latency_ms,
+            "running_builds": self.get_running_builds(),
+            "busy_executors": self.busy_executors,
+            "total_executors": self.total_executors,
+            "queued_items": self.queued_items,
+            "in_flight_builds": self.in_flight_builds,
+            "checked_at": self.checked_at
+        }
+
+
+class Agent_Scheduler:
+
+    def __init__(self, policy=Constants.AGENT_SCHEDULING_POLICY):
+        self.policy = policy
+        # agent id -> Agent_Load
+        self.loads = {}
+        self.lock = threading.Lock()
+
+
+    def __get_load(self, agent_id):
+        load = self.loads.get(agent_id)
+        if load is None:
+            load = Agent_Load()
+            self.loads[agent_id] = load
+        return load
+
+
+    def update_agent_health(self, agent_id, is_online, latency_ms=None,
+                            busy_executors=0, total_executors=0,
+                            queued_items=0):
+        with self.lock:
+            agent_load = self.__get_load(agent_id)
+            agent_load.is_online = is_online
+            agent_load.checked_at = time.time()
+            if not is_online:
+                return
+            agent_load.latency_ms = latency_ms
+            agent_load.busy_executors = busy_executors
+            agent_load.total_executors = total_executors
+            agent_load.queued_items = queued_items
+            agent_load.in_flight_builds_at_check = agent_load.in_flight_builds
+
+
+    def select_agent(self, ci_cd_agents):
+        with self.lock:
+            candidates = [
+                (ci_cd_agent, self.loads[ci_cd_agent.id])
+                for ci_cd_agent in ci_cd_agents
+                if ci_cd_agent.id in self.loads
+                and self.loads[ci_cd_agent.id].is_online
+            ]
+            if not candidates:
+                return None
+
+            if self.policy == "weighted":
+                # The more free executors, the more likely to be chosen
+                selected_ci_cd_agent, agent_load = random.choices(
+                    candidates,
+                    weights=[load.get_free_executors() + 1 for _, load in candidates]
+                )[0]
+            else:
+                selected_ci_cd_agent, agent_load = min(
+                    candidates,
+                    key=lambda candidate: candidate[1].get_running_builds()
+                )
+
+            # Account for the new build right away, so concurrent dispatches
+            # are spread over the agents
+            agent_load.in_flight_builds += 1
+        return selected_ci_cd_agent
+
+
+    def build_finished(self, agent_id):
+        with self.lock:
+            agent_load = self.loads.get(agent_id)
+            if agent_load is not None and agent_load.in_flight_builds > 0:
+                agent_load.in_flight_builds -= 1
+                agent_load.in_flight_builds_at_check = min(
+                    agent_load.in_flight_builds_at_check,
+                    agent_load.in_flight_builds)
+
+
+    def forget_agent(self, agent_id):
+        with self.lock:
+            self.loads.pop(agent_id, None)
+
+
+    def get_snapshot(self):
+        with self.lock:
+            return {
+                agent_id: agent_load.as_dict()
+                for agent_id, agent_load in self.loads.items()
+            }
+
+
+agent_scheduler = Agent_Scheduler()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# @Description: Process-wide registry of authenticated Jenkins clients, one
+# per CI/CD Agent. Avoids a new connection and authentication round-trip
+# each time the CI/CD Manager has to interact with a CI/CD Agent.
+
+# generic imports
+import threading
+import logging
+
+# custom imports
+from wrappers.jenkins.wrapper import Jenkins_Wrapper
+
+# Logger
+logging.basicConfig(
+    format="%(module)-15s:%(levelname)-10s| %(message)s",
+    level=logging.INFO
+)
+
+
+class Jenkins_Client_Pool:
+
+    def __init__(self):
+        # agent id -> Jenkins_Wrapper
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def get_client(self, ci_cd_agent):
+        fingerprint = (ci_cd_agent.url, ci_cd_agent.username, ci_cd_agent.password)
+        with self.lock:
+            jenkins_wrapper = self.clients.get(ci_cd_agent.id)
+            if jenkins_wrapper is not None:
+                if jenkins_wrapper.get_fingerprint() == fingerprint:
+                    self.hits += 1
+                    return True, jenkins_wrapper
+                # The agent's credentials changed
+                self.__evict(ci_cd_agent.id)
+            self.misses += 1
+
+        # Connect outside the lock, so that a slow CI/CD Agent does not block
+        # the access to the other ones
+        jenkins_wrapper = Jenkins_Wrapper()
+        ret, message = jenkins_wrapper.connect_to_server(
+            ci_cd_agent.url,
+            ci_cd_agent.username,
+            ci_cd_agent.password
+        )
+        if not ret:
+            return False, message
+
+        with self.lock:
+            self.clients[ci_cd_agent.id] = jenkins_wrapper
+        logging.info(f"Pooled a new Jenkins client for the CI/CD Agent {ci_cd_agent.id}.")
+        return True, jenkins_wrapper
+
+
+    def register(self, agent_id, jenkins_wrapper):
+        with self.lock:
+            self.clients[agent_id] = jenkins_wrapper
+
+
+    def evict(self, agent_id):
+        with self.lock:
+            self.__evict(agent_id)
+
+
+    def __evict(self, agent_id):
+        jenkins_wrapper = self.clients.pop(agent_id, None)
+        if jenkins_wrapper is None:
+            return
+        self.evictions += 1
+        try:
+            jenkins_wrapper.session.close()
+        except Exception:
+            pass
+        logging.info(f"Evicted the Jenkins client of the CI/CD Agent {agent_id}.")
+
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+jenkins_client_pool = Jenkins_Client_Pool()
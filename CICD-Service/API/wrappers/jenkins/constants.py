@@ -13,15 +13,151 @@ currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfram
 # PIPELINE INFO
 BASE_PIPELINE_FILEPATH = os.path.join(currentdir, "pipeline.xml")
 BASE_PIPELINE = None
+# Compiled from BASE_PIPELINE and JENKINS_BASE_PIPELINE_SCRIPT at startup
+PIPELINE_TEMPLATE = None
+
+# HTTP CONNECTIONS
+# Max. number of keep-alive connections kept per Jenkins Server
+HTTP_POOL_MAXSIZE = 10
+# Bytes of the builds' console logs read at a time
+BUILD_LOG_CHUNK_SIZE = 64 * 1024
+
+# JOBS
+# Number of characters of the configuration hash used in the jobs' names
+JOB_HASH_LENGTH = 16
+
+# TESTS EXECUTION
+# sequential: all the tests run one after the other
+# parallel: the independent executions of each batch run in parallel
+TESTS_EXECUTION_MODE = "parallel"
+# Max. number of parallel branches
+MAX_PARALLEL_TESTS = 4
+
+# PYTHON ENVIRONMENTS
+# Directory, on the CI/CD Agent, where the tests' venvs are cached
+VENV_CACHE_DIR = "$HOME/.cache/5gasp/venvs"
+# Max. size of the venvs cache (MB). The least recently used venvs are 
+# removed once this size is exceeded
+VENV_CACHE_MAX_SIZE_MB = 4096
+# Sourced by each test, from the test's directory. Activates a venv with the
+# test's requirements, reusing a cached one, keyed by the hash of the
+# requirements, when possible
+CACHED_VENV_SCRIPT = """
+mkdir -p "$VENV_CACHE_DIR"
+requirements_file=requirements.txt
+if [ ! -f "$requirements_file" ]; then
+    requirements_file="$VENV_CACHE_DIR/default-requirements.txt"
+    echo "robotframework==6.0.2" > "$requirements_file"
+fi
+venv_key=$( (python3 --version; cat "$requirements_file") | sha256sum | cut -c1-32)
+venv_dir="$VENV_CACHE_DIR/$venv_key"
+# hold a shared lock while the venv is in use, so it is not removed
+: >> "$venv_dir.lock"
+exec 7< "$venv_dir.lock"
+flock -s 7
+if [ ! -f "$venv_dir/.ready" ]; then
+    # only building the venv takes the exclusive lock, so the tests that use
+    # an existing venv don't wait for each other
+    flock -u 7
+    (
+        flock 9
+        # another test may have built it meanwhile
+        if [ ! -f "$venv_dir/.ready" ]; then
+            rm -rf "$venv_dir"
+            python3 -m venv "$venv_dir" &&
+                "$venv_dir/bin/pip" install --upgrade pip &&
+                { "$venv_dir/bin/pip" install -r "$requirements_file" || "$venv_dir/bin/pip" install robotframework==6.0.2; } &&
+                touch "$venv_dir/.ready"
+        fi
+    ) 9> "$venv_dir.lock"
+    flock -s 7
+fi
+if [ ! -f "$venv_dir/.ready" ]; then
+    echo "Couldn't create the venv of $requirements_file" >&2
+    exit 1
+fi
+# the modification time of .ready is used to find the least recently used venvs
+touch "$venv_dir/.ready"
+. "$venv_dir/bin/activate"
+(
+    flock -n 8 || exit 0
+    while [ "$(du -sm "$VENV_CACHE_DIR" | cut -f1)" -gt "$VENV_CACHE_MAX_SIZE_MB" ]; do
+        oldest_venv=$(ls -t "$VENV_CACHE_DIR"/*/.ready 2>/dev/null | tail -n 1)
+        [ -n "$oldest_venv" ] || break
+        oldest_venv_dir=$(dirname "$oldest_venv")
+        [ "$oldest_venv_dir" != "$venv_dir" ] || break
+        ( flock -n 9 && rm -rf "$oldest_venv_dir" ) 9> "$oldest_venv_dir.lock" || break
+    done
+) 8> "$VENV_CACHE_DIR/.prune.lock"
+"""
+
+# LTR CACHE
+# Directory, on the CI/CD Agent, where the LTR directories are cached
+LTR_CACHE_DIR = "$HOME/.cache/5gasp/ltr"
+# Usage: ltr_sync.sh <LTR directory>. Syncs an LTR directory to the LTR cache,
+# downloading only the files whose hash, in the manifest provided by the 
+# CI/CD Manager, changed. Then, copies it to the build's test repository.
+# Requires the ltr_user, ltr_password and ltr_location credentials, and the
+# test_id and comm_token of the build
+LTR_SYNC_SCRIPT = """
+set -e
+ltr_directory=$(echo "$1" | sed 's:^/*::; s:/*$::')
+cache_dir="$LTR_CACHE_DIR/$ltr_directory"
+mkdir -p "$cache_dir"
+(
+    flock 9
+    rm -f "$cache_dir.manifest.new"
+    # without the manifest, every cached file would be pruned
+    if ! curl --fail --silent --show-error --retry 5 --get --data-urlencode "location=$ltr_directory" --data-urlencode "test_id=$test_id" --data-urlencode "communication_token=$comm_token" "$CI_CD_MANAGER_URL/tests/ltr-manifest" --output "$cache_dir.manifest.new"; then
+        echo "Couldn't get the manifest of the LTR directory $ltr_directory" >&2
+        exit 1
+    fi
+    while IFS= read -r line; do
+        file_path=${line#*  }
+        if [ -f "$cache_dir/$file_path" ] && grep -qxF "$line" "$cache_dir.manifest" 2>/dev/null; then
+            continue
+        fi
+        mkdir -p "$(dirname "$cache_dir/$file_path")"
+        if ! curl --fail --silent --show-error --retry 5 "ftp://$ltr_user:$ltr_password@$ltr_location/$ltr_directory/$file_path" --output "$cache_dir/$file_path"; then
+            rm -f "$cache_dir/$file_path"
+            echo "Couldn't download $ltr_directory/$file_path from the LTR" >&2
+            exit 1
+        fi
+        # the file may have changed after the manifest was created
+        if ! (cd "$cache_dir" && echo "$line" | sha256sum -c --quiet -); then
+            rm -f "$cache_dir/$file_path"
+            echo "The hash of $ltr_directory/$file_path doesn't match the manifest" >&2
+            exit 1
+        fi
+    done < "$cache_dir.manifest.new"
+    # remove the files that are no longer in the LTR
+    cut -c67- "$cache_dir.manifest.new" > "$cache_dir.files"
+    (cd "$cache_dir" && find . -type f | sed 's:^[.]/::') | while IFS= read -r file_path; do
+        grep -qxF "$file_path" "$cache_dir.files" || rm -f "$cache_dir/$file_path"
+    done
+    mv "$cache_dir.manifest.new" "$cache_dir.manifest"
+    mkdir -p ~/test_repository/"$BUILD_TAG"/"$ltr_directory"
+    cp -r "$cache_dir"/. ~/test_repository/"$BUILD_TAG"/"$ltr_directory"/
+) 9> "$cache_dir.lock"
+"""
+
+# QUEUE ITEMS
+# Backoff used while waiting for a queue item to originate a build (seconds)
+QUEUE_ITEM_RESOLVE_INITIAL_DELAY = 1
+QUEUE_ITEM_RESOLVE_MAX_DELAY = 30
+QUEUE_ITEM_RESOLVE_MAX_ATTEMPTS = 12
 
 JENKINS_BASE_PIPELINE_SCRIPT = """
 pipeline {
     agent any
+    parameters {
+        string(name: 'test_id', defaultValue: '', description: 'Id of the test instance')
+    }
     stages {
         stage('Setup environment') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -40,7 +176,7 @@ pipeline {
         stage('Obtain all testing artifacts') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -60,7 +196,7 @@ pipeline {
             environment {
                 <obtain_metrics_environment>
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -79,7 +215,7 @@ pipeline {
         stage('Start monitoring') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -99,7 +235,7 @@ pipeline {
             environment {
                 <obtain_tests_environment>
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -118,7 +254,7 @@ pipeline {
         stage('Perform Tests') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -137,7 +273,7 @@ pipeline {
         stage('End monitoring') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -158,7 +294,7 @@ pipeline {
             environment {
                 <publish_results_environment>
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -177,7 +313,7 @@ pipeline {
         stage('Cleanup environment') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 catchError(buildResult: 'SUCCESS', stageResult: 'FAILURE'){
@@ -196,11 +332,11 @@ pipeline {
         stage('End Testing Process') {
             environment {
                 comm_token = credentials('communication_token')
-                test_id = <test_id>
+                test_id = "${params.test_id}"
             }
             steps {
                 sh 'curl --retry 5 --header "Content-Type: application/json" --request POST --data \\'{"communication_token":"\\'"$comm_token"\\'","test_id":"\\'"$test_id"\\'", "success":true, "state": "TEST_ENDED"}\\'  <ci_cd_manager_url_test_status_url>'
-                sh 'curl --retry 5 --header "Content-Type: application/json" --request POST --data \\'{"communication_token":"\\'"$comm_token"\\'","test_id":"\\'"$test_id"\\'", "ftp_results_directory":"\\'$JOB_NAME\\'"}\\'  <ci_cd_manager_url_publish_test_results>'
+                sh 'curl --retry 5 --header "Content-Type: application/json" --request POST --data \\'{"communication_token":"\\'"$comm_token"\\'","test_id":"\\'"$test_id"\\'", "ftp_results_directory":"\\'$BUILD_TAG\\'"}\\'  <ci_cd_manager_url_publish_test_results>'
             }
         }
     }
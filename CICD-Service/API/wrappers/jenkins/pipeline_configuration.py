@@ -6,16 +6,12 @@
 # @Last Modified time: 30-05-2022 11:56:18
 # @Description: 
 # generic imports
-from requests.auth import HTTPBasicAuth
-import requests
 import logging
-import jenkins
+import hashlib
 import inspect
 import json
-import copy
 import sys
 import os
-import re
 
 # import from parent directory
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
@@ -24,7 +20,6 @@ sys.path.insert(0, parentdir)
 
 # custom imports
 import aux.constants as Constants
-import aux.utils as Utils
 import wrappers.jenkins.constants as JenkinsConstants
 
 # Logger
@@ -33,16 +28,56 @@ logging.basicConfig(
     level=logging.INFO
 )
 
+# Changes whenever the code that generates the pipelines changes
+GENERATOR_VERSION = hashlib.sha256(
+    open(__file__, "rb").read() + open(JenkinsConstants.__file__, "rb").read()
+).hexdigest()
+
+
 class Jenkins_Pipeline_Configuration:
     
-    def __init__(self, jenkins_script_str, executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information,  test_instance_id, testbed_id):
-        self.jenkins_script_str = jenkins_script_str
+    def __init__(self, executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information, testbed_id, test_executions=None, tests_execution_mode=JenkinsConstants.TESTS_EXECUTION_MODE):
+        # slot name -> value, used to render the compiled pipeline template
+        self.slots = {}
         self.executed_tests_info = executed_tests_info
         self.available_tests = available_tests
         self.descriptor_metrics_collection = descriptor_metrics_collection
         self.metrics_collection_information = metrics_collection_information
-        self.test_instance_id = test_instance_id
         self.testbed_id = testbed_id
+        # [[{"execution_id", "name", "testcase_ids"}, ...], ...], one list per batch
+        self.test_executions = test_executions
+        self.tests_execution_mode = tests_execution_mode
+
+
+    def get_configuration_hash(self):
+        # The test instance id is a build parameter, so the same configuration
+        # may be reused by several test instances
+        executed_tests = [
+            {key: value for key, value in test_info.items() if key != "test_instance_id"}
+            for test_info in self.executed_tests_info
+        ]
+        executed_tests_names = {test_info["name"] for test_info in self.executed_tests_info}
+        available_tests = sorted(
+            [test.as_dict() for test in self.available_tests if test.testid in executed_tests_names],
+            key=lambda test: test["testid"]
+        )
+        configuration = {
+            "executed_tests": executed_tests,
+            "available_tests": available_tests,
+            "descriptor_metrics_collection": self.descriptor_metrics_collection,
+            "metrics_collection_information": self.metrics_collection_information,
+            "testbed_id": self.testbed_id,
+            "test_executions": self.test_executions,
+            "tests_execution_mode": self.tests_execution_mode,
+            "max_parallel_tests": JenkinsConstants.MAX_PARALLEL_TESTS,
+            "ci_cd_manager_url": Constants.CI_CD_MANAGER_URL,
+            "metrics_repository": [Constants.MR_LOCATION, Constants.MR_DB],
+            "template_version": JenkinsConstants.PIPELINE_TEMPLATE.version,
+            "generator_version": GENERATOR_VERSION,
+        }
+        return hashlib.sha256(
+            json.dumps(configuration, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
 
 
     def create_jenkins_pipeline_script(self):
@@ -56,33 +91,49 @@ class Jenkins_Pipeline_Configuration:
         self.add_publish_results_to_jenkins_pipeline_script()
         self.add_cleanup_environment_commands_to_jenkins_pipeline_script()
 
-        # update test instance id
-        self.jenkins_script_str = self.jenkins_script_str.replace("<test_id>", str(self.test_instance_id))
         # update CI/CD location
-        self.jenkins_script_str = self.jenkins_script_str.replace("<ci_cd_manager_url_test_status_url>", Constants.CI_CD_MANAGER_URL+"/tests/test-status")
-        self.jenkins_script_str = self.jenkins_script_str.replace("<ci_cd_manager_url_publish_test_results>", Constants.CI_CD_MANAGER_URL+"/tests/publish-test-results")
-        config = JenkinsConstants.BASE_PIPELINE
-        config = config.replace("add_pipeline_configuration_here", self.jenkins_script_str)
+        self.slots["ci_cd_manager_url_test_status_url"] = Constants.CI_CD_MANAGER_URL+"/tests/test-status"
+        self.slots["ci_cd_manager_url_publish_test_results"] = Constants.CI_CD_MANAGER_URL+"/tests/publish-test-results"
+        config = JenkinsConstants.PIPELINE_TEMPLATE.render(self.slots)
 
         return config
   
 
     def add_environment_setup_to_jenkins_pipeline_script(self):
         setup_environment_commands = [
-            "sh 'mkdir -p ~/test_repository/\"$JOB_NAME\"'",
-            "sh 'mkdir -p ~/test_artifacts/\"$JOB_NAME\"'",
-            "sh 'mkdir -p ~/test_results/\"$JOB_NAME\"'",
-            "sh 'mkdir -p ~/test_logs/\"$JOB_NAME\"'"
+            "sh 'mkdir -p ~/test_repository/\"$BUILD_TAG\"'",
+            "sh 'mkdir -p ~/test_artifacts/\"$BUILD_TAG\"'",
+            "sh 'mkdir -p ~/test_results/\"$BUILD_TAG\"'",
+            "sh 'mkdir -p ~/test_logs/\"$BUILD_TAG\"'",
+            # script that provides the tests' venvs
+            self.__get_write_script_command(
+                "cached_venv.sh",
+                f"VENV_CACHE_DIR=\"{JenkinsConstants.VENV_CACHE_DIR}\"\n"
+                f"VENV_CACHE_MAX_SIZE_MB={JenkinsConstants.VENV_CACHE_MAX_SIZE_MB}"
+                f"{JenkinsConstants.CACHED_VENV_SCRIPT}"
+            ),
+            # script that syncs the LTR directories
+            self.__get_write_script_command(
+                "ltr_sync.sh",
+                f"LTR_CACHE_DIR=\"{JenkinsConstants.LTR_CACHE_DIR}\"\n"
+                f"CI_CD_MANAGER_URL=\"{Constants.CI_CD_MANAGER_URL}\""
+                f"{JenkinsConstants.LTR_SYNC_SCRIPT}"
+            ),
         ]
         return self.__update_jenkins_script("<setup_environment>", setup_environment_commands)
 
 
+    def __get_write_script_command(self, script_name, script):
+        # The heredoc must not be indented, so this is a single multi-line
+        # command
+        return "sh '''\n"\
+            f"cat > ~/test_repository/\"$BUILD_TAG\"/{script_name} << 'END_OF_SCRIPT'\n"\
+            f"{script}"\
+            "END_OF_SCRIPT\n"\
+            "'''"
+
+
     def add_obtain_and_perform_tests_to_jenkins_pipeline_script(self, executed_tests_info, available_tests):
-        needed_python_modules =[
-            "robotframework==4.1.1",
-            "paramiko==2.7.2",
-            "python3-nmap==1.5.1",
-        ]
         environment_obtain_tests = [
             f"ltr_user = credentials('ltr_user')",
             f"ltr_password = credentials('ltr_password')",
@@ -90,11 +141,12 @@ class Jenkins_Pipeline_Configuration:
         ]
 
         run_tests_commands = []
+        # testcase id -> command that performs the test
+        run_test_commands = {}
         obtain_tests_commands = list()
-        obtain_tests_commands.append(f"sh 'mkdir -p ~/test_repository/\"$JOB_NAME\"/developer-defined-tests'")
-
-        # add needed python modules
-        run_tests_commands.append(f"sh 'python3 -m pip install {' '.join(needed_python_modules)}'")
+        obtain_tests_commands.append(f"sh 'mkdir -p ~/test_repository/\"$BUILD_TAG\"/developer-defined-tests'")
+        # each LTR directory is only synced once
+        synced_ltr_directories = set()
 
         # robot tests
         test_to_perform = None
@@ -110,15 +162,15 @@ class Jenkins_Pipeline_Configuration:
                     f"{Constants.CI_CD_MANAGER_URL}/tests/download-developer-defined " \
                     f"--header \"Content-Type: application/json\" " \
                     f"--data-raw \\\'{{\"communication_token\": \"\\\'\"$comm_token\"\\\'\", "
-                    f"\"test_instance_id\": {test_info['test_instance_id']}, "
+                    f"\"test_instance_id\": \\\'\"$test_id\"\\\', "
                     f"\"developer_defined_test_name\": \"{test_info['full_name']}\"}}\\\'"
-                    f" --output ~/test_repository/\"$JOB_NAME\"/developer-defined-tests/{test_id}.tar.gz'"
+                    f" --output ~/test_repository/\"$BUILD_TAG\"/developer-defined-tests/{test_id}.tar.gz'"
                 )
                 obtain_tests_commands.append(
-                    f"sh 'cd ~/test_repository/\"$JOB_NAME\"/developer-defined-tests/ ; tar -xvf "
+                    f"sh 'cd ~/test_repository/\"$BUILD_TAG\"/developer-defined-tests/ ; tar -xvf "
                     f"{test_id}.tar.gz ; mv {test_id} {test_info['full_name']}'"
                 )
-                tests_to_perform = f"~/test_repository/\"$JOB_NAME\"/developer-defined-tests/{test_info['full_name']}"
+                tests_to_perform = f"~/test_repository/\"$BUILD_TAG\"/developer-defined-tests/{test_info['full_name']}"
                 test_dir = tests_to_perform
                 
             #PRE-DEFINED TESTS
@@ -127,9 +179,11 @@ class Jenkins_Pipeline_Configuration:
                 test_dir = available_test["ftp_base_location"]
                 test_filename = available_test["test_filename"]
                 # obtain test
-                obtain_tests_commands.append(f"sh 'wget -r -l 0 --tries=5 -P ~/test_repository/\"$JOB_NAME\" -nH ftp://$ltr_user:$ltr_password@$ltr_location/{test_dir}'")
+                if test_dir not in synced_ltr_directories:
+                    synced_ltr_directories.add(test_dir)
+                    obtain_tests_commands.append(f"sh 'sh ~/test_repository/\"$BUILD_TAG\"/ltr_sync.sh {test_dir}'")
                 # save test location. needed to run the test
-                tests_to_perform = str(os.path.join("~/test_repository/\"$JOB_NAME\"", test_dir, test_filename))
+                tests_to_perform = str(os.path.join("~/test_repository/\"$BUILD_TAG\"", test_dir, test_filename))
                 test_dir = os.path.dirname(tests_to_perform)
             
             test_to_execute = test_info['full_name']
@@ -144,8 +198,15 @@ class Jenkins_Pipeline_Configuration:
                     export_variables_commands.append(f"export {key}={value}")
                 export_variables_commands_str = " ; ".join(export_variables_commands) + " ;"
             
-            run_tests_commands.append(
-                f"sh '{export_variables_commands_str} cd {test_dir}; python3 -m venv venv; . venv/bin/activate; pip install --upgrade pip; pip install -r requirements.txt || pip install robotframework==6.0.2 ;  python -m robot.run -d ~/test_results/\"$JOB_NAME\"/{test_to_execute} {tests_to_perform} || true'")
+            # the venvs are cached, on the CI/CD Agent, and shared by the tests
+            # with the same requirements
+            run_test_commands[test_info["testcase_id"]] = \
+                f"sh '{export_variables_commands_str} cd {test_dir}; . ~/test_repository/\"$BUILD_TAG\"/cached_venv.sh ;  python -m robot.run -d ~/test_results/\"$BUILD_TAG\"/{test_to_execute} {tests_to_perform} || true'"
+
+        if self.tests_execution_mode == "parallel" and self.test_executions:
+            run_tests_commands += self.__get_parallel_run_tests_commands(run_test_commands)
+        else:
+            run_tests_commands += list(run_test_commands.values())
         
         # fill jenkins pipeline script
         self.__update_jenkins_script("<obtain_tests_environment>", environment_obtain_tests)
@@ -153,14 +214,54 @@ class Jenkins_Pipeline_Configuration:
         self.__update_jenkins_script("<perform_tests>", run_tests_commands)
     
     
+    def __get_parallel_run_tests_commands(self, run_test_commands):
+        # Batches run sequentially. In each batch, the executions run in 
+        # parallel branches, at most JenkinsConstants.MAX_PARALLEL_TESTS at
+        # a time. The tests of an execution run sequentially
+        commands = []
+        scheduled_testcases = set()
+        for batch_executions in self.test_executions:
+            branches = []
+            for execution in batch_executions:
+                branch_commands = []
+                for testcase_id in execution["testcase_ids"]:
+                    # a test is only performed once
+                    if testcase_id in run_test_commands and testcase_id not in scheduled_testcases:
+                        scheduled_testcases.add(testcase_id)
+                        branch_commands.append(run_test_commands[testcase_id])
+                if branch_commands:
+                    branch_name = f"{execution['execution_id']}: {execution['name'] or 'execution'}"
+                    branches.append((branch_name.replace("'", "\\'"), branch_commands))
+
+            for i in range(0, len(branches), JenkinsConstants.MAX_PARALLEL_TESTS):
+                parallel_branches = branches[i:i+JenkinsConstants.MAX_PARALLEL_TESTS]
+                if len(parallel_branches) == 1:
+                    commands += parallel_branches[0][1]
+                    continue
+                commands.append("parallel(")
+                for j, (branch_name, branch_commands) in enumerate(parallel_branches):
+                    commands.append(f"    '{branch_name}': {{")
+                    commands += [f"        {command}" for command in branch_commands]
+                    commands.append("    }," if j < len(parallel_branches) - 1 else "    }")
+                commands.append(")")
+
+        # tests that are not part of any execution group
+        commands += [
+            command
+            for testcase_id, command in run_test_commands.items()
+            if testcase_id not in scheduled_testcases
+        ]
+        return commands
+
+
     def add_obtain_testing_artifacts_to_jenkins_pipeline_script(self):
         obtain_testing_artifacts = [
             # Deployment information
             "sh '"\
             "curl --location --request GET \"" \
             f"{Constants.CI_CD_MANAGER_URL}/tests/testing-artifacts?test_id="\
-            "${test_id}&amp;artifact=deployment-info.json&amp;access_token="\
-            "${comm_token}\" --output ~/test_artifacts/${JOB_NAME}"\
+            "${test_id}&artifact=deployment-info.json&access_token="\
+            "${comm_token}\" --output ~/test_artifacts/${BUILD_TAG}"\
             "/deployment-info.json '",
             
             # Most Common Password
@@ -168,7 +269,7 @@ class Jenkins_Pipeline_Configuration:
             "curl --location --request GET \"" \
             f"{Constants.CI_CD_MANAGER_URL}/tests/testing-artifacts?"\
             "artifact=1000-most-common-passwords.txt\" "\
-            "--output ~/test_artifacts/${JOB_NAME}"\
+            "--output ~/test_artifacts/${BUILD_TAG}"\
             "/1000-most-common-passwords.txt '",
             
             # Most Common Usernames
@@ -176,7 +277,7 @@ class Jenkins_Pipeline_Configuration:
             "curl --location --request GET \"" \
             f"{Constants.CI_CD_MANAGER_URL}/tests/testing-artifacts?"\
             "artifact=most-common-usernames.txt\" "\
-            "--output ~/test_artifacts/${JOB_NAME}"\
+            "--output ~/test_artifacts/${BUILD_TAG}"\
             "/most-common-usernames.txt '"
         ]
         self.__update_jenkins_script(
@@ -196,8 +297,8 @@ class Jenkins_Pipeline_Configuration:
         publish_results_commands = [
             """sh '''
             #!/bin/bash
-            cd ~/test_results/\"$JOB_NAME\"/
-            find . -type f -exec curl -u $results_ftp_user:$results_ftp_password --ftp-create-dirs -T {} ftp://$results_ftp_location/\"$JOB_NAME\"/{} \\\;
+            cd ~/test_results/\"$BUILD_TAG\"/
+            find . -type f -exec curl -u $results_ftp_user:$results_ftp_password --ftp-create-dirs -T {} ftp://$results_ftp_location/\"$BUILD_TAG\"/{} \\\;
         '''""",
         ]
         self.__update_jenkins_script("<publish_results>", publish_results_commands)
@@ -206,9 +307,9 @@ class Jenkins_Pipeline_Configuration:
     
     def add_cleanup_environment_commands_to_jenkins_pipeline_script(self):
         cleanup_environment_commands = [
-            "sh 'rm -rf ~/test_repository/\"$JOB_NAME\"'",
-            "sh 'rm -rf ~/test_artifacts/\"$JOB_NAME\"'",
-            "sh 'rm -rf ~/test_results/\"$JOB_NAME\"'",
+            "sh 'rm -rf ~/test_repository/\"$BUILD_TAG\"'",
+            "sh 'rm -rf ~/test_artifacts/\"$BUILD_TAG\"'",
+            "sh 'rm -rf ~/test_results/\"$BUILD_TAG\"'",
         ]
 
         return self.__update_jenkins_script("<cleanup_environment>", cleanup_environment_commands)
@@ -223,7 +324,7 @@ class Jenkins_Pipeline_Configuration:
 
         obtain_metrics_collection_file_commands = []
         metrics_dir = metrics_collection_information["metrics_collection"]["ftp_base_location"]
-        obtain_metrics_collection_file_commands.append(f"sh 'wget -r -l 0 --tries=5 -P ~/test_repository/\"$JOB_NAME\" -nH ftp://$ltr_user:$ltr_password@$ltr_location/{metrics_dir}'")
+        obtain_metrics_collection_file_commands.append(f"sh 'sh ~/test_repository/\"$BUILD_TAG\"/ltr_sync.sh {metrics_dir}'")
         self.__update_jenkins_script("<obtain_metrics_collection_files>", obtain_metrics_collection_file_commands)
         self.__update_jenkins_script("<obtain_metrics_environment>", obtain_metrics_environment)
 
@@ -232,9 +333,7 @@ class Jenkins_Pipeline_Configuration:
 
         if not descriptor_metrics_collection:
             self.__update_jenkins_script("<start_metrics_collection>", ["sh 'echo \"No metrics to collect\"'"])
-            self.jenkins_script_str = self.jenkins_script_str.replace("<action>", "start")
             self.__update_jenkins_script("<end_metrics_collection>", ["sh 'echo \"No metrics collected\"'"])
-            self.jenkins_script_str = self.jenkins_script_str.replace("<action>", "stop")
             return
             
         needed_python_modules =[
@@ -250,7 +349,7 @@ class Jenkins_Pipeline_Configuration:
             metrics_dir = metrics_collection_information["metrics_collection"]["ftp_base_location"]
             metrics_filename = metrics_collection_information["metrics_collection"]["test_filename"]
             # save test location. needed to run the test
-            metrics_to_collect[metrics_collection_id] = str(os.path.join("~/test_repository/\"$JOB_NAME\"", metrics_dir, metrics_filename))
+            metrics_to_collect[metrics_collection_id] = str(os.path.join("~/test_repository/\"$BUILD_TAG\"", metrics_dir, metrics_filename))
             # save env to export
             export_variables_commands = []
             for parameter in metrics_collection["parameters"]:
@@ -263,20 +362,19 @@ class Jenkins_Pipeline_Configuration:
             export_variables_commands.append(f"export INFLUX_DB_NAME={Constants.MR_DB}")
             # envs to one line
             export_variables_commands_str = " ; ".join(export_variables_commands)
-            execute_metrics_collection_commands.append(f"sh '{ export_variables_commands_str} ;  python3 -m robot.run -d ~/test_results/\"$JOB_NAME\"/{metrics_collection_id} {metrics_to_collect[metrics_collection_id]}'")
-        
-        
-        self.__update_jenkins_script("<start_metrics_collection>", execute_metrics_collection_commands)
-        self.jenkins_script_str = self.jenkins_script_str.replace("<action>", "start")
-        self.__update_jenkins_script("<end_metrics_collection>", execute_metrics_collection_commands)
-        self.jenkins_script_str = self.jenkins_script_str.replace("<action>", "stop")
+            execute_metrics_collection_commands.append(f"sh '{ export_variables_commands_str} ;  python3 -m robot.run -d ~/test_results/\"$BUILD_TAG\"/{metrics_collection_id} {metrics_to_collect[metrics_collection_id]}'")
         
         
+        self.__update_jenkins_script("<start_metrics_collection>", [
+            command.replace("<action>", "start")
+            for command in execute_metrics_collection_commands
+        ])
+        self.__update_jenkins_script("<end_metrics_collection>", [
+            command.replace("<action>", "stop")
+            for command in execute_metrics_collection_commands
+        ])
 
 
     def __update_jenkins_script(self, tag_to_replace, commands_lst):
-        item1 = re.search(tag_to_replace, self.jenkins_script_str, re.MULTILINE)
-        item2 = re.search("{\s*" + tag_to_replace, self.jenkins_script_str, re.MULTILINE)
-        line_offset = item1.span(0)[0] - item2.span(0)[0] - 2
-        commands_str = "\n{}".format(line_offset * " ").join(commands_lst)
-        self.jenkins_script_str = self.jenkins_script_str.replace(tag_to_replace, commands_str)
+        # The commands are indented and escaped when the template is rendered
+        self.slots[tag_to_replace.strip("<>")] = commands_lst
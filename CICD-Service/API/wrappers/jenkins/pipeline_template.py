@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# @Description: Compiled template of the Jenkins Job configuration. The base
+# pipeline script and the Jenkins job XML are parsed once, at startup, into a
+# list of pre-escaped literal fragments and slots. Rendering a pipeline is a
+# single pass that fills the slots and joins the fragments.
+
+# generic imports
+from xml.sax.saxutils import escape
+import hashlib
+import re
+
+# Placeholders, in the pipeline script, whose value will be provided when
+# rendering it. E.g.: <perform_tests>
+SLOT_REGEX = re.compile(r"<([a-z_]+)>")
+# Placeholder, in the Jenkins job XML, where the pipeline script goes
+PIPELINE_SCRIPT_PLACEHOLDER = "add_pipeline_configuration_here"
+
+
+class Pipeline_Template:
+
+    def __init__(self, pipeline_script, job_config_xml):
+        # Changes whenever the base pipeline script or the job XML change
+        self.version = hashlib.sha256(
+            (pipeline_script + job_config_xml).encode("utf-8")).hexdigest()
+
+        xml_prefix, xml_suffix = job_config_xml.split(
+            PIPELINE_SCRIPT_PLACEHOLDER, 1)
+
+        # Fragments are either literal strings (already escaped) or the index
+        # of a slot
+        self.fragments = [xml_prefix]
+        # Slots: (slot name, indentation of the lines after the first one)
+        self.slots = []
+        position = 0
+        for match in SLOT_REGEX.finditer(pipeline_script):
+            self.fragments.append(
+                escape(pipeline_script[position:match.start()]))
+            line_start = pipeline_script.rfind("\n", 0, match.start()) + 1
+            self.fragments.append(len(self.slots))
+            self.slots.append(
+                (match.group(1), "\n" + " " * (match.start() - line_start)))
+            position = match.end()
+        self.fragments.append(escape(pipeline_script[position:]))
+        self.fragments.append(xml_suffix)
+
+        self.slot_names = {slot_name for slot_name, _ in self.slots}
+
+
+    def render(self, values):
+        # values: {slot name: str | list of lines}
+        missing_slots = self.slot_names - values.keys()
+        if missing_slots:
+            raise ValueError(
+                f"No value was provided for the slots: {', '.join(sorted(missing_slots))}")
+
+        rendered_slots = []
+        for slot_name, indentation in self.slots:
+            value = values[slot_name]
+            if isinstance(value, (list, tuple)):
+                value = indentation.join(value)
+            rendered_slots.append(escape(str(value)))
+
+        return "".join(
+            rendered_slots[fragment] if isinstance(fragment, int) else fragment
+            for fragment in self.fragments
+        )
@@ -17,9 +17,14 @@
 
 # generic imports
 from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 import requests
 import logging
 import jenkins
+import hashlib
+import hmac
 import inspect
 import json
 import copy
@@ -60,6 +65,9 @@ class Jenkins_Wrapper:
     jenkins_username = None
     jenkins_password = None
     jenkins_connection_url = None
+    session = None
+    crumb = None
+    known_jobs = None
 
     # Class main functions
     def connect_to_server(self, jenkins_connection_url, jenkins_username, jenkins_password):
@@ -68,14 +76,64 @@ class Jenkins_Wrapper:
         self.jenkins_password = jenkins_password
         try:
             server = jenkins.Jenkins(url=jenkins_connection_url, username=jenkins_username, password=jenkins_password, timeout=30)
+            # Long-lived HTTP sessions, so that the TCP/TLS connections to the
+            # Jenkins Server are kept alive and reused between requests
+            adapter = HTTPAdapter(pool_maxsize=JenkinsConstants.HTTP_POOL_MAXSIZE)
+            server._session.mount("http://", adapter)
+            server._session.mount("https://", adapter)
+            session = requests.Session()
+            session.auth = HTTPBasicAuth(jenkins_username, jenkins_password)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
             user = server.get_whoami()
         except Exception as e:
             return False, f"Unable to connect to Jenkins Server. Cause: {str(e)}"
 
         self.jenkins_server = server
+        self.session = session
+        self.crumb = None
+        # Jobs known to exist on the Jenkins Server
+        self.known_jobs = set()
         return True, ""
 
 
+    def get_fingerprint(self):
+        return (self.jenkins_connection_url, self.jenkins_username, self.jenkins_password)
+
+
+    @requires_auth
+    def get_crumb(self):
+        # The crumb is bound to the session, so it can be reused while the 
+        # session is alive
+        if self.crumb is not None:
+            return True, self.crumb
+        try:
+            r = self.session.get(f'{self.jenkins_connection_url}/crumbIssuer/api/json',
+                      timeout=10)
+
+            if r.status_code != 200:
+                raise Exception(r.content)
+
+            self.crumb = json.loads(r.text)['crumb']
+        except Exception as e:
+            return False, f"Unable to get Jenkins Crumb. Cause:\n{str(e)}"
+        return True, self.crumb
+
+
+    def __post_with_crumb(self, url, **kwargs):
+        # The cached crumb is rejected, with a 403, once Jenkins expires it
+        # (e.g. after a restart). Then, a new crumb is requested, once
+        for _ in range(2):
+            ret, crumb = self.get_crumb()
+            if not ret:
+                raise Exception(crumb)
+            response = self.session.post(url, headers={'Jenkins-Crumb': crumb}, **kwargs)
+            if response.status_code != 403:
+                break
+            self.crumb = None
+        return response
+
+
     @requires_auth
     def get_build_log(self, job_name, build_number):
         try:
@@ -85,6 +143,30 @@ class Jenkins_Wrapper:
         return True, ret
 
 
+    @requires_auth
+    def get_build_log_stream(self, job_name, build_number):
+        # The console log, as an iterator of bytes chunks, read from the
+        # progressive text endpoint while it is downloaded
+        try:
+            r = self.session.get(
+                f'{self.jenkins_connection_url}/job/{quote(job_name)}/'\
+                    f'{build_number}/logText/progressiveText',
+                params={"start": 0},
+                stream=True,
+                timeout=30)
+            if r.status_code != 200:
+                r.close()
+                raise Exception(f"HTTP {r.status_code}")
+        except Exception as e:
+            return False, f"Unable to get build logs. Cause: {str(e)}"
+        return True, self.__iterate_response(r)
+
+
+    def __iterate_response(self, response):
+        with response:
+            yield from response.iter_content(JenkinsConstants.BUILD_LOG_CHUNK_SIZE)
+
+
     @requires_auth
     def get_last_build_number(self, job_name):
         try:
@@ -100,17 +182,51 @@ class Jenkins_Wrapper:
             ret = self.jenkins_server.create_job(job_name, job_config_xml_str)
         except Exception as e:
             return False, f"Unable to create new job. Cause: {str(e)}"
+        self.known_jobs.add(job_name)
         return True, job_name
 
+
+    @requires_auth
+    def job_exists(self, job_name):
+        if job_name in self.known_jobs:
+            return True, True
+        try:
+            exists = self.jenkins_server.job_exists(job_name)
+        except Exception as e:
+            return False, f"Unable to check if the job '{job_name}' exists. Cause: {str(e)}"
+        if exists:
+            self.known_jobs.add(job_name)
+        return True, exists
+
     
     @requires_auth
-    def run_job(self, job_name):
+    def run_job(self, job_name, parameters=None):
+        # Jenkins does not assign the build number right away. It returns the
+        # id of the queue item that will, later on, originate the build
         try:
-            build_number = self.jenkins_server.build_job(job_name)
+            queue_item_id = self.jenkins_server.build_job(job_name, parameters)
         except Exception as e:
+            # The job may have been deleted from the Jenkins Server
+            self.known_jobs.discard(job_name)
             return False, f"Unable to run the job '{job_name}'. Cause: {str(e)}"
-        return True, build_number
-    
+        return True, queue_item_id
+
+
+    @requires_auth
+    def get_queue_item_build_number(self, queue_item_id):
+        # Returns None while the queue item is still waiting for an executor
+        try:
+            queue_item = self.jenkins_server.get_queue_item(queue_item_id)
+        except Exception as e:
+            return False, f"Unable to get the queue item {queue_item_id}. Cause: {str(e)}"
+        if queue_item.get("cancelled"):
+            return False, f"The queue item {queue_item_id} was cancelled."
+        executable = queue_item.get("executable")
+        if not executable:
+            return True, None
+        return True, executable["number"]
+
+
     @requires_auth
     def get_jobs(self):
         try:
@@ -121,52 +237,145 @@ class Jenkins_Wrapper:
 
 
     @requires_auth
-    def create_credential(self, credential_name, credential_value, credential_description="", credential_scope="GLOBAL"):
-        # create session
-        s = requests.Session()
-
-        # 1. get a valid crumb
+    def get_load(self):
+        # Small, filtered requests instead of downloading all the jobs
         try:
-            r = s.get(f'{self.jenkins_connection_url}/crumbIssuer/api/json',
-                      auth=HTTPBasicAuth(self.jenkins_username, self.jenkins_password),
-                      timeout=10)
-
+            r = self.session.get(
+                f'{self.jenkins_connection_url}/computer/api/json',
+                params={"tree": "busyExecutors,totalExecutors"},
+                timeout=10)
             if r.status_code != 200:
                 raise Exception(r.content)
+            executors = r.json()
 
-            crumb = json.loads(r.text)['crumb']
+            r = self.session.get(
+                f'{self.jenkins_connection_url}/queue/api/json',
+                params={"tree": "items[id]"},
+                timeout=10)
+            if r.status_code != 200:
+                raise Exception(r.content)
+            queue = r.json()
         except Exception as e:
-            return False, f"Unable to get Jenkins Crumb. Cause:\n{str(e)}"
+            return False, f"Unable to obtain the Jenkins Server load. Cause: {str(e)}"
+        return True, {
+            "busy_executors": executors["busyExecutors"],
+            "total_executors": executors["totalExecutors"],
+            "queued_items": len(queue["items"])
+        }
+
+
+    @requires_auth
+    def create_credential(self, credential_name, credential_value, credential_description="", credential_scope="GLOBAL"):
+        return self.provision_credentials(
+            {credential_name: (credential_value, credential_description)},
+            credential_scope
+        )
 
-        # 2. using the received crumb, get the an auth token
+
+    def __get_credential_fingerprint(self, credential_name, credential_value):
+        # Jenkins never returns the secrets, so a keyed hash of each secret is
+        # stored in the credential's description. It allows us to know if a
+        # credential has to be updated, without disclosing its value
+        return hmac.new(
+            Constants.SECRET_KEY.encode("utf-8"),
+            f"{credential_name}:{credential_value}".encode("utf-8"),
+            hashlib.sha256
+        ).hexdigest()[:16]
+
+
+    @requires_auth
+    def provision_credentials(self, credentials, credential_scope="GLOBAL"):
+        # credentials: {credential_name: (credential_value, credential_description)}
+        # reuse the long-lived session
+        s = self.session
+        credentials_store_url = f'{self.jenkins_connection_url}/credentials/store/system/domain/_'
+
+        # 1. using a valid crumb, get the an auth token
         try:
             token_name = "communicationToken"
-            r = s.post(f'{self.jenkins_connection_url}/me/descriptorByName/jenkins.security.ApiTokenProperty/generateNewToken?newTokenName={token_name}',
+            r = self.__post_with_crumb(f'{self.jenkins_connection_url}/me/descriptorByName/jenkins.security.ApiTokenProperty/generateNewToken?newTokenName={token_name}',
                        auth=HTTPBasicAuth(self.jenkins_username, self.jenkins_password),
-                       headers={'Jenkins-Crumb': crumb},
                        timeout=10)
 
             if r.status_code != 200:
                 raise Exception(r.content)
 
-            token_name = json.loads(r.text)['data']['tokenName']
+            token_uuid = json.loads(r.text)['data']['tokenUuid']
             token_value = json.loads(r.text)['data']['tokenValue']
         except Exception as e:
             return False, f"Unable to get Jenkins Auth Token. Cause:\n{str(e)}"
+        auth = HTTPBasicAuth(self.jenkins_username, token_value)
 
-        # 3. remove previous credential, if it exists
         try:
-            r = s.post(f'{self.jenkins_connection_url}/credentials/store/system/domain/_/credential/{credential_name}/doDelete',
-                       auth=HTTPBasicAuth(self.jenkins_username, token_value),
-                       headers={'Jenkins-Crumb': crumb},
+            # 2. get the existing credentials
+            try:
+                r = s.get(f'{credentials_store_url}/api/json?tree=credentials[id,description]',
+                          auth=auth,
+                          timeout=10)
+
+                if r.status_code != 200:
+                    raise Exception(r.content)
+
+                existing_credentials = {
+                    credential["id"]: credential.get("description") or ""
+                    for credential in json.loads(r.text)["credentials"]
+                }
+            except Exception as e:
+                return False, f"Unable to list Jenkins credentials. Cause:\n{str(e)}"
+
+            # 3. skip the credentials whose value did not change
+            changed_credentials = {}
+            for credential_name, (credential_value, credential_description) in credentials.items():
+                fingerprint = self.__get_credential_fingerprint(credential_name, credential_value)
+                if existing_credentials.get(credential_name, "").endswith(f"[{fingerprint}]"):
+                    continue
+                changed_credentials[credential_name] = (
+                    credential_name in existing_credentials,
+                    credential_value,
+                    f"{credential_description} [{fingerprint}]".lstrip()
+                )
+            logging.info(f"Provisioning {len(changed_credentials)} Jenkins credentials "\
+                f"({len(credentials) - len(changed_credentials)} unchanged).")
+
+            # 4. apply the changes concurrently
+            with ThreadPoolExecutor(max_workers=JenkinsConstants.HTTP_POOL_MAXSIZE) as executor:
+                results = list(executor.map(
+                    lambda credential: self.__replace_credential(
+                        credentials_store_url, auth, credential[0],
+                        *credential[1], credential_scope),
+                    changed_credentials.items()
+                ))
+        finally:
+            # 5. revoke the auth token
+            try:
+                self.__post_with_crumb(f'{self.jenkins_connection_url}/me/descriptorByName/jenkins.security.ApiTokenProperty/revoke?tokenUuid={token_uuid}',
+                       auth=HTTPBasicAuth(self.jenkins_username, self.jenkins_password),
                        timeout=10)
+            except Exception as e:
+                logging.warning(f"Unable to revoke Jenkins Auth Token. Cause: {str(e)}")
 
-            if r.status_code != 200 and r.status_code != 404:
-                raise Exception(r.content)
-        except Exception as e:
-            return False, f"Unable to remove Jenkins credential. Cause:\n{str(e)}"
+        errors = [message for ret, message in results if not ret]
+        if errors:
+            return False, "\n".join(errors)
+        return True, ""
+
+
+    def __replace_credential(self, credentials_store_url, auth, credential_name, exists, credential_value, credential_description, credential_scope):
+        s = self.session
 
-        # 4. create a credential
+        # remove previous credential, if it exists
+        if exists:
+            try:
+                r = s.post(f'{credentials_store_url}/credential/{credential_name}/doDelete',
+                           auth=auth,
+                           timeout=10)
+
+                if r.status_code != 200 and r.status_code != 404:
+                    raise Exception(r.content)
+            except Exception as e:
+                return False, f"Unable to remove Jenkins credential {credential_name}. Cause:\n{str(e)}"
+
+        # create a credential
         try:
             # data to be submitted
             json_data = {
@@ -183,27 +392,25 @@ class Jenkins_Wrapper:
             # generate encoded url
             encoded_url = requests.Request(
                 "POST",
-                f'{self.jenkins_connection_url}/credentials/store/system/domain/_/createCredentials',
+                f'{credentials_store_url}/createCredentials',
                 params={"json": json.dumps(json_data)}
             ).prepare().url
 
             # submit new credential
             r = s.post(encoded_url,
-                       auth=HTTPBasicAuth( self.jenkins_username, token_value),
+                       auth=auth,
                        headers={'Content-Type': 'application/x-www-form-urlencoded'},
                        timeout=10)
 
             if r.status_code != 200:
                 raise Exception(r.content)
         except Exception as e:
-            return False, f"Unable to create Jenkins Credential. Cause:\n{str(e)}"
-        
+            return False, f"Unable to create Jenkins Credential {credential_name}. Cause:\n{str(e)}"
+
         return True, ""
 
-    def create_jenkins_pipeline_script(self, executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information, test_instance_id, testbed_id):
-        jenkins_script_str = copy.copy(
-            JenkinsConstants.JENKINS_BASE_PIPELINE_SCRIPT)
-        pipeline_configuration = JenkinsPipelineConfiguration.Jenkins_Pipeline_Configuration(jenkins_script_str, executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information, test_instance_id, testbed_id)
+    def create_jenkins_pipeline_script(self, executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information, testbed_id):
+        pipeline_configuration = JenkinsPipelineConfiguration.Jenkins_Pipeline_Configuration(executed_tests_info, available_tests, descriptor_metrics_collection, metrics_collection_information, testbed_id)
         conf = pipeline_configuration.create_jenkins_pipeline_script()
         return conf
   